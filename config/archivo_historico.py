@@ -0,0 +1,264 @@
+"""
+Archivo histórico de ventas
+Los períodos cerrados (años anteriores) se trasladan desde inventario.db a
+archivos archivo_AAAA.db junto a la base principal. Las pantallas del día a
+día solo leen el archivo principal; los reportes que piden el historial
+completo usan conexiones que adjuntan (ATTACH) los archivos y crean vistas
+TEMP con el mismo nombre que las tablas, de modo que las consultas existentes
+leen todo el historial sin cambios.
+"""
+import glob
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from urllib.request import pathname2url
+from config.migraciones import COLUMNAS_GENERADAS
+
+# Tablas archivadas: (tabla, columna de fecha). detalle_ventas sigue a su venta
+TABLAS_ARCHIVADAS = (
+    ("ventas", "fecha_venta"),
+    ("detalle_ventas", None),
+    ("movimientos_cuenta", "fecha_movimiento"),
+)
+
+# SQLite admite 10 bases adjuntas por conexión (se reserva una)
+MAXIMO_ADJUNTOS = 9
+
+_PATRON_ARCHIVO = re.compile(r"^archivo_(\d{4})\.db$")
+
+# Generación de los archivos históricos: ArchivadorVentas la incrementa al
+# crear un archivo nuevo y las conexiones con historial vuelven a adjuntar
+# solo cuando cambia (los creados por otro proceso se ven al reiniciar)
+_generacion = 0
+_lock_generacion = threading.Lock()
+
+
+def generacion_archivos():
+    """Generación actual de los archivos históricos de este proceso"""
+    return _generacion
+
+
+def avisar_archivo_nuevo():
+    """Registrar que se creó un archivo histórico"""
+    global _generacion
+    with _lock_generacion:
+        _generacion += 1
+
+
+def ruta_archivo(db_name, anio):
+    """Ruta del archivo histórico de un año, junto a la base principal"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), f"archivo_{anio}.db")
+
+
+def archivos_historicos(db_name):
+    """Retornar [(año, ruta)] de los archivos históricos existentes, del más reciente al más antiguo"""
+    if db_name == ":memory:":
+        return []
+    archivos = []
+    for ruta in glob.glob(os.path.join(os.path.dirname(os.path.abspath(db_name)), "archivo_*.db")):
+        coincidencia = _PATRON_ARCHIVO.match(os.path.basename(ruta))
+        if coincidencia:
+            archivos.append((int(coincidencia.group(1)), ruta))
+    archivos.sort(reverse=True)
+    return archivos
+
+
+def columnas(conn, tabla, esquema="main"):
+    """Columnas almacenadas de una tabla (sin columnas generadas)"""
+    return [fila[1] for fila in conn.execute(f"PRAGMA {esquema}.table_info({tabla})")]
+
+
+def adjuntar_historico(conn, db_name, adjuntos):
+    """
+    Adjuntar a la conexión los archivos históricos y (re)crear las vistas TEMP
+    adjuntos: conjunto de años ya adjuntos a la conexión; se actualiza y se retorna
+    Si los archivos no cambiaron no hace nada. Recorre el directorio, por eso
+    el pool la llama solo cuando cambia generacion_archivos().
+    Debe llamarse fuera de una transacción.
+    """
+    archivos = archivos_historicos(db_name)
+    if len(archivos) > MAXIMO_ADJUNTOS:
+        print(f"Hay {len(archivos)} archivos históricos; solo se adjuntan los {MAXIMO_ADJUNTOS} más recientes")
+        archivos = archivos[:MAXIMO_ADJUNTOS]
+    anios = {anio for anio, _ in archivos}
+    if anios == adjuntos:
+        return adjuntos
+
+    solo_lectura = conn.execute("PRAGMA query_only").fetchone()[0]
+    # query_only impide crear objetos TEMP; los archivos se abren igualmente con mode=ro
+    conn.execute("PRAGMA query_only = 0")
+    try:
+        for tabla, _ in TABLAS_ARCHIVADAS:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{tabla}")
+        for anio in adjuntos - anios:
+            conn.execute(f"DETACH DATABASE archivo_{anio}")
+        for anio, ruta in archivos:
+            if anio not in adjuntos:
+                conn.execute(f"ATTACH DATABASE ? AS archivo_{anio}",
+                             (f"file:{pathname2url(ruta)}?mode=ro",))
+
+        for tabla, _ in TABLAS_ARCHIVADAS:
+            nombres = columnas(conn, tabla)
+            generadas = COLUMNAS_GENERADAS.get(tabla, ())
+            lista_principal = nombres + [nombre for nombre, _ in generadas]
+            selecciones = [f"SELECT {', '.join(lista_principal)} FROM main.{tabla}"]
+            for anio in sorted(anios):
+                existentes = set(columnas(conn, tabla, f"archivo_{anio}"))
+                if not existentes:
+                    continue
+                # Columnas agregadas después de archivar el año se leen como NULL;
+                # las generadas se calculan con su expresión
+                lista = [c if c in existentes else f"NULL AS {c}" for c in nombres]
+                lista += [f"{expresion} AS {nombre}" for nombre, expresion in generadas]
+                selecciones.append(f"SELECT {', '.join(lista)} FROM archivo_{anio}.{tabla}")
+            conn.execute(f"CREATE TEMP VIEW {tabla} AS " + " UNION ALL ".join(selecciones))
+    finally:
+        conn.execute(f"PRAGMA query_only = {solo_lectura}")
+    return anios
+
+
+class ArchivadorVentas:
+    """
+    Traslada las ventas, sus detalles y los movimientos de cuenta de un año
+    cerrado a archivo_AAAA.db, mes por mes para no retener el bloqueo de
+    escritura más que unos milisegundos.
+    """
+
+    def __init__(self, db_name="inventario.db"):
+        self.db_name = db_name
+
+    def _conectar(self, anio):
+        """Conexión propia con el archivo del año adjunto como "archivo" """
+        from config.database import DatabaseManager, PoolConexiones
+
+        DatabaseManager(self.db_name).asegurar_esquema()
+        espera = PoolConexiones.obtener(self.db_name).pragmas.get('busy_timeout', 5000) / 1000
+        conn = sqlite3.connect(self.db_name, timeout=espera, isolation_level=None)
+        conn.execute("ATTACH DATABASE ? AS archivo", (ruta_archivo(self.db_name, anio),))
+        return conn
+
+    @staticmethod
+    def preparar_tablas(conn):
+        """Crear en el archivo las tablas que falten y las columnas nuevas de la base principal"""
+        for tabla, columna_fecha in TABLAS_ARCHIVADAS:
+            nombres = columnas(conn, tabla)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS archivo.{tabla} AS "
+                         f"SELECT {', '.join(nombres)} FROM main.{tabla} WHERE 0")
+            existentes = set(columnas(conn, tabla, "archivo"))
+            for nombre in nombres:
+                if nombre not in existentes:
+                    conn.execute(f"ALTER TABLE archivo.{tabla} ADD COLUMN {nombre}")
+            # El índice único hace idempotente la copia (INSERT OR IGNORE)
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS archivo.ux_{tabla}_id ON {tabla} (id)")
+            if columna_fecha:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS archivo.idx_{tabla}_fecha ON {tabla} ({columna_fecha})")
+            # Índices sobre las expresiones de las columnas generadas de la base principal
+            for nombre, expresion in COLUMNAS_GENERADAS.get(tabla, ()):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS archivo.idx_{tabla}_{nombre} ON {tabla} ({expresion})")
+        conn.execute("CREATE INDEX IF NOT EXISTS archivo.idx_detalle_ventas_venta ON detalle_ventas (venta_id)")
+
+    @staticmethod
+    def periodos_mensuales(anio):
+        """Rangos semiabiertos [inicio, fin) de cada mes del año"""
+        for mes in range(1, 13):
+            inicio = f"{anio}-{mes:02d}-01"
+            fin = f"{anio + 1}-01-01" if mes == 12 else f"{anio}-{mes + 1:02d}-01"
+            yield inicio, fin
+
+    def _trasladar_mes(self, conn, inicio, fin):
+        """Copiar un mes al archivo y luego borrarlo de la base principal"""
+        ventas_mes = "SELECT id FROM main.ventas WHERE fecha_venta >= ? AND fecha_venta < ?"
+        rango = (inicio, fin)
+        cols = {tabla: ", ".join(columnas(conn, tabla)) for tabla, _ in TABLAS_ARCHIVADAS}
+
+        # 1. Copia. En modo WAL una transacción sobre varias bases no es atómica
+        # entre archivos, por eso se confirma la copia antes de borrar: si el
+        # proceso se interrumpe, repetir el archivado completa el traslado
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"INSERT OR IGNORE INTO archivo.ventas ({cols['ventas']}) "
+                         f"SELECT {cols['ventas']} FROM main.ventas "
+                         f"WHERE fecha_venta >= ? AND fecha_venta < ?", rango)
+            conn.execute(f"INSERT OR IGNORE INTO archivo.detalle_ventas ({cols['detalle_ventas']}) "
+                         f"SELECT {cols['detalle_ventas']} FROM main.detalle_ventas "
+                         f"WHERE venta_id IN ({ventas_mes})", rango)
+            conn.execute(f"INSERT OR IGNORE INTO archivo.movimientos_cuenta ({cols['movimientos_cuenta']}) "
+                         f"SELECT {cols['movimientos_cuenta']} FROM main.movimientos_cuenta "
+                         f"WHERE fecha_movimiento >= ? AND fecha_movimiento < ?", rango)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+        # 2. Borrado de la base principal, solo de lo que ya está en el archivo.
+        # El resumen diario del mes se conserva: los triggers lo descontarían
+        # al borrar, pero las estadísticas deben seguir incluyendo el año archivado
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            dias = (inicio, fin)
+            resumen = conn.execute("SELECT dia, ventas, total, articulos, clientes FROM ventas_resumen_diario "
+                                   "WHERE dia >= ? AND dia < ?", dias).fetchall()
+            resumen_clientes = conn.execute("SELECT dia, cliente_id, ventas FROM ventas_resumen_clientes "
+                                            "WHERE dia >= ? AND dia < ?", dias).fetchall()
+            detalles = conn.execute(
+                f"DELETE FROM main.detalle_ventas WHERE venta_id IN ({ventas_mes}) "
+                f"AND id IN (SELECT id FROM archivo.detalle_ventas)", rango).rowcount
+            ventas = conn.execute(
+                "DELETE FROM main.ventas WHERE fecha_venta >= ? AND fecha_venta < ? "
+                "AND id IN (SELECT id FROM archivo.ventas)", rango).rowcount
+            movimientos = conn.execute(
+                "DELETE FROM main.movimientos_cuenta WHERE fecha_movimiento >= ? AND fecha_movimiento < ? "
+                "AND id IN (SELECT id FROM archivo.movimientos_cuenta)", rango).rowcount
+            conn.executemany("INSERT OR REPLACE INTO ventas_resumen_diario "
+                             "(dia, ventas, total, articulos, clientes) VALUES (?, ?, ?, ?, ?)", resumen)
+            conn.executemany("INSERT OR REPLACE INTO ventas_resumen_clientes "
+                             "(dia, cliente_id, ventas) VALUES (?, ?, ?)", resumen_clientes)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return {'ventas': ventas, 'detalle_ventas': detalles, 'movimientos_cuenta': movimientos}
+
+    def archivar_anio(self, anio):
+        """
+        Archivar un año cerrado (anterior al actual)
+        Retorna un diccionario con las filas trasladadas por tabla
+        """
+        if anio >= datetime.now().year:
+            raise ValueError(f"El año {anio} no está cerrado; solo se archivan años anteriores")
+
+        totales = {tabla: 0 for tabla, _ in TABLAS_ARCHIVADAS}
+        nuevo = not os.path.exists(ruta_archivo(self.db_name, anio))
+        conn = self._conectar(anio)
+        try:
+            self.preparar_tablas(conn)
+            if nuevo:
+                # Con las tablas ya creadas, las conexiones con historial lo adjuntan
+                avisar_archivo_nuevo()
+            for inicio, fin in self.periodos_mensuales(anio):
+                for tabla, filas in self._trasladar_mes(conn, inicio, fin).items():
+                    totales[tabla] += filas
+        finally:
+            conn.close()
+
+        print(f"Año {anio} archivado en {ruta_archivo(self.db_name, anio)}: {totales}")
+        return totales
+
+    def anios_pendientes(self):
+        """Años cerrados que todavía tienen ventas o movimientos en la base principal"""
+        from config.database import DatabaseManager
+
+        resultado = DatabaseManager(self.db_name).ejecutar_consulta('''
+            SELECT DISTINCT CAST(strftime('%Y', fecha_venta) AS INTEGER) FROM ventas
+            WHERE fecha_venta < ?
+            UNION
+            SELECT DISTINCT CAST(strftime('%Y', fecha_movimiento) AS INTEGER) FROM movimientos_cuenta
+            WHERE fecha_movimiento < ?
+        ''', (f"{datetime.now().year}-01-01",) * 2)
+        return sorted(fila[0] for fila in resultado or [] if fila[0])
+
+    def archivar_cerrados(self):
+        """Archivar todos los años cerrados pendientes; retorna {año: totales}"""
+        return {anio: self.archivar_anio(anio) for anio in self.anios_pendientes()}
@@ -0,0 +1,203 @@
+"""
+Copias en memoria de tablas muy leídas (catálogo de productos, directorio
+de clientes). Cada caché se valida con DatabaseManager.version_datos: si
+ninguna conexión escribió desde la última lectura, se responde desde memoria
+sin tocar la base. Si hubo escrituras, solo se releen las filas cuya
+version_fila (mantenida por triggers, ver agregar_version_fila) es mayor
+a la última vista, y se quitan las anotadas en filas_borradas después de
+la última anotación vista (ver registrar_borrados). El mantenimiento depura
+las anotaciones ya vistas; si falta alguna que la caché no vio, se relee
+la tabla completa.
+"""
+import os
+import threading
+
+_CLASES_SOLO_LECTURA = {}
+
+
+def clase_solo_lectura(clase):
+    """
+    Subclase de un modelo con __slots__ cuyos atributos no se pueden
+    modificar. Los objetos guardados en una caché pasan a esta clase, así
+    se entregan sin copiarlos y un cambio accidental falla en vez de
+    alterar lo que ven las demás ventanas.
+    """
+    subclase = _CLASES_SOLO_LECTURA.get(clase)
+    if subclase is None:
+        def __setattr__(self, nombre, valor):
+            # _db: gestor que ModeloPersistente.db crea bajo demanda
+            if nombre != '_db':
+                raise AttributeError(f"{clase.__name__} de la caché es de solo lectura; "
+                                     f"usar buscar_por_id para obtener una copia modificable")
+            object.__setattr__(self, nombre, valor)
+
+        def __delattr__(self, nombre):
+            raise AttributeError(f"{clase.__name__} de la caché es de solo lectura")
+
+        subclase = type(clase.__name__, (clase,), {
+            '__slots__': (), '__setattr__': __setattr__, '__delattr__': __delattr__,
+            '__module__': clase.__module__,
+        })
+        _CLASES_SOLO_LECTURA[clase] = subclase
+    return subclase
+
+
+class CacheFilas:
+    """
+    Base de las cachés de tabla. Las subclases definen:
+    MAPEO: Mapeador de la tabla
+    CONDICION / incluir(): filas que forman parte de la caché
+    INDICES: nombre -> función que da la clave de búsqueda de un objeto
+    clave_orden(): orden de todos()
+    todos() y buscar() entregan los objetos guardados, sin copiarlos, como
+    objetos de solo lectura (ver clase_solo_lectura); obtener_copia() da uno
+    modificable.
+    """
+    MAPEO = None
+    CONDICION = "activo=1"
+    INDICES = {}
+
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, db_name="inventario.db"):
+        self.db_name = db_name
+        self.por_id = {}
+        # nombre del índice -> clave -> {id: objeto}
+        self.indices = {nombre: {} for nombre in self.INDICES}
+        self.version = None
+        self.borrado = None
+        self.firma = None
+        self._ordenados = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def obtener(cls, db_name="inventario.db"):
+        """Obtener la caché del proceso para un archivo"""
+        clave = (cls, os.path.abspath(db_name) if db_name != ":memory:" else db_name)
+        instancia = CacheFilas._instancias.get(clave)
+        if instancia is None:
+            with CacheFilas._lock_instancias:
+                instancia = CacheFilas._instancias.get(clave)
+                if instancia is None:
+                    instancia = cls(db_name)
+                    CacheFilas._instancias[clave] = instancia
+        return instancia
+
+    @staticmethod
+    def borrados_vistos(db_name):
+        """
+        Última anotación de filas_borradas que todas las cachés del archivo
+        en este proceso ya aplicaron (None si no hay cachés cargadas)
+        """
+        archivo = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        vistos = [cache.borrado for (_, nombre), cache in list(CacheFilas._instancias.items())
+                  if nombre == archivo and cache.borrado is not None]
+        return min(vistos) if vistos else None
+
+    @staticmethod
+    def incluir(objeto):
+        """Indicar si una fila releída sigue formando parte de la caché"""
+        return bool(objeto.activo)
+
+    @staticmethod
+    def clave_orden(objeto):
+        return objeto.id
+
+    def consultar(self, db):
+        """
+        Dejar la caché al día y retornarla, o None si hay que ir a la base:
+        dentro de una transacción (la caché no debe ver datos sin confirmar)
+        o si la actualización falla
+        """
+        if db.en_transaccion():
+            return None
+        try:
+            with self._lock:
+                firma = db.version_datos(propias=True)
+                if firma is None or firma != self.firma:
+                    self._refrescar(db)
+                    self.firma = firma
+            return self
+        except Exception as e:
+            print(f"Error al actualizar la caché de {self.MAPEO.origen}: {e}")
+            self.version = None
+            self.borrado = None
+            self.firma = None
+            return None
+
+    def _refrescar(self, db):
+        """Releer las filas cambiadas desde la última versión vista"""
+        tabla = self.MAPEO.origen
+        with db.instantanea():
+            maximo = db.ejecutar_consulta(f"SELECT COALESCE(MAX(version_fila), 0) FROM {tabla}")[0][0]
+            borrado = db.ejecutar_consulta("SELECT COALESCE(MAX(id), 0) FROM filas_borradas")[0][0]
+            nuevos = []
+            if self.version is not None and borrado != self.borrado:
+                nuevos = db.ejecutar_consulta("SELECT tabla, fila_id FROM filas_borradas WHERE id > ?",
+                                              (self.borrado,))
+            # Los id de filas_borradas son consecutivos (AUTOINCREMENT): si faltan,
+            # el mantenimiento depuró anotaciones que esta caché no vio
+            if self.version is None or len(nuevos) != max(borrado - self.borrado, 0):
+                self._cargar_todo(db)
+            else:
+                # Un DELETE no deja versión nueva: el trigger lo anota en filas_borradas.
+                # Los borrados van primero, por si el id se reutilizó en una fila nueva
+                if nuevos:
+                    for tabla_borrada, fila_id in nuevos:
+                        if tabla_borrada == tabla:
+                            self._quitar(fila_id)
+                    self._ordenados = None
+                if maximo != self.version:
+                    for objeto in self.MAPEO.obtener(db, "version_fila > ?", (self.version,)):
+                        self._quitar(objeto.id)
+                        if self.incluir(objeto):
+                            self._agregar(objeto)
+                    self._ordenados = None
+            self.version = maximo
+            self.borrado = borrado
+
+    def _cargar_todo(self, db):
+        self.por_id = {}
+        self.indices = {nombre: {} for nombre in self.INDICES}
+        for objeto in self.MAPEO.obtener(db, self.CONDICION):
+            self._agregar(objeto)
+        self._ordenados = None
+
+    def _agregar(self, objeto):
+        if type(objeto) is self.MAPEO.clase:
+            objeto.__class__ = clase_solo_lectura(self.MAPEO.clase)
+        self.por_id[objeto.id] = objeto
+        for nombre, clave_de in self.INDICES.items():
+            clave = clave_de(objeto)
+            if clave:
+                self.indices[nombre].setdefault(clave, {})[objeto.id] = objeto
+
+    def _quitar(self, objeto_id):
+        objeto = self.por_id.pop(objeto_id, None)
+        if objeto is None:
+            return
+        for nombre, clave_de in self.INDICES.items():
+            grupo = self.indices[nombre].get(clave_de(objeto))
+            if grupo is not None:
+                grupo.pop(objeto_id, None)
+                if not grupo:
+                    del self.indices[nombre][clave_de(objeto)]
+
+    def todos(self):
+        """Tupla compartida con todos los objetos de la caché en el orden de clave_orden"""
+        with self._lock:
+            if self._ordenados is None:
+                self._ordenados = tuple(sorted(self.por_id.values(), key=self.clave_orden))
+            return self._ordenados
+
+    def obtener_copia(self, objeto_id):
+        """Copia modificable del objeto con ese id, o None"""
+        with self._lock:
+            objeto = self.por_id.get(objeto_id)
+            return self.MAPEO.copiar(objeto) if objeto is not None else None
+
+    def buscar(self, indice, clave):
+        """Objetos (de solo lectura) cuya clave en el índice indicado es exactamente clave"""
+        with self._lock:
+            return sorted(self.indices[indice].get(clave, {}).values(), key=self.clave_orden)
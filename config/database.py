@@ -3,201 +3,480 @@ Configuración y gestión de la base de datos
 """
 import sqlite3
 import os
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+from itertools import islice
+from urllib.request import pathname2url
+from config.migraciones import aplicar_migraciones
+from config.archivo_historico import adjuntar_historico, generacion_archivos
+from config.perfilador import PERFILADOR
+from config.perfil_sqlite import (PERFIL_POR_DEFECTO, PERFIL_SOLO_LECTURA, cargar_configuracion,
+                                  resolver_pragmas, aplicar_pragmas, leer_pragmas)
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones persistentes a un archivo de base de datos.
+    Mantiene una conexión de larga duración por hilo, de modo que la
+    caché de páginas de SQLite sobrevive entre consultas.
+    """
+    _pools = {}
+    _lock = threading.Lock()
+
+    # Segundos sin uso tras los cuales se verifica la conexión antes de entregarla
+    INTERVALO_VERIFICACION = 30
+
+    def __init__(self, db_name, clave=None, perfil=None, solo_lectura=False, historico=False):
+        self.db_name = db_name
+        self.clave = clave or db_name
+        self.archivo = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        # Las conexiones con historial adjuntan los archivos archivo_AAAA.db
+        self.historico = historico
+        solo_lectura = solo_lectura or historico
+        self.solo_lectura = solo_lectura
+        self.configuracion = cargar_configuracion(db_name)
+        if solo_lectura:
+            self.perfil = perfil or self.configuracion.get('perfil_reportes', PERFIL_SOLO_LECTURA)
+        else:
+            self.perfil = perfil or self.configuracion.get('perfil', PERFIL_POR_DEFECTO)
+        self.pragmas = resolver_pragmas(self.perfil, self.configuracion)
+        if solo_lectura:
+            # El modo de journal lo fija el escritor; un lector no puede cambiarlo
+            self.pragmas.pop('journal_mode', None)
+            self.pragmas['query_only'] = 1
+        if 'perfilador' in self.configuracion:
+            PERFILADOR.configurar(self.configuracion['perfilador'])
+        self._local = threading.local()
+        # conexión -> hilo que la usa
+        self._conexiones = {}
+        self._lock_conexiones = threading.Lock()
+        # Actividad del pool, consultada por el mantenimiento en segundo plano
+        self.ultimo_acceso = 0.0
+        self.filas_sin_analizar = 0
+
+    @classmethod
+    def obtener(cls, db_name, perfil=None, solo_lectura=False, historico=False):
+        """
+        Obtener el pool compartido del proceso para un archivo.
+        Un perfil explícito, el modo solo lectura o el historial completo
+        usan su propio juego de conexiones.
+        """
+        archivo = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        clave = (archivo, perfil, solo_lectura or historico, historico)
+        pool = cls._pools.get(clave)
+        if pool is None:
+            with cls._lock:
+                pool = cls._pools.get(clave)
+                if pool is None:
+                    pool = cls(db_name, clave, perfil, solo_lectura, historico)
+                    cls._pools[clave] = pool
+        return pool
+
+    @classmethod
+    def cerrar_todos(cls):
+        """Cerrar las conexiones de todos los pools (al salir del proceso)"""
+        with cls._lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            pool.cerrar()
+
+    @classmethod
+    def segundos_inactivo(cls, db_name):
+        """Segundos desde el último uso de cualquier pool de un archivo"""
+        archivo = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        with cls._lock:
+            accesos = [pool.ultimo_acceso for pool in cls._pools.values() if pool.archivo == archivo]
+        if not accesos:
+            return float('inf')
+        return time.monotonic() - max(accesos)
+
+    def registrar_cambios(self, filas):
+        """Sumar filas modificadas por escrituras masivas (para decidir un ANALYZE)"""
+        with self._lock_conexiones:
+            self.filas_sin_analizar += filas
+
+    def tomar_cambios(self):
+        """Obtener y reiniciar el contador de filas modificadas"""
+        with self._lock_conexiones:
+            filas, self.filas_sin_analizar = self.filas_sin_analizar, 0
+        return filas
+
+    def _crear_conexion(self):
+        """Abrir una nueva conexión para el hilo actual con el perfil del pool"""
+        espera = self.pragmas.get('busy_timeout', 5000) / 1000
+        if self.solo_lectura and self.archivo != ":memory:":
+            # mode=ro: SQLite rechaza cualquier escritura a nivel de archivo
+            uri = f"file:{pathname2url(self.archivo)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=espera, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=espera, check_same_thread=False)
+        aplicar_pragmas(conn, self.pragmas)
+        # Contabilizar también las sentencias que no pasan por ejecutar_consulta
+        conn.set_trace_callback(PERFILADOR.traza)
+        self._cerrar_huerfanas()
+        with self._lock_conexiones:
+            self._conexiones[conn] = threading.current_thread()
+        return conn
+
+    def _cerrar_huerfanas(self):
+        """
+        Cerrar las conexiones de hilos que ya terminaron (trabajador de
+        consultas, respaldos, mantenimiento), que nadie volverá a usar
+        """
+        with self._lock_conexiones:
+            huerfanas = [conn for conn, hilo in self._conexiones.items() if not hilo.is_alive()]
+            for conn in huerfanas:
+                del self._conexiones[conn]
+        for conn in huerfanas:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _descartar(self, conn):
+        """Cerrar y olvidar una conexión defectuosa"""
+        with self._lock_conexiones:
+            self._conexiones.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def conexion_sana(self, conn):
+        """Verificar que la conexión sigue siendo utilizable"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def obtener_conexion(self):
+        """Entregar (checkout) la conexión del hilo actual"""
+        local = self._local
+        conn = getattr(local, 'conexion', None)
+        ahora = time.monotonic()
+
+        if conn is not None and getattr(local, 'en_uso', 0) == 0:
+            # Solo se verifica si la conexión estuvo inactiva un tiempo
+            if ahora - local.ultimo_uso > self.INTERVALO_VERIFICACION and not self.conexion_sana(conn):
+                self._descartar(conn)
+                conn = None
+
+        if conn is None:
+            conn = self._crear_conexion()
+            local.conexion = conn
+            local.en_uso = 0
+            local.historicos = set()
+            local.generacion_historicos = None
+
+        if self.historico and local.en_uso == 0 and not conn.in_transaction:
+            # Adjuntar una vez por conexión, y de nuevo solo si se creó otro archivo
+            generacion = generacion_archivos()
+            if local.generacion_historicos != generacion:
+                local.historicos = adjuntar_historico(conn, self.db_name, local.historicos)
+                local.generacion_historicos = generacion
+
+        local.en_uso += 1
+        local.ultimo_uso = ahora
+        self.ultimo_acceso = ahora
+        return conn
+
+    def devolver_conexion(self, conn):
+        """Devolver (checkin) la conexión del hilo actual al pool"""
+        local = self._local
+        if getattr(local, 'conexion', None) is not conn:
+            return
+        local.en_uso = max(0, local.en_uso - 1)
+        local.ultimo_uso = time.monotonic()
+
+        # Una transacción abierta nunca debe sobrevivir a la devolución
+        if local.en_uso == 0 and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._descartar(conn)
+                local.conexion = None
+
+    def cerrar(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._lock_conexiones:
+            conexiones = list(self._conexiones)
+            self._conexiones.clear()
+        for conn in conexiones:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+atexit.register(PoolConexiones.cerrar_todos)
+
 
 class DatabaseManager:
-    def __init__(self, db_name="inventario.db"):
-        """Inicializar el gestor de base de datos"""
+    # Archivos cuyo esquema ya fue verificado en este proceso
+    _esquemas_listos = set()
+    _lock_esquema = threading.Lock()
+
+    # Primera lectura de instantanea(), que fija la instantánea de la transacción
+    CONSULTA_INSTANTANEA = "SELECT 1 FROM sqlite_master LIMIT 1"
+
+    def __init__(self, db_name="inventario.db", perfil=None, solo_lectura=False, historico=False):
+        """
+        Inicializar el gestor de base de datos (no realiza E/S)
+        perfil: perfil de PRAGMAs ("pos", "reporting");
+        por defecto el indicado en configuracion_db.json o "pos"
+        solo_lectura: usar conexiones mode=ro con query_only (perfil "reporting"),
+        que nunca compiten por el bloqueo de escritura
+        historico: conexiones de solo lectura donde ventas, detalle_ventas y
+        movimientos_cuenta incluyen los años archivados (archivo_AAAA.db)
+        """
         self.db_name = db_name
         self.connection = None
-        self.crear_tablas()
+        self.solo_lectura = solo_lectura or historico
+        self.historico = historico
+        self.pool = PoolConexiones.obtener(db_name, perfil, solo_lectura, historico)
     
     def conectar(self):
-        """Crear conexión a la base de datos"""
+        """Obtener la conexión persistente del hilo desde el pool"""
         try:
-            self.connection = sqlite3.connect(self.db_name)
+            self.asegurar_esquema()
+            self.connection = self.pool.obtener_conexion()
             return self.connection
         except sqlite3.Error as e:
             print(f"Error al conectar a la base de datos: {e}")
             return None
     
     def cerrar_conexion(self):
-        """Cerrar conexión a la base de datos"""
+        """Devolver la conexión al pool (no se cierra físicamente)"""
         if self.connection:
-            self.connection.close()
+            self.pool.devolver_conexion(self.connection)
             self.connection = None
     
-    def crear_tablas(self):
-        """Crear todas las tablas necesarias"""
-        conn = self.conectar()
+    def estado_pragmas(self):
+        """Obtener los PRAGMAs de rendimiento vigentes en la conexión del hilo"""
+        conn = self._obtener_conexion()
         if not conn:
+            return {}
+        try:
+            return leer_pragmas(conn)
+        finally:
+            self.pool.devolver_conexion(conn)
+
+    def crear_tablas(self):
+        """Crear o actualizar las tablas aplicando las migraciones pendientes"""
+        # Las migraciones siempre se aplican con una conexión de escritura
+        pool = PoolConexiones.obtener(self.db_name) if self.solo_lectura else self.pool
+        conn = pool.obtener_conexion()
+        try:
+            aplicadas = aplicar_migraciones(conn)
+            DatabaseManager._esquemas_listos.add(self.pool.archivo)
+            if aplicadas:
+                print(f" Base de datos actualizada ({aplicadas} migraciones aplicadas)")
+        finally:
+            pool.devolver_conexion(conn)
+
+    def asegurar_esquema(self):
+        """Aplicar las migraciones una sola vez por archivo y por proceso"""
+        if self.pool.archivo in DatabaseManager._esquemas_listos:
             return
-        
-        cursor = conn.cursor()
-        
-        # Tabla de productos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS productos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                descripcion TEXT,
-                precio_compra REAL NOT NULL,
-                precio_venta REAL NOT NULL,
-                stock INTEGER NOT NULL DEFAULT 0,
-                stock_minimo INTEGER DEFAULT 5,
-                categoria TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                activo BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Tabla de clientes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clientes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                apellido TEXT,
-                telefono TEXT,
-                email TEXT,
-                direccion TEXT,
-                ciudad TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                activo BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Tabla de ventas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER,
-                total REAL NOT NULL,
-                fecha_venta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                observaciones TEXT,
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id)
-            )
-        ''')
-        
-        # Tabla de detalles de venta
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS detalle_ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                venta_id INTEGER NOT NULL,
-                producto_id INTEGER NOT NULL,
-                cantidad INTEGER NOT NULL,
-                precio_unitario REAL NOT NULL,
-                subtotal REAL NOT NULL,
-                FOREIGN KEY (venta_id) REFERENCES ventas(id),
-                FOREIGN KEY (producto_id) REFERENCES productos(id)
-            )
-        ''')
-        
-        # Tabla de cuentas corrientes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cuentas_corrientes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER NOT NULL,
-                saldo_total REAL DEFAULT 0,
-                saldo_pendiente REAL DEFAULT 0,
-                fecha_ultima_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                activa BOOLEAN DEFAULT 1,
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id)
-            )
-        ''')
-        
-        # Tabla de movimientos de cuenta
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS movimientos_cuenta (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER NOT NULL,
-                tipo_movimiento TEXT NOT NULL,
-                monto REAL NOT NULL,
-                descripcion TEXT,
-                venta_id INTEGER,
-                fecha_movimiento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario TEXT,
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id),
-                FOREIGN KEY (venta_id) REFERENCES ventas(id)
-            )
-        ''')
-        
-        # Tabla de abonos/pagos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS abonos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER NOT NULL,
-                monto_abono REAL NOT NULL,
-                metodo_pago TEXT DEFAULT 'Efectivo',
-                descripcion TEXT,
-                recibo_numero TEXT,
-                fecha_abono TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario_registro TEXT,
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id)
-            )
-        ''')
-
-        # Agregar nuevas columnas a la tabla productos si no existen
-        self.agregar_columnas_productos(cursor, conn)
-
-        # Agregar columna numero_recibo a ventas si no existe
-        self.agregar_columnas_ventas(cursor, conn)
-
-        conn.commit()
-        self.cerrar_conexion()
-        print(" Base de datos y tablas creadas correctamente")
-
-    def agregar_columnas_productos(self, cursor, conn):
-        """Agregar nuevas columnas a la tabla productos"""
+        with DatabaseManager._lock_esquema:
+            if self.pool.archivo not in DatabaseManager._esquemas_listos:
+                self.crear_tablas()
+
+    def _obtener_conexion(self):
+        """Checkout interno que no altera self.connection"""
         try:
-            # Verificar si las columnas ya existen
-            cursor.execute("PRAGMA table_info(productos)")
-            columnas_existentes = [col[1] for col in cursor.fetchall()]
-
-            # Agregar columna marca si no existe
-            if 'marca' not in columnas_existentes:
-                cursor.execute("ALTER TABLE productos ADD COLUMN marca TEXT")
-                print(" Columna 'marca' agregada a productos")
-
-            # Agregar columna tipo si no existe
-            if 'tipo' not in columnas_existentes:
-                cursor.execute("ALTER TABLE productos ADD COLUMN tipo TEXT")
-                print(" Columna 'tipo' agregada a productos")
-
-            # Agregar columna proveedor si no existe
-            if 'proveedor' not in columnas_existentes:
-                cursor.execute("ALTER TABLE productos ADD COLUMN proveedor TEXT")
-                print(" Columna 'proveedor' agregada a productos")
-
-            # Agregar columna sku si no existe
-            if 'sku' not in columnas_existentes:
-                cursor.execute("ALTER TABLE productos ADD COLUMN sku TEXT")
-                print(" Columna 'sku' agregada a productos")
-
-        except Exception as e:
-            print(f" Error al agregar columnas: {e}")
-
-    def agregar_columnas_ventas(self, cursor, conn):
-        """Agregar columna numero_recibo a la tabla ventas"""
+            self.asegurar_esquema()
+            return self.pool.obtener_conexion()
+        except sqlite3.Error as e:
+            print(f"Error al conectar a la base de datos: {e}")
+            return None
+
+    def en_transaccion(self):
+        """Indicar si el hilo actual está dentro de un bloque transaccion()"""
+        return getattr(self.pool._local, 'transaccion', 0) > 0
+
+    def version_datos(self, propias=False):
+        """
+        Firma (conexión, PRAGMA data_version) de la conexión del hilo.
+        data_version cambia cuando otra conexión (otra terminal u otro hilo)
+        confirma escrituras; las escrituras de la propia conexión no lo cambian.
+        propias: agregar total_changes para detectar también esas escrituras.
+        Sirve para validar cachés en memoria sin releer las tablas.
+        """
+        conn = self._obtener_conexion()
+        if not conn:
+            return None
         try:
-            # Verificar si la columna ya existe
-            cursor.execute("PRAGMA table_info(ventas)")
-            columnas_existentes = [col[1] for col in cursor.fetchall()]
+            firma = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+            return firma + (conn.total_changes,) if propias else firma
+        finally:
+            self.pool.devolver_conexion(conn)
 
-            # Agregar columna numero_recibo si no existe
-            if 'numero_recibo' not in columnas_existentes:
-                cursor.execute("ALTER TABLE ventas ADD COLUMN numero_recibo TEXT")
-                print(" Columna 'numero_recibo' agregada a ventas")
+    @contextmanager
+    def transaccion(self):
+        """
+        Unidad de trabajo: todas las sentencias del bloque usan la conexión
+        del hilo y se confirman con un único COMMIT al salir sin errores.
+        Los bloques anidados (aunque provengan de otro DatabaseManager del
+        mismo archivo) se unen al exterior mediante un SAVEPOINT, de modo
+        que un error interno solo deshace su propia parte.
 
-        except Exception as e:
-            print(f" Error al agregar columnas a ventas: {e}")
+            with db.transaccion() as conn:
+                ...
+        """
+        conn = self._obtener_conexion()
+        if not conn:
+            raise sqlite3.OperationalError("No se pudo conectar a la base de datos")
+
+        local = self.pool._local
+        profundidad = getattr(local, 'transaccion', 0)
+        punto = f"nivel_{profundidad}"
+        try:
+            if profundidad == 0:
+                if conn.in_transaction:
+                    # Confirmarla dejaría a medias el trabajo de quien la abrió,
+                    # o rompería la instantánea de un instantanea() exterior
+                    raise sqlite3.OperationalError(
+                        "Ya hay una transacción abierta en este hilo (instantanea() o escritura "
+                        "sin confirmar); transaccion() no puede iniciarse dentro de ella")
+                # Tomar el bloqueo de escritura al inicio evita SQLITE_BUSY a mitad del bloque
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                conn.execute(f"SAVEPOINT {punto}")
+        except sqlite3.Error:
+            self.pool.devolver_conexion(conn)
+            raise
+
+        local.transaccion = profundidad + 1
+        try:
+            yield conn
+        except BaseException:
+            local.transaccion = profundidad
+            if profundidad == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {punto}")
+                conn.execute(f"RELEASE {punto}")
+            self._ejecutar_al_revertir(profundidad)
+            raise
+        else:
+            local.transaccion = profundidad
+            if profundidad == 0:
+                conn.commit()
+                local.al_revertir = []
+                self._ejecutar_al_confirmar()
+            else:
+                conn.execute(f"RELEASE {punto}")
+        finally:
+            self.pool.devolver_conexion(conn)
+
+    def al_revertir(self, funcion):
+        """
+        Registrar una función que se llama si se deshace el bloque transaccion()
+        en curso (o uno exterior), para revertir estado que vive fuera de la
+        base (por ejemplo números ya reservados en memoria).
+        Fuera de una transacción no hace nada: no hay nada que deshacer.
+        """
+        local = self.pool._local
+        profundidad = getattr(local, 'transaccion', 0)
+        if profundidad > 0:
+            if not hasattr(local, 'al_revertir'):
+                local.al_revertir = []
+            local.al_revertir.append((profundidad, funcion))
+
+    def al_confirmar(self, funcion):
+        """
+        Registrar una función que se llama después del COMMIT del bloque
+        transaccion() más externo, para publicar estado en memoria que otros
+        hilos solo deben ver una vez confirmado. Si el bloque (o uno exterior)
+        se deshace, la función se descarta sin llamarla.
+        Fuera de una transacción se llama de inmediato.
+        """
+        local = self.pool._local
+        profundidad = getattr(local, 'transaccion', 0)
+        if profundidad == 0:
+            funcion()
+            return
+        if not hasattr(local, 'al_confirmar'):
+            local.al_confirmar = []
+        local.al_confirmar.append((profundidad, funcion))
+
+    def _ejecutar_al_confirmar(self):
+        """Llamar, en orden, las funciones registradas durante la transacción confirmada"""
+        local = self.pool._local
+        registradas = getattr(local, 'al_confirmar', [])
+        local.al_confirmar = []
+        for _, funcion in registradas:
+            try:
+                funcion()
+            except Exception as e:
+                print(f"Error al publicar estado en memoria: {e}")
 
-    def ejecutar_consulta(self, query, parametros=None):
-        """Ejecutar una consulta SQL"""
-        conn = self.conectar()
+    def _ejecutar_al_revertir(self, profundidad):
+        """Llamar, en orden inverso, las funciones registradas dentro del bloque deshecho"""
+        local = self.pool._local
+        local.al_confirmar = [(nivel, funcion) for nivel, funcion in getattr(local, 'al_confirmar', [])
+                              if nivel <= profundidad]
+        registradas = getattr(local, 'al_revertir', [])
+        deshechas = [funcion for nivel, funcion in registradas if nivel > profundidad]
+        local.al_revertir = [(nivel, funcion) for nivel, funcion in registradas if nivel <= profundidad]
+        for funcion in reversed(deshechas):
+            try:
+                funcion()
+            except Exception as e:
+                print(f"Error al revertir estado en memoria: {e}")
+
+    @contextmanager
+    def instantanea(self):
+        """
+        Transacción de lectura: todas las consultas del bloque ven la misma
+        instantánea de la base (WAL), aunque otra terminal escriba mientras tanto.
+        Los bloques anidados reutilizan la instantánea exterior.
+
+            with db.instantanea():
+                ...
+        """
+        conn = self._obtener_conexion()
+        if not conn:
+            raise sqlite3.OperationalError("No se pudo conectar a la base de datos")
+
+        local = self.pool._local
+        exterior = getattr(local, 'instantanea', False) or conn.in_transaction
+        try:
+            if not exterior:
+                conn.execute("BEGIN")
+                # La instantánea se fija con la primera lectura
+                conn.execute(DatabaseManager.CONSULTA_INSTANTANEA).fetchall()
+                local.instantanea = True
+            yield conn
+        finally:
+            try:
+                if not exterior:
+                    local.instantanea = False
+                    conn.rollback()
+            finally:
+                self.pool.devolver_conexion(conn)
+
+    def ejecutar_consulta(self, query, parametros=None, fabrica_filas=None):
+        """
+        Ejecutar una consulta SQL
+        fabrica_filas: row_factory opcional para construir cada fila (ver config.mapeo)
+        Dentro de transaccion() no confirma y propaga los errores
+        para que el bloque completo se revierta.
+        """
+        conn = self._obtener_conexion()
         if not conn:
             return None
         
+        inicio = PERFILADOR.medir()
         try:
             cursor = conn.cursor()
+            if fabrica_filas:
+                cursor.row_factory = fabrica_filas
             if parametros:
                 cursor.execute(query, parametros)
             else:
@@ -205,17 +484,126 @@ class DatabaseManager:
             
             # Si es una consulta de inserción, actualización o eliminación
             if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
-                conn.commit()
+                if not self.en_transaccion():
+                    conn.commit()
                 resultado = cursor.rowcount
+                PERFILADOR.registrar(query, inicio, max(resultado, 0))
             else:
                 # Si es una consulta de selección
                 resultado = cursor.fetchall()
+                PERFILADOR.registrar(query, inicio, len(resultado))
             
             return resultado
         
         except sqlite3.Error as e:
+            PERFILADOR.registrar(query, inicio)
             print(f"Error al ejecutar consulta: {e}")
+            if self.en_transaccion():
+                raise
+            # Una escritura fallida deja abierta la transacción implícita de sqlite3
+            if conn.in_transaction and not getattr(self.pool._local, 'instantanea', False):
+                conn.rollback()
             return None
         
         finally:
-            self.cerrar_conexion()
\ No newline at end of file
+            self.pool.devolver_conexion(conn)
+
+    def consultar_iterador(self, query, parametros=None, tamano_bloque=500, fabrica_filas=None):
+        """
+        Ejecutar una consulta de selección entregando las filas de a una,
+        leídas en bloques con fetchmany, sin materializar todo el resultado.
+        La conexión queda tomada del pool hasta agotar o cerrar el generador.
+        Para el perfil solo se mide el tiempo de SQLite, no el del consumidor.
+        """
+        conn = self._obtener_conexion()
+        if not conn:
+            return
+
+        cursor = conn.cursor()
+        if fabrica_filas:
+            cursor.row_factory = fabrica_filas
+        inicio = PERFILADOR.medir()
+        entregadas = 0
+        try:
+            if parametros:
+                cursor.execute(query, parametros)
+            else:
+                cursor.execute(query)
+            PERFILADOR.fin_envio()
+
+            while True:
+                filas = cursor.fetchmany(tamano_bloque)
+                if not filas:
+                    break
+                entregadas += len(filas)
+                pausa = time.perf_counter()
+                yield from filas
+                # Descontar el tiempo que el consumidor retuvo el bloque
+                inicio += time.perf_counter() - pausa
+
+        except sqlite3.Error as e:
+            print(f"Error al ejecutar consulta: {e}")
+
+        finally:
+            PERFILADOR.registrar(query, inicio, entregadas)
+            cursor.close()
+            self.pool.devolver_conexion(conn)
+
+    def ejecutar_lote(self, query, lista_parametros, tamano_lote=500, progreso=None):
+        """
+        Ejecutar una sentencia con muchos juegos de parámetros en una sola transacción
+        lista_parametros: iterable de tuplas de parámetros
+        tamano_lote: filas enviadas por cada llamada a executemany
+        progreso: función opcional que recibe la cantidad de filas procesadas
+        Retorna la cantidad de filas afectadas, o None si hubo error.
+        Dentro de transaccion() se une al bloque exterior sin confirmar.
+        """
+        conn = self._obtener_conexion()
+        if not conn:
+            return None
+
+        inicio = None
+        externa = self.en_transaccion()
+        try:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            afectadas = 0
+            procesadas = 0
+            inicio = PERFILADOR.medir()
+            for lote in dividir_en_lotes(lista_parametros, tamano_lote):
+                cursor.executemany(query, lote)
+                afectadas += max(cursor.rowcount, 0)
+                procesadas += len(lote)
+                if progreso:
+                    progreso(procesadas)
+
+            if not externa:
+                conn.commit()
+            PERFILADOR.registrar(query, inicio, afectadas)
+            self.pool.registrar_cambios(afectadas)
+            return afectadas
+
+        except sqlite3.Error as e:
+            if inicio is not None:
+                PERFILADOR.registrar(query, inicio)
+            print(f"Error al ejecutar lote: {e}")
+            if externa:
+                raise
+            conn.rollback()
+            return None
+
+        finally:
+            self.pool.devolver_conexion(conn)
+
+
+def dividir_en_lotes(iterable, tamano_lote):
+    """Dividir un iterable en listas de como máximo tamano_lote elementos"""
+    iterador = iter(iterable)
+    tamano_lote = max(1, int(tamano_lote))
+    while True:
+        lote = list(islice(iterador, tamano_lote))
+        if not lote:
+            return
+        yield lote
@@ -0,0 +1,154 @@
+"""
+Ejecutor de trabajos de base de datos en segundo plano
+Las ventanas envían sus consultas a un hilo dedicado, que mantiene sus propias
+conexiones del pool, y reciben el resultado en el hilo de Tk mediante after(),
+de modo que la interfaz no se congela mientras SQLite trabaja.
+"""
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from config.database import DatabaseManager
+
+TEXTO_CARGANDO = "Cargando..."
+
+
+class EjecutorDB:
+    """
+    Cola de trabajos atendida por uno o más hilos trabajadores.
+    Con un solo hilo (por defecto) los trabajos se ejecutan en el orden en
+    que se enviaron, así una recarga nunca llega antes que la anterior.
+    """
+    _instancia = None
+    _lock = threading.Lock()
+
+    # Cada cuántos milisegundos el hilo de Tk revisa si el trabajo terminó
+    INTERVALO_SONDEO_MS = 50
+
+    def __init__(self, hilos=1):
+        self.hilos = hilos
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="db")
+
+    @classmethod
+    def obtener(cls):
+        """Obtener el ejecutor compartido por todas las ventanas"""
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = cls()
+        return cls._instancia
+
+    def enviar(self, funcion, *args, **kwargs):
+        """Encolar una función; retorna un Future con su resultado"""
+        return self._ejecutor.submit(funcion, *args, **kwargs)
+
+    def consultar(self, query, parametros=None, db_name="inventario.db"):
+        """Encolar una consulta SQL; retorna un Future con las filas"""
+        return self.enviar(lambda: DatabaseManager(db_name).ejecutar_consulta(query, parametros))
+
+    def entregar_en_tk(self, widget, futuro, al_terminar, al_fallar=None, al_descartar=None):
+        """
+        Sondear el Future desde el loop de Tk y llamar a al_terminar(resultado)
+        o al_fallar(error) en el hilo de la interfaz.
+        Si el widget se destruyó antes de terminar, el resultado se descarta
+        y se llama a al_descartar() si se indicó.
+        """
+        def descartar():
+            if al_descartar:
+                al_descartar()
+
+        def revisar():
+            try:
+                if not widget.winfo_exists():
+                    descartar()
+                    return
+                if not futuro.done():
+                    widget.after(self.INTERVALO_SONDEO_MS, revisar)
+                    return
+            except tk.TclError:
+                descartar()
+                return
+
+            error = futuro.exception()
+            if error is None:
+                al_terminar(futuro.result())
+            elif al_fallar:
+                al_fallar(error)
+            else:
+                print(f"Error en trabajo de base de datos: {error}")
+
+        widget.after(self.INTERVALO_SONDEO_MS, revisar)
+        return futuro
+
+    def ejecutar_en_tk(self, widget, funcion, al_terminar, al_fallar=None):
+        """Encolar una función sin argumentos y entregar su resultado en el hilo de Tk"""
+        return self.entregar_en_tk(widget, self.enviar(funcion), al_terminar, al_fallar)
+
+    def entregar_por_bloques_en_tk(self, widget, producir, al_recibir, al_terminar=None,
+                                   al_fallar=None, tamano_bloque=500):
+        """
+        Recorrer en el hilo trabajador el iterable que retorna producir() y
+        entregar sus elementos en el hilo de Tk de a tamano_bloque:
+        al_recibir(bloque) por cada bloque y al_terminar() al final.
+        El bloque siguiente se lee recién cuando el anterior se entregó, así en
+        memoria nunca hay más de un bloque. Si al_recibir retorna False, si
+        falla la lectura o si el widget se destruye, el recorrido se cierra
+        en el hilo trabajador (su conexión vuelve al pool).
+        """
+        estado = {}
+
+        def leer_bloque():
+            if 'iterador' not in estado:
+                estado['iterador'] = iter(producir())
+            bloque = list(islice(estado['iterador'], tamano_bloque))
+            if not bloque:
+                cerrar_recorrido()
+            return bloque
+
+        def cerrar_recorrido():
+            cerrar = getattr(estado.pop('iterador', None), 'close', None)
+            if cerrar:
+                cerrar()
+
+        def recibir(bloque):
+            if not bloque:
+                if al_terminar:
+                    al_terminar()
+                return
+            if al_recibir(bloque) is False:
+                self.enviar(cerrar_recorrido)
+                return
+            pedir()
+
+        def fallar(error):
+            self.enviar(cerrar_recorrido)
+            if al_fallar:
+                al_fallar(error)
+            else:
+                print(f"Error en trabajo de base de datos: {error}")
+
+        def pedir():
+            self.entregar_en_tk(widget, self.enviar(leer_bloque), recibir, fallar,
+                                al_descartar=lambda: self.enviar(cerrar_recorrido))
+
+        pedir()
+
+    def cerrar(self, esperar=True):
+        """Detener los hilos trabajadores"""
+        self._ejecutor.shutdown(wait=esperar)
+
+
+def mostrar_cargando(tree, texto=TEXTO_CARGANDO):
+    """Estado estándar de carga: vaciar la tabla y mostrar una fila "Cargando..." """
+    for item in tree.get_children():
+        tree.delete(item)
+    columnas = tree['columns'] or ('#0',)
+    valores = [texto] + [""] * (len(columnas) - 1)
+    tree.insert('', 'end', values=valores, tags=('cargando',))
+    tree.tag_configure('cargando', foreground='#7f8c8d')
+
+
+def limpiar_tabla(tree):
+    """Quitar todas las filas de una tabla (incluida la de carga)"""
+    for item in tree.get_children():
+        tree.delete(item)
@@ -0,0 +1,261 @@
+"""
+Mantenimiento de la base de datos: estadísticas del planificador y
+recuperación de páginas libres
+- PRAGMA optimize al cerrar el sistema
+- ANALYZE después de escrituras masivas (ejecutar_lote)
+- PRAGMA incremental_vacuum cuando el sistema está inactivo
+- VACUUM completo, una sola vez, para activar auto_vacuum incremental en
+  bases creadas antes de la migración 5 (con el sistema inactivo o a pedido)
+- Depuración de filas_borradas (anotaciones de borrados para las cachés)
+Cada operación registra el tamaño del archivo antes y después y su duración.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from config.cache_filas import CacheFilas
+from config.database import DatabaseManager, PoolConexiones
+
+
+class MantenimientoDB:
+    """
+    Operaciones de mantenimiento sobre un archivo de base de datos.
+    Usa una conexión propia (fuera del pool) para que su actividad no cuente
+    como uso del sistema al decidir si está inactivo.
+    """
+    # Filas modificadas por escrituras masivas a partir de las cuales se ejecuta ANALYZE
+    UMBRAL_ANALYZE = 1000
+    # Filas examinadas por índice en ANALYZE (estadísticas aproximadas y rápidas)
+    LIMITE_ANALISIS = 1000
+    # Páginas liberadas por cada paso de incremental_vacuum (transacciones cortas)
+    PAGINAS_POR_PASO = 128
+    # Páginas libres mínimas para que valga la pena recuperar espacio
+    MINIMO_PAGINAS_LIBRES = 256
+    # Anotaciones de filas_borradas a partir de las cuales se depuran
+    MAXIMO_FILAS_BORRADAS = 1000
+    # Segundos sin consultas para considerar el sistema inactivo
+    SEGUNDOS_INACTIVIDAD = 120
+    # Cada cuántos segundos el hilo revisa si hay trabajo pendiente
+    INTERVALO_REVISION = 60
+
+    def __init__(self, db_name="inventario.db", archivo_log="mantenimiento.log"):
+        self.db_name = db_name
+        self.archivo_log = archivo_log
+        self.historial = deque(maxlen=100)
+        self._logger = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _conectar(self):
+        """Abrir la conexión de mantenimiento (con el esquema ya migrado)"""
+        DatabaseManager(self.db_name).asegurar_esquema()
+        espera = PoolConexiones.obtener(self.db_name).pragmas.get('busy_timeout', 5000) / 1000
+        return sqlite3.connect(self.db_name, timeout=espera, isolation_level=None)
+
+    def _logger_mantenimiento(self):
+        """Crear bajo demanda el logger del archivo de mantenimiento"""
+        if self._logger is None:
+            logger = logging.getLogger("sijo.mantenimiento")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            if not logger.handlers:
+                manejador = RotatingFileHandler(self.archivo_log, maxBytes=256 * 1024,
+                                                backupCount=2, encoding='utf-8')
+                manejador.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+                logger.addHandler(manejador)
+            self._logger = logger
+        return self._logger
+
+    @staticmethod
+    def estado(conn):
+        """Tamaño de página, páginas totales y libres, y modo de auto_vacuum"""
+        return {
+            'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+            'page_count': conn.execute("PRAGMA page_count").fetchone()[0],
+            'freelist_count': conn.execute("PRAGMA freelist_count").fetchone()[0],
+            'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        }
+
+    def _medir(self, operacion, funcion):
+        """Ejecutar una operación registrando tamaño antes/después y duración"""
+        conn = self._conectar()
+        try:
+            antes = self.estado(conn)
+            inicio = time.perf_counter()
+            detalle = funcion(conn)
+            segundos = time.perf_counter() - inicio
+            despues = self.estado(conn)
+        finally:
+            conn.close()
+
+        registro = {
+            'operacion': operacion,
+            'segundos': segundos,
+            'bytes_antes': antes['page_count'] * antes['page_size'],
+            'bytes_despues': despues['page_count'] * despues['page_size'],
+            'paginas_libres_antes': antes['freelist_count'],
+            'paginas_libres_despues': despues['freelist_count'],
+            'detalle': detalle
+        }
+        self.historial.append(registro)
+        mensaje = (f"{operacion}: {segundos * 1000:.1f} ms | "
+                   f"{registro['bytes_antes']} -> {registro['bytes_despues']} bytes | "
+                   f"libres {antes['freelist_count']} -> {despues['freelist_count']}")
+        try:
+            self._logger_mantenimiento().info(mensaje)
+        except OSError as e:
+            print(f"No se pudo escribir el registro de mantenimiento: {e}")
+        return registro
+
+    def optimizar(self):
+        """PRAGMA optimize: actualizar solo las estadísticas que lo necesitan"""
+        def ejecutar(conn):
+            conn.execute(f"PRAGMA analysis_limit = {self.LIMITE_ANALISIS}")
+            conn.execute("PRAGMA optimize").fetchall()
+        return self._medir("optimize", ejecutar)
+
+    def analizar(self):
+        """ANALYZE de toda la base con un límite de filas por índice"""
+        def ejecutar(conn):
+            conn.execute(f"PRAGMA analysis_limit = {self.LIMITE_ANALISIS}")
+            conn.execute("ANALYZE")
+        return self._medir("analyze", ejecutar)
+
+    def analizar_si_corresponde(self):
+        """Ejecutar ANALYZE si las escrituras masivas superaron el umbral"""
+        pool = PoolConexiones.obtener(self.db_name)
+        filas = pool.tomar_cambios()
+        if filas < self.UMBRAL_ANALYZE:
+            if filas:
+                pool.registrar_cambios(filas)
+            return None
+        return self.analizar()
+
+    def vacuum_incremental(self, max_paginas=None, continuar=None):
+        """
+        Devolver al sistema de archivos las páginas libres, por pasos cortos
+        para no retener el bloqueo de escritura
+        continuar: función opcional; si retorna False se detiene entre pasos
+        Requiere auto_vacuum incremental (migración 5)
+        """
+        def ejecutar(conn):
+            liberadas = 0
+            while max_paginas is None or liberadas < max_paginas:
+                libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if libres == 0 or (continuar and not continuar()):
+                    break
+                paso = min(self.PAGINAS_POR_PASO, libres)
+                if max_paginas is not None:
+                    paso = min(paso, max_paginas - liberadas)
+                # execute() avanza la sentencia una sola vez (una página);
+                # executescript la ejecuta hasta el final
+                conn.executescript(f"PRAGMA incremental_vacuum({paso})")
+                nuevas_libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if nuevas_libres >= libres:
+                    break
+                liberadas += libres - nuevas_libres
+            return {'paginas_liberadas': liberadas}
+        return self._medir("incremental_vacuum", ejecutar)
+
+    def auto_vacuum_pendiente(self):
+        """Indicar si la base todavía espera el VACUUM que activa auto_vacuum incremental"""
+        conn = self._conectar()
+        try:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+        finally:
+            conn.close()
+
+    def compactar(self):
+        """
+        VACUUM completo: reconstruye el archivo, devuelve todas las páginas
+        libres y aplica el auto_vacuum incremental pedido por la migración 5.
+        Bloquea la base mientras dura; falla si otra terminal la está usando.
+        """
+        def ejecutar(conn):
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return {'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0]}
+        return self._medir("vacuum", ejecutar)
+
+    def filas_borradas(self):
+        """Cantidad de anotaciones en filas_borradas"""
+        conn = self._conectar()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM filas_borradas").fetchone()[0]
+        finally:
+            conn.close()
+
+    def depurar_filas_borradas(self):
+        """
+        Borrar las anotaciones de filas_borradas que las cachés de este proceso
+        ya aplicaron. De cada tabla se conserva la de mayor version_fila, de
+        la que los triggers continúan la numeración. Una caché de otra
+        terminal que no las vio lo detecta y relee su tabla completa.
+        """
+        def ejecutar(conn):
+            corte = CacheFilas.borrados_vistos(self.db_name)
+            if corte is None:
+                corte = conn.execute("SELECT COALESCE(MAX(id), 0) FROM filas_borradas").fetchone()[0]
+            borradas = conn.execute('''
+                DELETE FROM filas_borradas
+                WHERE id <= ? AND id NOT IN (
+                    SELECT (SELECT id FROM filas_borradas WHERE tabla = t.tabla
+                            ORDER BY version_fila DESC LIMIT 1)
+                    FROM (SELECT DISTINCT tabla FROM filas_borradas) t
+                )
+            ''', (corte,)).rowcount
+            return {'anotaciones_borradas': borradas}
+        return self._medir("depurar_filas_borradas", ejecutar)
+
+    def inactivo(self):
+        """Indicar si el sistema lleva SEGUNDOS_INACTIVIDAD sin consultas"""
+        return PoolConexiones.segundos_inactivo(self.db_name) >= self.SEGUNDOS_INACTIVIDAD
+
+    def paginas_libres(self):
+        """Cantidad de páginas libres dentro del archivo"""
+        conn = self._conectar()
+        try:
+            return conn.execute("PRAGMA freelist_count").fetchone()[0]
+        finally:
+            conn.close()
+
+    def revisar(self):
+        """Ejecutar el mantenimiento pendiente (llamado periódicamente por el hilo)"""
+        self.analizar_si_corresponde()
+        if not self.inactivo():
+            return
+        if self.filas_borradas() >= self.MAXIMO_FILAS_BORRADAS:
+            self.depurar_filas_borradas()
+        if self.auto_vacuum_pendiente():
+            # Si otra terminal usa la base, el VACUUM falla y se reintenta en la próxima revisión
+            self.compactar()
+        elif self.paginas_libres() >= self.MINIMO_PAGINAS_LIBRES:
+            self.vacuum_incremental(continuar=self.inactivo)
+
+    def iniciar(self):
+        """Arrancar el hilo de mantenimiento en segundo plano"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="mantenimiento-db", daemon=True)
+        self._hilo.start()
+
+    def detener(self, optimizar=True):
+        """Detener el hilo y, al cerrar el sistema, ejecutar PRAGMA optimize"""
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join()
+        if optimizar:
+            try:
+                self.optimizar()
+            except sqlite3.Error as e:
+                print(f"Error en PRAGMA optimize: {e}")
+
+    def _ciclo(self):
+        while not self._detener.wait(self.INTERVALO_REVISION):
+            try:
+                self.revisar()
+            except sqlite3.Error as e:
+                print(f"Error en mantenimiento de la base de datos: {e}")
@@ -0,0 +1,107 @@
+"""
+Mapeo de filas a objetos de modelo por nombre de columna
+Cada tabla tiene un único Mapeador que define la proyección explícita
+(SELECT col1, col2 ... en lugar de SELECT *) y arma los objetos directamente
+desde el cursor, sin pasar por __init__ ni depender de la posición de las
+columnas en la tabla.
+"""
+from config.database import DatabaseManager
+
+
+class ModeloPersistente:
+    """
+    Base de los modelos con __slots__.
+    El DatabaseManager se crea recién cuando un método lo necesita, así
+    hidratar miles de filas no crea un gestor por objeto.
+    """
+    __slots__ = ('_db',)
+
+    @property
+    def db(self):
+        """Gestor de base de datos del objeto (creado bajo demanda)"""
+        db = getattr(self, '_db', None)
+        if db is None:
+            db = DatabaseManager()
+            self._db = db
+        return db
+
+    @db.setter
+    def db(self, valor):
+        self._db = valor
+
+
+class Mapeador:
+    """
+    Proyección de columnas de una tabla (o de un JOIN) hacia una clase.
+    columnas: nombres de atributo, o tuplas (atributo, expresión SQL) cuando
+    la columna necesita un alias de tabla o una conversión (COALESCE, etc.)
+    extras: atributos que no vienen de la consulta, con la función que crea
+    su valor inicial (por ejemplo {'detalles': list})
+    """
+
+    def __init__(self, clase, origen, columnas, extras=None):
+        self.clase = clase
+        self.origen = origen
+        self.atributos = []
+        expresiones = []
+        for columna in columnas:
+            atributo, expresion = columna if isinstance(columna, tuple) else (columna, columna)
+            self.atributos.append(atributo)
+            expresiones.append(expresion if expresion == atributo else f"{expresion} AS {atributo}")
+        self.atributos = tuple(self.atributos)
+        self.extras = tuple((extras or {}).items())
+        self.proyeccion = ", ".join(expresiones)
+        self.fabrica_filas = self._compilar_fabrica()
+
+    def consulta(self, condicion=None, orden=None):
+        """Armar el SELECT con la proyección explícita del mapeador"""
+        query = f"SELECT {self.proyeccion} FROM {self.origen}"
+        if condicion:
+            query += f" WHERE {condicion}"
+        if orden:
+            query += f" ORDER BY {orden}"
+        return query
+
+    def _compilar_fabrica(self):
+        """
+        Generar el row_factory de sqlite3 con una asignación directa por
+        columna (igual que dataclasses genera __init__), sin bucles ni
+        setattr por fila
+        """
+        lineas = ["def fabrica_filas(cursor, fila):",
+                  "    objeto = nuevo(clase)"]
+        lineas += [f"    objeto.{atributo} = fila[{i}]" for i, atributo in enumerate(self.atributos)]
+        lineas += [f"    objeto.{atributo} = extras[{i}][1]()" for i, (atributo, _) in enumerate(self.extras)]
+        lineas.append("    return objeto")
+
+        espacio = {'nuevo': self.clase.__new__, 'clase': self.clase, 'extras': self.extras}
+        exec("\n".join(lineas), espacio)
+        return espacio['fabrica_filas']
+
+    def hidratar(self, fila):
+        """Crear un objeto del modelo a partir de una fila de la proyección"""
+        return self.fabrica_filas(None, fila)
+
+    def copiar(self, objeto):
+        """Copia independiente de un objeto del modelo (atributos de la proyección)"""
+        copia = self.clase.__new__(self.clase)
+        for atributo in self.atributos:
+            setattr(copia, atributo, getattr(objeto, atributo))
+        for atributo, crear in self.extras:
+            setattr(copia, atributo, crear())
+        return copia
+
+    def obtener(self, db, condicion=None, parametros=None, orden=None):
+        """Ejecutar la consulta y retornar la lista de objetos"""
+        query = self.consulta(condicion, orden)
+        return db.ejecutar_consulta(query, parametros, fabrica_filas=self.fabrica_filas) or []
+
+    def obtener_uno(self, db, condicion, parametros=None):
+        """Retornar el primer objeto que cumple la condición, o None"""
+        objetos = self.obtener(db, condicion, parametros)
+        return objetos[0] if objetos else None
+
+    def iterar(self, db, condicion=None, parametros=None, orden=None, tamano_bloque=500):
+        """Recorrer los objetos leyendo por bloques (consultar_iterador)"""
+        query = self.consulta(condicion, orden)
+        return db.consultar_iterador(query, parametros, tamano_bloque, fabrica_filas=self.fabrica_filas)
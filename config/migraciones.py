@@ -0,0 +1,665 @@
+"""
+Migraciones versionadas del esquema de la base de datos
+"""
+import sqlite3
+
+
+def columnas_tabla(cursor, tabla):
+    """Obtener los nombres de las columnas de una tabla"""
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return [col[1] for col in cursor.fetchall()]
+
+
+def migracion_001_tablas_base(cursor):
+    """Crear las tablas principales del sistema"""
+    # Tabla de productos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            precio_compra REAL NOT NULL,
+            precio_venta REAL NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0,
+            stock_minimo INTEGER DEFAULT 5,
+            categoria TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # Tabla de clientes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            apellido TEXT,
+            telefono TEXT,
+            email TEXT,
+            direccion TEXT,
+            ciudad TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # Tabla de ventas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER,
+            total REAL NOT NULL,
+            fecha_venta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            observaciones TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id)
+        )
+    ''')
+
+    # Tabla de detalles de venta
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS detalle_ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venta_id INTEGER NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio_unitario REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (venta_id) REFERENCES ventas(id),
+            FOREIGN KEY (producto_id) REFERENCES productos(id)
+        )
+    ''')
+
+    # Tabla de cuentas corrientes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cuentas_corrientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            saldo_total REAL DEFAULT 0,
+            saldo_pendiente REAL DEFAULT 0,
+            fecha_ultima_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activa BOOLEAN DEFAULT 1,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id)
+        )
+    ''')
+
+    # Tabla de movimientos de cuenta
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS movimientos_cuenta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            tipo_movimiento TEXT NOT NULL,
+            monto REAL NOT NULL,
+            descripcion TEXT,
+            venta_id INTEGER,
+            fecha_movimiento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+            FOREIGN KEY (venta_id) REFERENCES ventas(id)
+        )
+    ''')
+
+    # Tabla de abonos/pagos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS abonos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            monto_abono REAL NOT NULL,
+            metodo_pago TEXT DEFAULT 'Efectivo',
+            descripcion TEXT,
+            recibo_numero TEXT,
+            fecha_abono TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario_registro TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id)
+        )
+    ''')
+
+
+def migracion_002_columnas_productos(cursor):
+    """Agregar marca, tipo, proveedor y sku a productos"""
+    columnas_existentes = columnas_tabla(cursor, "productos")
+
+    for columna in ("marca", "tipo", "proveedor", "sku"):
+        if columna not in columnas_existentes:
+            cursor.execute(f"ALTER TABLE productos ADD COLUMN {columna} TEXT")
+            print(f" Columna '{columna}' agregada a productos")
+
+
+def migracion_003_numero_recibo_ventas(cursor):
+    """Agregar numero_recibo a ventas"""
+    if 'numero_recibo' not in columnas_tabla(cursor, "ventas"):
+        cursor.execute("ALTER TABLE ventas ADD COLUMN numero_recibo TEXT")
+        print(" Columna 'numero_recibo' agregada a ventas")
+
+
+# Índices secundarios administrados: (nombre, tabla, columnas, único)
+INDICES = [
+    ("idx_productos_sku", "productos", "sku, activo", False),
+    ("idx_productos_activo_nombre", "productos", "activo, nombre", False),
+    ("idx_clientes_activo_nombre", "clientes", "activo, nombre, apellido", False),
+    ("idx_ventas_fecha", "ventas", "fecha_venta", False),
+    ("idx_ventas_cliente_fecha", "ventas", "cliente_id, fecha_venta", False),
+    ("idx_detalle_ventas_venta", "detalle_ventas", "venta_id", False),
+    ("idx_detalle_ventas_producto", "detalle_ventas", "producto_id", False),
+    ("ux_cuentas_corrientes_cliente", "cuentas_corrientes", "cliente_id", True),
+    ("idx_cuentas_corrientes_saldo", "cuentas_corrientes", "activa, saldo_pendiente", False),
+    ("idx_movimientos_cliente_fecha", "movimientos_cuenta", "cliente_id, fecha_movimiento", False),
+    ("idx_movimientos_venta", "movimientos_cuenta", "venta_id", False),
+    ("idx_abonos_cliente_fecha", "abonos", "cliente_id, fecha_abono", False),
+]
+
+
+def crear_indices(cursor):
+    """Crear los índices administrados que falten"""
+    for nombre, tabla, columnas, unico in INDICES:
+        tipo = "UNIQUE INDEX" if unico else "INDEX"
+        cursor.execute(f"CREATE {tipo} IF NOT EXISTS {nombre} ON {tabla} ({columnas})")
+
+
+def indices_faltantes(cursor):
+    """Obtener los nombres de los índices administrados que no existen"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existentes = {fila[0] for fila in cursor.fetchall()}
+    return [indice[0] for indice in INDICES if indice[0] not in existentes]
+
+
+def migracion_004_indices(cursor):
+    """Fusionar cuentas corrientes duplicadas y crear los índices secundarios"""
+    # El índice único sobre cuentas_corrientes(cliente_id) requiere una sola
+    # cuenta por cliente: los saldos de las duplicadas se suman en la más antigua
+    cursor.execute('''
+        UPDATE cuentas_corrientes
+        SET saldo_total = (SELECT SUM(c2.saldo_total) FROM cuentas_corrientes c2
+                           WHERE c2.cliente_id = cuentas_corrientes.cliente_id),
+            saldo_pendiente = (SELECT SUM(c2.saldo_pendiente) FROM cuentas_corrientes c2
+                               WHERE c2.cliente_id = cuentas_corrientes.cliente_id)
+        WHERE id IN (SELECT MIN(id) FROM cuentas_corrientes
+                     GROUP BY cliente_id HAVING COUNT(*) > 1)
+    ''')
+    cursor.execute('''
+        DELETE FROM cuentas_corrientes
+        WHERE id NOT IN (SELECT MIN(id) FROM cuentas_corrientes GROUP BY cliente_id)
+    ''')
+    if cursor.rowcount > 0:
+        print(f" {cursor.rowcount} cuentas corrientes duplicadas fusionadas")
+
+    crear_indices(cursor)
+    cursor.execute("ANALYZE")
+
+
+def migracion_005_auto_vacuum(cursor):
+    """
+    Pedir auto_vacuum incremental para poder liberar páginas sin un VACUUM completo.
+    Un archivo nuevo ya lo tiene activo (ver activar_auto_vacuum_en_archivo_nuevo).
+    En una base con tablas el modo queda pendiente hasta reconstruir el archivo,
+    lo que hace el mantenimiento en un momento de inactividad o el administrador
+    (MantenimientoDB.compactar), nunca el arranque del sistema.
+    """
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+
+def _sql_resumen_venta(fila, signo):
+    """
+    Sentencias de trigger que suman (+) o restan (-) la venta NEW/OLD
+    en ventas_resumen_diario y ventas_resumen_clientes
+    """
+    dia = f"DATE({fila}.fecha_venta)"
+    sentencias = [f'''
+            INSERT INTO ventas_resumen_diario (dia) VALUES ({dia})
+            ON CONFLICT(dia) DO NOTHING;
+            UPDATE ventas_resumen_diario SET
+                ventas = ventas {signo} 1,
+                total = total {signo} COALESCE({fila}.total, 0),
+                articulos = articulos {signo} COALESCE(
+                    (SELECT SUM(cantidad) FROM detalle_ventas WHERE venta_id = {fila}.id), 0)
+            WHERE dia = {dia};''']
+    if signo == "+":
+        sentencias.append(f'''
+            INSERT INTO ventas_resumen_clientes (dia, cliente_id, ventas)
+            SELECT {dia}, {fila}.cliente_id, 1 WHERE {fila}.cliente_id IS NOT NULL
+            ON CONFLICT(dia, cliente_id) DO UPDATE SET ventas = ventas + 1;''')
+    else:
+        sentencias.append(f'''
+            UPDATE ventas_resumen_clientes SET ventas = ventas - 1
+            WHERE dia = {dia} AND cliente_id = {fila}.cliente_id;
+            DELETE FROM ventas_resumen_clientes
+            WHERE dia = {dia} AND cliente_id = {fila}.cliente_id AND ventas <= 0;''')
+    sentencias.append(f'''
+            UPDATE ventas_resumen_diario
+            SET clientes = (SELECT COUNT(*) FROM ventas_resumen_clientes WHERE dia = {dia})
+            WHERE dia = {dia};''')
+    if signo == "-":
+        sentencias.append(f'''
+            DELETE FROM ventas_resumen_diario WHERE dia = {dia} AND ventas <= 0;''')
+    return "".join(sentencias)
+
+
+def _sql_articulos_detalle(fila, signo):
+    """Sentencia de trigger que suma o resta la cantidad de un detalle NEW/OLD"""
+    return f'''
+            UPDATE ventas_resumen_diario SET articulos = articulos {signo} {fila}.cantidad
+            WHERE dia = (SELECT DATE(fecha_venta) FROM ventas WHERE id = {fila}.venta_id);'''
+
+
+# Triggers que mantienen el resumen diario: (nombre, evento, cuerpo)
+TRIGGERS_RESUMEN = [
+    ("trg_resumen_venta_insertar", "AFTER INSERT ON ventas", _sql_resumen_venta("NEW", "+")),
+    ("trg_resumen_venta_eliminar", "AFTER DELETE ON ventas", _sql_resumen_venta("OLD", "-")),
+    ("trg_resumen_venta_actualizar", "AFTER UPDATE OF fecha_venta, total, cliente_id ON ventas",
+     _sql_resumen_venta("OLD", "-") + _sql_resumen_venta("NEW", "+")),
+    ("trg_resumen_detalle_insertar", "AFTER INSERT ON detalle_ventas",
+     _sql_articulos_detalle("NEW", "+")),
+    ("trg_resumen_detalle_eliminar", "AFTER DELETE ON detalle_ventas",
+     _sql_articulos_detalle("OLD", "-")),
+    ("trg_resumen_detalle_actualizar", "AFTER UPDATE OF cantidad, venta_id ON detalle_ventas",
+     _sql_articulos_detalle("OLD", "-") + _sql_articulos_detalle("NEW", "+")),
+]
+
+
+def reconstruir_resumen_diario(cursor):
+    """Recalcular ventas_resumen_diario y ventas_resumen_clientes desde las ventas"""
+    cursor.execute("DELETE FROM ventas_resumen_clientes")
+    cursor.execute("DELETE FROM ventas_resumen_diario")
+    cursor.execute('''
+        INSERT INTO ventas_resumen_clientes (dia, cliente_id, ventas)
+        SELECT DATE(fecha_venta), cliente_id, COUNT(*)
+        FROM ventas WHERE cliente_id IS NOT NULL
+        GROUP BY DATE(fecha_venta), cliente_id
+    ''')
+    cursor.execute('''
+        INSERT INTO ventas_resumen_diario (dia, ventas, total, articulos, clientes)
+        SELECT DATE(v.fecha_venta), COUNT(*), COALESCE(SUM(v.total), 0),
+               COALESCE(SUM((SELECT SUM(dv.cantidad) FROM detalle_ventas dv WHERE dv.venta_id = v.id)), 0),
+               (SELECT COUNT(*) FROM ventas_resumen_clientes rc WHERE rc.dia = DATE(v.fecha_venta))
+        FROM ventas v
+        GROUP BY DATE(v.fecha_venta)
+    ''')
+
+
+def migracion_006_resumen_diario(cursor):
+    """Crear el resumen diario de ventas mantenido por triggers"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas_resumen_diario (
+            dia TEXT PRIMARY KEY,
+            ventas INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            articulos INTEGER NOT NULL DEFAULT 0,
+            clientes INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    # Ventas por cliente y día, para contar clientes distintos sin releer las ventas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas_resumen_clientes (
+            dia TEXT NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            ventas INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, cliente_id)
+        ) WITHOUT ROWID
+    ''')
+    for nombre, evento, cuerpo in TRIGGERS_RESUMEN:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(f"CREATE TRIGGER {nombre} {evento} BEGIN {cuerpo}\n        END")
+    reconstruir_resumen_diario(cursor)
+
+
+# Columnas generadas (VIRTUAL) por tabla: (nombre, expresión)
+# Permiten filtrar y agrupar por día o mes con un índice, sin envolver la
+# columna original en una función dentro del WHERE
+COLUMNAS_GENERADAS = {
+    "ventas": (
+        ("fecha_dia", "DATE(fecha_venta)"),
+        ("mes", "strftime('%Y-%m', fecha_venta)"),
+    ),
+}
+
+
+def agregar_columnas_generadas(cursor, tabla, indexar=True):
+    """Agregar (e indexar) las columnas generadas de la tabla que todavía no existen"""
+    cursor.execute(f"PRAGMA table_xinfo({tabla})")
+    existentes = {col[1] for col in cursor.fetchall()}
+    for nombre, expresion in COLUMNAS_GENERADAS[tabla]:
+        if nombre not in existentes:
+            # ALTER TABLE solo admite columnas generadas VIRTUAL
+            cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {nombre} TEXT "
+                           f"GENERATED ALWAYS AS ({expresion}) VIRTUAL")
+            print(f" Columna generada '{nombre}' agregada a {tabla}")
+        if indexar:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{nombre} ON {tabla} ({nombre})")
+
+
+def migracion_007_columnas_dia_mes(cursor):
+    """Agregar fecha_dia y mes generadas e indexadas a ventas"""
+    agregar_columnas_generadas(cursor, "ventas")
+
+
+# Índices de texto completo: tabla -> columnas indexadas
+INDICES_TEXTO = {
+    "productos": ("nombre", "descripcion", "marca", "tipo", "categoria", "proveedor", "sku"),
+    "clientes": ("nombre", "apellido", "email"),
+}
+
+
+def _sql_indice_texto(tabla, fila, comando=None):
+    """Sentencia de trigger que agrega (o con comando='delete' quita) la fila NEW/OLD de {tabla}_fts"""
+    columnas = ", ".join(INDICES_TEXTO[tabla])
+    valores = ", ".join(f"{fila}.{columna}" for columna in INDICES_TEXTO[tabla])
+    if comando:
+        return f'''
+            INSERT INTO {tabla}_fts ({tabla}_fts, rowid, {columnas})
+            VALUES ('{comando}', {fila}.id, {valores});'''
+    return f'''
+            INSERT INTO {tabla}_fts (rowid, {columnas})
+            VALUES ({fila}.id, {valores});'''
+
+
+def triggers_indice_texto(tabla):
+    """Triggers que mantienen {tabla}_fts sincronizado con la tabla: (nombre, evento, cuerpo)"""
+    return [
+        (f"trg_{tabla}_fts_insertar", f"AFTER INSERT ON {tabla}", _sql_indice_texto(tabla, "NEW")),
+        (f"trg_{tabla}_fts_eliminar", f"AFTER DELETE ON {tabla}", _sql_indice_texto(tabla, "OLD", "delete")),
+        (f"trg_{tabla}_fts_actualizar",
+         f"AFTER UPDATE OF {', '.join(INDICES_TEXTO[tabla])} ON {tabla}",
+         _sql_indice_texto(tabla, "OLD", "delete") + _sql_indice_texto(tabla, "NEW")),
+    ]
+
+
+def crear_indice_texto(cursor, tabla):
+    """Crear el índice FTS5 {tabla}_fts con sus triggers y cargarlo desde la tabla"""
+    # Tabla de contenido externo: el texto vive en la tabla original y el índice
+    # solo guarda los términos. Los índices de prefijo resuelven "dio*" sin
+    # recorrer todo el vocabulario y remove_diacritics iguala "colonia" con "colonía".
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {tabla}_fts USING fts5(
+            {", ".join(INDICES_TEXTO[tabla])},
+            content='{tabla}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    for nombre, evento, cuerpo in triggers_indice_texto(tabla):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(f"CREATE TRIGGER {nombre} {evento} BEGIN {cuerpo}\n        END")
+    cursor.execute(f"INSERT INTO {tabla}_fts ({tabla}_fts) VALUES ('rebuild')")
+
+
+def migracion_008_busqueda_productos(cursor):
+    """Crear el índice FTS5 de productos mantenido por triggers"""
+    crear_indice_texto(cursor, "productos")
+
+
+# Dígitos del teléfono sin separadores y en orden inverso (hasta 15, el largo
+# máximo E.164). Invertidos, los últimos dígitos quedan al principio y la
+# búsqueda por terminación se vuelve un rango sobre el índice.
+_TELEFONO_DIGITOS = "COALESCE(telefono, '')"
+for _separador in (" ", "-", "+", "(", ")", ".", "/"):
+    _TELEFONO_DIGITOS = f"REPLACE({_TELEFONO_DIGITOS}, '{_separador}', '')"
+COLUMNAS_GENERADAS["clientes"] = (
+    ("telefono_digitos", _TELEFONO_DIGITOS),
+    ("telefono_invertido", " || ".join(f"substr(telefono_digitos, -{i}, 1)" for i in range(1, 16))),
+)
+
+
+def migracion_009_busqueda_clientes(cursor):
+    """Crear el índice FTS5 de clientes y el teléfono invertido indexado"""
+    crear_indice_texto(cursor, "clientes")
+    agregar_columnas_generadas(cursor, "clientes")
+
+
+# Letras acentuadas que se pliegan a su forma base antes de indexar trigramas.
+# LOWER() de SQLite solo convierte ASCII, por eso también van las mayúsculas.
+PLIEGUE_ACENTOS = {
+    "a": "áàâäãåÁÀÂÄ", "e": "éèêëÉÈÊ", "i": "íìîïÍÎ", "o": "óòôöõøÓÔÖ",
+    "u": "úùûüÚÜ", "n": "ñÑ", "c": "çÇ", "y": "ýÿ",
+}
+
+# El parser de SQLite admite unas 25 funciones anidadas por expresión, así
+# que el plegado se reparte en columnas generadas encadenadas de a 20 REPLACE
+_REPLACES_POR_COLUMNA = 20
+
+
+def _columnas_nombre_normalizado():
+    """Columnas generadas que producen nombre_normalizado: nombre y marca en minúsculas y sin acentos"""
+    reemplazos = [(letra, base) for base, letras in PLIEGUE_ACENTOS.items() for letra in letras]
+    columnas = []
+    expresion = "COALESCE(nombre, '') || ' ' || COALESCE(marca, '')"
+    for inicio in range(0, len(reemplazos), _REPLACES_POR_COLUMNA):
+        for letra, base in reemplazos[inicio:inicio + _REPLACES_POR_COLUMNA]:
+            expresion = f"REPLACE({expresion}, '{letra}', '{base}')"
+        columnas.append((f"nombre_plegado_{len(columnas) + 1}", expresion))
+        expresion = columnas[-1][0]
+    columnas[-1] = ("nombre_normalizado", f"LOWER({columnas[-1][1]})")
+    return tuple(columnas)
+
+
+COLUMNAS_GENERADAS["productos"] = _columnas_nombre_normalizado()
+
+TRIGGERS_TRIGRAMAS = [
+    ("trg_productos_trigramas_insertar", "AFTER INSERT ON productos", '''
+            INSERT INTO productos_trigramas (rowid, texto) VALUES (NEW.id, NEW.nombre_normalizado);'''),
+    ("trg_productos_trigramas_eliminar", "AFTER DELETE ON productos", '''
+            DELETE FROM productos_trigramas WHERE rowid = OLD.id;'''),
+    ("trg_productos_trigramas_actualizar", "AFTER UPDATE OF nombre, marca ON productos", '''
+            UPDATE productos_trigramas SET texto = NEW.nombre_normalizado WHERE rowid = NEW.id;'''),
+]
+
+
+def migracion_010_trigramas_productos(cursor):
+    """Crear el índice de trigramas de nombre y marca normalizados para búsquedas aproximadas"""
+    # El tokenizador trigram de esta versión de SQLite no pliega acentos,
+    # así que se indexa nombre_normalizado, ya plegado por las columnas generadas
+    agregar_columnas_generadas(cursor, "productos", indexar=False)
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS productos_trigramas USING fts5(texto, tokenize='trigram')")
+    for nombre, evento, cuerpo in TRIGGERS_TRIGRAMAS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(f"CREATE TRIGGER {nombre} {evento} BEGIN {cuerpo}\n        END")
+    cursor.execute("DELETE FROM productos_trigramas")
+    cursor.execute("INSERT INTO productos_trigramas (rowid, texto) SELECT id, nombre_normalizado FROM productos")
+
+
+# Recibos ya emitidos por prefijo: (prefijo, tabla, columna del número)
+RECIBOS_EXISTENTES = (
+    ("REC", "ventas", "numero_recibo"),
+    ("ABO", "abonos", "recibo_numero"),
+)
+
+
+def migracion_011_secuencias(cursor):
+    """Crear los contadores de recibos por prefijo y día"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS secuencias (
+            prefijo TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            ultimo INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (prefijo, dia)
+        ) WITHOUT ROWID
+    ''')
+    # Continuar después del mayor número ya emitido cada día (PREFIJO-AAAAMMDD-NNNN)
+    for prefijo, tabla, columna in RECIBOS_EXISTENTES:
+        cursor.execute(f'''
+            INSERT INTO secuencias (prefijo, dia, ultimo)
+            SELECT ?, substr({columna}, 5, 4) || '-' || substr({columna}, 9, 2) || '-' || substr({columna}, 11, 2),
+                   MAX(CAST(substr({columna}, 14) AS INTEGER))
+            FROM {tabla}
+            WHERE {columna} LIKE ? || '-________-%'
+            GROUP BY 2
+            ON CONFLICT(prefijo, dia) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo)
+        ''', (prefijo, prefijo))
+
+
+def agregar_version_fila(cursor, tabla):
+    """
+    Agregar version_fila a una tabla: un número que crece con cada INSERT o
+    UPDATE de la tabla (MAX + 1, leído del índice). Las cachés en memoria
+    releen solo las filas con version_fila mayor a la última que vieron.
+    """
+    if 'version_fila' not in columnas_tabla(cursor, tabla):
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN version_fila INTEGER NOT NULL DEFAULT 0")
+        print(f" Columna 'version_fila' agregada a {tabla}")
+    cursor.execute(f"UPDATE {tabla} SET version_fila = id WHERE version_fila = 0")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_version_fila ON {tabla} (version_fila)")
+    crear_triggers_version(cursor, tabla, f"(SELECT MAX(version_fila) FROM {tabla})")
+
+
+def crear_triggers_version(cursor, tabla, ultima):
+    """(Re)crear los triggers que numeran version_fila como ultima + 1"""
+    siguiente = f"UPDATE {tabla} SET version_fila = {ultima} + 1 WHERE id = NEW.id;"
+    triggers = [
+        (f"trg_{tabla}_version_insertar", f"AFTER INSERT ON {tabla}"),
+        # El WHEN evita volver a numerar la fila que el propio trigger actualiza
+        (f"trg_{tabla}_version_actualizar",
+         f"AFTER UPDATE ON {tabla} WHEN NEW.version_fila = OLD.version_fila"),
+    ]
+    for nombre, evento in triggers:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(f"CREATE TRIGGER {nombre} {evento} BEGIN {siguiente} END")
+
+
+def migracion_012_version_fila_productos(cursor):
+    """Numerar los cambios de productos para el catálogo en memoria"""
+    agregar_version_fila(cursor, "productos")
+
+
+def migracion_013_version_fila_clientes(cursor):
+    """Numerar los cambios de clientes para el directorio en memoria"""
+    agregar_version_fila(cursor, "clientes")
+
+
+def migracion_014_sku_unico(cursor):
+    """Renombrar los SKU repetidos y crear el índice único de SKU"""
+    # Conserva el SKU el producto activo más antiguo; los demás pasan a SKU-id
+    cursor.execute('''
+        UPDATE productos SET sku = sku || '-' || id
+        WHERE sku <> '' AND EXISTS (
+            SELECT 1 FROM productos p
+            WHERE p.sku = productos.sku
+              AND (p.activo > productos.activo OR (p.activo = productos.activo AND p.id < productos.id))
+        )
+    ''')
+    if cursor.rowcount > 0:
+        print(f" {cursor.rowcount} SKU repetidos renombrados como SKU-id")
+    # Los productos sin SKU ('' o NULL) quedan fuera del índice
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_productos_sku ON productos (sku) WHERE sku <> ''")
+
+
+def registrar_borrados(cursor, tabla):
+    """
+    Anotar en filas_borradas el id de cada fila que se borra de la tabla.
+    Un DELETE no deja version_fila nueva; las cachés en memoria leen las
+    anotaciones posteriores a la última que vieron para quitar esas filas.
+    La anotación guarda la version_fila de la fila borrada y la numeración
+    continúa después de ella: si se borra la fila más reciente, la siguiente
+    escritura no repite su versión (la caché no la vería como cambio).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS filas_borradas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabla TEXT NOT NULL,
+            fila_id INTEGER NOT NULL,
+            version_fila INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_filas_borradas_tabla_version "
+                   "ON filas_borradas (tabla, version_fila)")
+    cursor.execute(f"DROP TRIGGER IF EXISTS trg_{tabla}_borrado")
+    cursor.execute(f"CREATE TRIGGER trg_{tabla}_borrado AFTER DELETE ON {tabla} BEGIN "
+                   f"INSERT INTO filas_borradas (tabla, fila_id, version_fila) "
+                   f"VALUES ('{tabla}', OLD.id, OLD.version_fila); END")
+    crear_triggers_version(cursor, tabla, f'''MAX(
+        (SELECT MAX(version_fila) FROM {tabla}),
+        (SELECT COALESCE(MAX(version_fila), 0) FROM filas_borradas WHERE tabla = '{tabla}'))''')
+
+
+def migracion_015_filas_borradas(cursor):
+    """Registrar los borrados de productos y clientes para las cachés en memoria"""
+    for tabla in ("productos", "clientes"):
+        registrar_borrados(cursor, tabla)
+
+
+# Lista ordenada de migraciones: (versión, descripción, función).
+# Cada función debe ser idempotente, ya que las bases creadas antes de
+# existir schema_version pueden tener parte del esquema aplicado.
+MIGRACIONES = [
+    (1, "Tablas base", migracion_001_tablas_base),
+    (2, "Columnas marca/tipo/proveedor/sku en productos", migracion_002_columnas_productos),
+    (3, "Columna numero_recibo en ventas", migracion_003_numero_recibo_ventas),
+    (4, "Índices secundarios", migracion_004_indices),
+    (5, "auto_vacuum incremental", migracion_005_auto_vacuum),
+    (6, "Resumen diario de ventas", migracion_006_resumen_diario),
+    (7, "Columnas fecha_dia y mes en ventas", migracion_007_columnas_dia_mes),
+    (8, "Búsqueda de texto completo en productos", migracion_008_busqueda_productos),
+    (9, "Búsqueda de clientes por texto y teléfono", migracion_009_busqueda_clientes),
+    (10, "Trigramas de productos para búsqueda aproximada", migracion_010_trigramas_productos),
+    (11, "Secuencias de números de recibo", migracion_011_secuencias),
+    (12, "Versión de fila en productos", migracion_012_version_fila_productos),
+    (13, "Versión de fila en clientes", migracion_013_version_fila_clientes),
+    (14, "Índice único de SKU en productos", migracion_014_sku_unico),
+    (15, "Registro de filas borradas", migracion_015_filas_borradas),
+]
+
+
+def crear_tabla_version(conn):
+    """Crear la tabla de control de versiones del esquema"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT,
+            fecha_aplicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def version_actual(conn):
+    """Obtener la última versión de esquema aplicada"""
+    resultado = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return resultado[0] or 0
+
+
+def activar_auto_vacuum_en_archivo_nuevo(conn):
+    """
+    En un archivo sin tablas, dejar activo auto_vacuum incremental antes de
+    crear la primera. El VACUUM de un archivo vacío es instantáneo; con el
+    modo WAL ya fijado es la única forma de que el cambio se aplique.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+        return
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    except sqlite3.Error as e:
+        # Otro proceso está creando el archivo; lo hará él
+        print(f" No se pudo activar auto_vacuum en la base nueva: {e}")
+
+
+def aplicar_migraciones(conn):
+    """
+    Aplicar en orden las migraciones pendientes.
+    Cada migración corre en su propia transacción junto con el registro
+    de su versión; retorna la cantidad de migraciones aplicadas.
+    """
+    activar_auto_vacuum_en_archivo_nuevo(conn)
+    crear_tabla_version(conn)
+    if version_actual(conn) >= MIGRACIONES[-1][0]:
+        return 0
+
+    aplicadas = 0
+    for version, descripcion, funcion in MIGRACIONES:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Releer dentro del bloqueo por si otro proceso ya migró
+            if version <= version_actual(conn):
+                conn.rollback()
+                continue
+
+            funcion(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, descripcion) VALUES (?, ?)",
+                (version, descripcion)
+            )
+            conn.commit()
+            aplicadas += 1
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f" Error en migración {version} ({descripcion}): {e}")
+            raise
+
+    return aplicadas
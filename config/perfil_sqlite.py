@@ -0,0 +1,105 @@
+"""
+Perfiles de rendimiento de SQLite (PRAGMAs aplicados a cada conexión)
+"""
+import json
+import os
+import sqlite3
+
+# Nombre del archivo opcional de configuración, junto a la base de datos
+ARCHIVO_CONFIGURACION = "configuracion_db.json"
+
+PERFIL_POR_DEFECTO = "pos"
+
+# Perfil de las conexiones de solo lectura (reportes)
+PERFIL_SOLO_LECTURA = "reporting"
+
+# cache_size negativo = KiB; mmap_size en bytes; busy_timeout en ms.
+# Todos los perfiles usan WAL para que lectores y escritor no se bloqueen.
+# Ninguno baja synchronous de NORMAL: con OFF un corte de luz puede
+# corromper la base del punto de venta.
+PERFILES = {
+    # Punto de venta: escrituras cortas y frecuentes, baja latencia
+    "pos": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    # Reportes: lecturas grandes, más caché y mmap
+    "reporting": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Orden de aplicación: busy_timeout primero para que el cambio de
+# journal_mode espere si otra terminal tiene la base bloqueada
+ORDEN_PRAGMAS = ["busy_timeout", "journal_mode", "synchronous",
+                 "cache_size", "mmap_size", "temp_store", "query_only"]
+
+
+def ruta_configuracion(db_name):
+    """Obtener la ruta del archivo de configuración para una base de datos"""
+    directorio = os.path.dirname(os.path.abspath(db_name))
+    return os.path.join(directorio, ARCHIVO_CONFIGURACION)
+
+
+def cargar_configuracion(db_name):
+    """
+    Cargar la configuración de la base de datos desde el archivo JSON.
+    Formato: {"perfil": "pos", "pragmas": {...}, "perfiles": {"pos": {...}}}
+    """
+    if db_name == ":memory:":
+        return {}
+    ruta = ruta_configuracion(db_name)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer {ruta}: {e}")
+        return {}
+
+
+def resolver_pragmas(nombre_perfil, configuracion=None):
+    """Combinar el perfil predefinido con las modificaciones del archivo"""
+    configuracion = configuracion or {}
+    if nombre_perfil not in PERFILES and nombre_perfil not in configuracion.get('perfiles', {}):
+        print(f"Perfil SQLite desconocido '{nombre_perfil}', usando '{PERFIL_POR_DEFECTO}'")
+        nombre_perfil = PERFIL_POR_DEFECTO
+
+    pragmas = dict(PERFILES.get(nombre_perfil, {}))
+    pragmas.update(configuracion.get('perfiles', {}).get(nombre_perfil, {}))
+    pragmas.update(configuracion.get('pragmas', {}))
+    return pragmas
+
+
+def aplicar_pragmas(conn, pragmas):
+    """Aplicar un conjunto de PRAGMAs a una conexión"""
+    claves = [c for c in ORDEN_PRAGMAS if c in pragmas]
+    claves += [c for c in pragmas if c not in ORDEN_PRAGMAS]
+
+    for clave in claves:
+        valor = pragmas[clave]
+        if not clave.replace('_', '').isalnum():
+            continue
+        try:
+            conn.execute(f"PRAGMA {clave} = {valor}").fetchall()
+        except sqlite3.Error as e:
+            print(f"No se pudo aplicar PRAGMA {clave}={valor}: {e}")
+
+
+def leer_pragmas(conn, claves=None):
+    """Leer los valores actuales de los PRAGMAs de rendimiento"""
+    valores = {}
+    for clave in claves or ORDEN_PRAGMAS:
+        fila = conn.execute(f"PRAGMA {clave}").fetchone()
+        valores[clave] = fila[0] if fila else None
+    return valores
@@ -0,0 +1,220 @@
+"""
+Perfilador de consultas SQL y registro de consultas lentas
+"""
+import atexit
+import logging
+import re
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Sentencias de control que no aportan al perfil
+# ("--" son los subprogramas de triggers que informa la traza)
+SENTENCIAS_IGNORADAS = ("BEGIN", "COMMIT", "ROLLBACK", "END", "PRAGMA",
+                        "SAVEPOINT", "RELEASE", "EXPLAIN", "--")
+
+_PATRON_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_PATRON_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PATRON_LISTA = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_consulta(consulta):
+    """Reducir una sentencia a su forma canónica (sin literales ni espacios extra)"""
+    texto = _PATRON_TEXTO.sub("?", consulta)
+    texto = _PATRON_NUMERO.sub("?", texto)
+    texto = _PATRON_ESPACIOS.sub(" ", texto).strip()
+    return _PATRON_LISTA.sub("IN (?...)", texto)
+
+
+def percentil(valores_ordenados, porcentaje):
+    """Obtener un percentil de una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(porcentaje / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+class EstadisticaConsulta:
+    """Acumulado de una sentencia normalizada"""
+    MUESTRAS_MAXIMAS = 1000
+
+    def __init__(self, consulta):
+        self.consulta = consulta
+        self.llamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.filas = 0
+        self.muestras = deque(maxlen=self.MUESTRAS_MAXIMAS)
+
+    def como_diccionario(self):
+        """Resumen de la sentencia con sus percentiles de latencia"""
+        ordenadas = sorted(self.muestras)
+        return {
+            'consulta': self.consulta,
+            'llamadas': self.llamadas,
+            'total_ms': self.total_ms,
+            'p50_ms': percentil(ordenadas, 50),
+            'p95_ms': percentil(ordenadas, 95),
+            'max_ms': self.max_ms,
+            'filas': self.filas
+        }
+
+
+class PerfiladorConsultas:
+    """
+    Registra cada sentencia normalizada con su cantidad de llamadas,
+    latencias (total, p50, p95, máxima) y filas devueltas o afectadas.
+    Las sentencias que superan el umbral se escriben en un archivo rotativo.
+    """
+
+    def __init__(self, umbral_lento_ms=200, archivo_log="consultas_lentas.log",
+                 max_bytes=1024 * 1024, respaldos=3):
+        self.activo = True
+        self.umbral_lento_ms = umbral_lento_ms
+        self.archivo_log = archivo_log
+        self.max_bytes = max_bytes
+        self.respaldos = respaldos
+        self._estadisticas = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+        self._resumen_registrado = False
+
+    def configurar(self, opciones):
+        """Aplicar la sección "perfilador" de configuracion_db.json"""
+        self.activo = opciones.get('activo', self.activo)
+        self.umbral_lento_ms = opciones.get('umbral_lento_ms', self.umbral_lento_ms)
+        if opciones.get('archivo_log', self.archivo_log) != self.archivo_log:
+            self.archivo_log = opciones['archivo_log']
+            self._logger = None
+        if opciones.get('resumen_al_salir') and not self._resumen_registrado:
+            atexit.register(self.imprimir_resumen)
+            self._resumen_registrado = True
+
+    def _logger_lentas(self):
+        """Crear bajo demanda el logger del archivo de consultas lentas"""
+        if self._logger is None:
+            logger = logging.getLogger("sijo.consultas_lentas")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            for manejador in list(logger.handlers):
+                logger.removeHandler(manejador)
+            manejador = RotatingFileHandler(self.archivo_log, maxBytes=self.max_bytes,
+                                            backupCount=self.respaldos, encoding='utf-8')
+            manejador.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+            logger.addHandler(manejador)
+            self._logger = logger
+        return self._logger
+
+    def medir(self):
+        """Iniciar la medición de una sentencia del hilo actual"""
+        self._local.midiendo = True
+        return time.perf_counter()
+
+    def fin_envio(self):
+        """Indicar que la sentencia medida ya fue enviada a SQLite"""
+        self._local.midiendo = False
+
+    def registrar(self, consulta, inicio=None, filas=0):
+        """
+        Registrar una ejecución de una sentencia
+        inicio: valor retornado por medir(); None si no se midió el tiempo
+        """
+        self._local.midiendo = False
+        if not self.activo:
+            return
+
+        duracion_ms = (time.perf_counter() - inicio) * 1000 if inicio is not None else None
+        normalizada = normalizar_consulta(consulta)
+        if normalizada.upper().startswith(SENTENCIAS_IGNORADAS):
+            return
+
+        with self._lock:
+            estadistica = self._estadisticas.get(normalizada)
+            if estadistica is None:
+                estadistica = EstadisticaConsulta(normalizada)
+                self._estadisticas[normalizada] = estadistica
+            estadistica.llamadas += 1
+            estadistica.filas += filas or 0
+            if duracion_ms is not None:
+                estadistica.total_ms += duracion_ms
+                estadistica.max_ms = max(estadistica.max_ms, duracion_ms)
+                estadistica.muestras.append(duracion_ms)
+
+        if duracion_ms is not None and duracion_ms >= self.umbral_lento_ms:
+            try:
+                self._logger_lentas().info(f"{duracion_ms:.1f} ms | filas={filas} | {normalizada}")
+            except OSError as e:
+                print(f"No se pudo escribir el registro de consultas lentas: {e}")
+
+    def traza(self, sentencia):
+        """
+        Callback para set_trace_callback: contabiliza las sentencias ejecutadas
+        directamente sobre la conexión (sin pasar por ejecutar_consulta)
+        """
+        local = self._local
+        for captura in getattr(local, 'capturas', ()):
+            captura.append(sentencia)
+        if self.activo and not getattr(local, 'midiendo', False):
+            self.registrar(sentencia)
+
+    def capturar_sentencias(self):
+        """Context manager que junta las sentencias emitidas por el hilo actual"""
+        return _CapturaSentencias(self)
+
+    def resumen(self, orden='total_ms', limite=None):
+        """Obtener el resumen de todas las sentencias ordenado por un campo"""
+        with self._lock:
+            filas = [e.como_diccionario() for e in self._estadisticas.values()]
+        filas.sort(key=lambda fila: fila[orden], reverse=True)
+        return filas[:limite] if limite else filas
+
+    def texto_resumen(self, limite=20):
+        """Resumen legible para mostrar en pantalla o imprimir al salir"""
+        filas = self.resumen(limite=limite)
+        if not filas:
+            return "No hay consultas registradas"
+
+        lineas = [f"{'Llamadas':>8} {'Total ms':>10} {'p50':>8} {'p95':>8} {'Max':>8} {'Filas':>8}  Consulta"]
+        for fila in filas:
+            lineas.append(
+                f"{fila['llamadas']:>8} {fila['total_ms']:>10.1f} {fila['p50_ms']:>8.2f} "
+                f"{fila['p95_ms']:>8.2f} {fila['max_ms']:>8.2f} {fila['filas']:>8}  {fila['consulta'][:120]}"
+            )
+        return "\n".join(lineas)
+
+    def imprimir_resumen(self, limite=20):
+        """Imprimir el resumen en la consola"""
+        print("=" * 60)
+        print("RESUMEN DE CONSULTAS SQL")
+        print("=" * 60)
+        print(self.texto_resumen(limite))
+
+    def reiniciar(self):
+        """Descartar todas las estadísticas acumuladas"""
+        with self._lock:
+            self._estadisticas.clear()
+
+
+class _CapturaSentencias:
+    """Lista de sentencias capturadas mientras el bloque with está activo"""
+
+    def __init__(self, perfilador):
+        self.perfilador = perfilador
+        self.sentencias = []
+
+    def __enter__(self):
+        local = self.perfilador._local
+        local.capturas = getattr(local, 'capturas', ()) + (self.sentencias,)
+        return self.sentencias
+
+    def __exit__(self, *args):
+        local = self.perfilador._local
+        local.capturas = tuple(c for c in local.capturas if c is not self.sentencias)
+        return False
+
+
+# Perfilador compartido por todo el proceso
+PERFILADOR = PerfiladorConsultas()
@@ -0,0 +1,146 @@
+"""
+Verificación de planes de consulta (EXPLAIN QUERY PLAN)
+Ejecuta las consultas de lectura de los modelos registrando cada sentencia
+y reporta las que todavía recorren una tabla completa.
+"""
+import sqlite3
+from config.database import DatabaseManager
+from config.perfilador import PERFILADOR
+from config.secuencias import AsignadorSku
+
+
+def obtener_plan(conn, consulta):
+    """Obtener las líneas de detalle del plan de una consulta"""
+    filas = conn.execute(f"EXPLAIN QUERY PLAN {consulta}").fetchall()
+    return [fila[3] for fila in filas]
+
+
+def es_recorrido_completo(detalle):
+    """
+    Indicar si una línea del plan recorre completa una tabla o un índice.
+    SCAN ... USING (COVERING) INDEX también lee todas las entradas del índice;
+    solo se exceptúan las tablas virtuales como FTS5, que resuelven el MATCH
+    con su propio índice (VIRTUAL TABLE INDEX).
+    """
+    return detalle.startswith("SCAN ") and "VIRTUAL TABLE INDEX" not in detalle
+
+
+def registrar_sentencias(db_name, funcion):
+    """
+    Ejecutar una función registrando las sentencias SQL que emite
+    la conexión del hilo actual (con los parámetros ya expandidos)
+    """
+    db = DatabaseManager(db_name)
+    db.conectar()
+    try:
+        with PERFILADOR.capturar_sentencias() as sentencias:
+            funcion()
+    finally:
+        db.cerrar_conexion()
+    return sentencias
+
+
+def ejercitar_modelos():
+    """
+    Invocar los métodos de lectura de los modelos. No se llama a nada que
+    escriba o cambie estado del proceso: la consulta del asignador de SKU se
+    ejecuta directamente en vez de generar_sku_unico, que marca el SKU como
+    entregado.
+    """
+    from models.producto import Producto
+    from models.cliente import Cliente
+    from models.venta import Venta
+    from models.cuenta_corriente import CuentaCorriente
+
+    Producto.obtener_todos()
+    Producto.buscar_por_id(1)
+    Producto().sku_existe("GEN000")
+    DatabaseManager().ejecutar_consulta(AsignadorSku.QUERY_SKUS_PREFIJO, ("GEN", "GEO"))
+    Producto.buscar_texto("dior sauvage")
+    Producto.sugerir_similares("dior sovage")
+
+    Cliente.obtener_todos()
+    Cliente.buscar_por_id(1)
+    Cliente.buscar_texto("ana paz")
+    Cliente.buscar_por_telefono("4321")
+    cliente = Cliente()
+    cliente.id = 1
+    cliente.obtener_historial_compras()
+    cliente.calcular_total_compras()
+
+    Venta.obtener_todas()
+    Venta.obtener_por_id(1)
+    Venta.obtener_ventas_por_fecha("2000-01-01", "2000-01-31")
+
+    cuenta = CuentaCorriente(1)
+    cuenta.obtener_cuenta()
+    cuenta.obtener_historial_movimientos()
+    cuenta.obtener_historial_abonos()
+    CuentaCorriente.obtener_todas_las_cuentas()
+    CuentaCorriente.obtener_cuentas_con_saldo()
+
+
+def verificar_planes(db_name, consultas):
+    """
+    Analizar el plan de cada consulta.
+    Retorna una lista de diccionarios con la consulta, su plan
+    y las líneas que corresponden a recorridos completos.
+    """
+    db = DatabaseManager(db_name)
+    conn = db.conectar()
+    reporte = []
+    try:
+        vistas = set()
+        for consulta in consultas:
+            texto = " ".join(consulta.split())
+            if texto in vistas or not texto.upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+                continue
+            # Sentencias internas de FTS5 sobre sus tablas sombra ('main'.'productos_fts_config', ...)
+            if "'main'." in texto:
+                continue
+            # Lectura de una fila que fija la instantánea de DatabaseManager.instantanea()
+            if texto == DatabaseManager.CONSULTA_INSTANTANEA:
+                continue
+            vistas.add(texto)
+
+            try:
+                plan = obtener_plan(conn, texto)
+            except sqlite3.Error as e:
+                print(f"No se pudo analizar: {texto[:60]}... ({e})")
+                continue
+
+            reporte.append({
+                'consulta': texto,
+                'plan': plan,
+                'recorridos': [detalle for detalle in plan if es_recorrido_completo(detalle)]
+            })
+    finally:
+        db.cerrar_conexion()
+    return reporte
+
+
+def verificar_consultas_modelos(db_name="inventario.db", mostrar=True):
+    """
+    Verificar los planes de las consultas que emiten los modelos.
+    Las consultas propias de los controladores (ReporteController,
+    VentaController.obtener_estadisticas_ventas) no se revisan aquí: en su mayoría
+    son totales sobre tablas completas, donde un SCAN es lo esperado. Los
+    filtros por fecha de los reportes se prueban aparte en test_indices.py.
+    """
+    sentencias = registrar_sentencias(db_name, ejercitar_modelos)
+    reporte = verificar_planes(db_name, sentencias)
+    con_recorridos = [r for r in reporte if r['recorridos']]
+
+    if mostrar:
+        print(f"Consultas analizadas: {len(reporte)}")
+        print(f"Consultas con SCAN completo: {len(con_recorridos)}")
+        for r in con_recorridos:
+            print(f"- {r['consulta'][:100]}")
+            for detalle in r['recorridos']:
+                print(f"    {detalle}")
+
+    return con_recorridos
+
+
+if __name__ == "__main__":
+    verificar_consultas_modelos()
@@ -0,0 +1,329 @@
+"""
+Numeración de recibos sin duplicados entre terminales
+Cada prefijo (REC, ABO, ...) tiene un contador por día en la tabla
+secuencias. Una terminal no pide los números de a uno: reserva un bloque
+(por ejemplo 20) incrementando el contador con una sola sentencia dentro de
+la transacción de escritura de la venta, y entrega los siguientes desde
+memoria sin volver a consultar la base. Otra terminal reserva su propio
+bloque, así dos cajas nunca obtienen el mismo número. Dentro de la misma
+terminal, un bloque recién reservado es solo del hilo que lo reservó hasta
+que su transacción se confirma: si se deshiciera, el mismo rango se
+volvería a reservar y un número ya entregado a otro hilo se repetiría.
+Los números de un bloque que no se usan (al cerrar el sistema o cambiar
+el día) quedan sin emitir: la numeración puede tener saltos, nunca repetidos.
+
+Los SKU de productos (prefijo de marca + 3 dígitos) se asignan con
+AsignadorSku, que guarda en memoria un mapa de bits de los sufijos usados.
+"""
+import os
+import random
+import sqlite3
+import string
+import threading
+from datetime import datetime
+from config.database import DatabaseManager
+
+
+class AsignadorNumeros:
+    """Reserva bloques de la tabla secuencias y entrega números de recibo"""
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    # Números reservados por cada ida a la base
+    TAMANO_BLOQUE = 20
+
+    QUERY_RESERVAR = '''
+        INSERT INTO secuencias (prefijo, dia, ultimo) VALUES (?, ?, ?)
+        ON CONFLICT(prefijo, dia) DO UPDATE SET ultimo = ultimo + excluded.ultimo
+        RETURNING ultimo
+    '''
+
+    def __init__(self, db_name="inventario.db", tamano_bloque=None):
+        self.db_name = db_name
+        self.tamano_bloque = tamano_bloque or self.TAMANO_BLOQUE
+        # (prefijo, dia) -> [siguiente, último] del bloque reservado por esta terminal
+        self.bloques = {}
+        # Bloques reservados por cada hilo cuya transacción aún no se confirmó
+        self._pendientes = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls, db_name="inventario.db"):
+        """Obtener el asignador del proceso (la terminal) para un archivo"""
+        clave = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        instancia = cls._instancias.get(clave)
+        if instancia is None:
+            with cls._lock_instancias:
+                instancia = cls._instancias.get(clave)
+                if instancia is None:
+                    instancia = cls(db_name)
+                    cls._instancias[clave] = instancia
+        return instancia
+
+    @staticmethod
+    def formatear(prefijo, dia, numero):
+        """Número de recibo con formato PREFIJO-AAAAMMDD-NNNN"""
+        return f"{prefijo}-{dia.replace('-', '')}-{numero:04d}"
+
+    def _bloques_pendientes(self):
+        """(prefijo, dia) -> bloque reservado por el hilo actual, sin confirmar"""
+        if not hasattr(self._pendientes, 'bloques'):
+            self._pendientes.bloques = {}
+        return self._pendientes.bloques
+
+    def _reservar_bloque(self, db, prefijo, dia):
+        """
+        Incrementar el contador en tamano_bloque dentro de la transacción en
+        curso (o en una propia). El primer número es para quien reserva; el
+        resto queda pendiente, visible solo para este hilo, y pasa a la
+        terminal al confirmarse la transacción.
+        Si se deshace, el contador vuelve atrás y el bloque se descarta.
+        Retorna (bloque, número entregado).
+        """
+        clave = (prefijo, dia)
+        with db.transaccion() as conn:
+            ultimo = conn.execute(self.QUERY_RESERVAR, (prefijo, dia, self.tamano_bloque)).fetchone()[0]
+            numero = ultimo - self.tamano_bloque + 1
+            bloque = [numero + 1, ultimo]
+            self._bloques_pendientes()[clave] = bloque
+            db.al_revertir(lambda: self._descartar_pendiente(clave, bloque))
+            db.al_confirmar(lambda: self._publicar_bloque(clave, bloque))
+        return bloque, numero
+
+    def _descartar_pendiente(self, clave, bloque):
+        pendientes = self._bloques_pendientes()
+        if pendientes.get(clave) is bloque:
+            del pendientes[clave]
+
+    def _publicar_bloque(self, clave, bloque):
+        """Compartir con los demás hilos lo que queda de un bloque ya confirmado"""
+        self._descartar_pendiente(clave, bloque)
+        with self._lock:
+            actual = self.bloques.get(clave)
+            # Si otro hilo ya publicó un bloque con números libres, el resto de
+            # este queda sin emitir (un salto en la numeración, nunca un repetido)
+            if bloque[0] <= bloque[1] and (actual is None or actual[0] > actual[1]):
+                self.bloques[clave] = bloque
+
+    def _devolver_numero(self, clave, bloque, numero):
+        """Devolver el último número entregado si su transacción se deshizo"""
+        with self._lock:
+            vigente = self.bloques.get(clave) is bloque or self._bloques_pendientes().get(clave) is bloque
+            if vigente and bloque[0] == numero + 1:
+                bloque[0] = numero
+
+    def siguiente(self, prefijo, db=None, fecha=None):
+        """
+        Entregar el siguiente número de recibo del prefijo para el día.
+        db: DatabaseManager cuya transacción en curso debe incluir la reserva
+        (por defecto uno nuevo del mismo archivo; dentro de transaccion() se une a ella)
+        """
+        db = db or DatabaseManager(self.db_name)
+        dia = (fecha or datetime.now()).strftime('%Y-%m-%d')
+        clave = (prefijo, dia)
+
+        pendientes = self._bloques_pendientes()
+        with self._lock:
+            # Los bloques de días anteriores ya no sirven
+            for vieja in [c for c in self.bloques if c[1] != dia]:
+                del self.bloques[vieja]
+            for vieja in [c for c in pendientes if c[1] != dia]:
+                del pendientes[vieja]
+            # Primero el bloque que este hilo reservó en su transacción en curso
+            bloque = pendientes.get(clave)
+            if bloque is None or bloque[0] > bloque[1]:
+                bloque = self.bloques.get(clave)
+            disponible = bloque is not None and bloque[0] <= bloque[1]
+            if disponible:
+                numero = bloque[0]
+                bloque[0] += 1
+
+        # La reserva se hace sin tomar el lock: otro hilo puede estar esperando
+        # el bloqueo de escritura de SQLite mientras tiene su propia transacción.
+        # El bloque nuevo es solo de este hilo hasta el COMMIT
+        if not disponible:
+            bloque, numero = self._reservar_bloque(db, prefijo, dia)
+
+        db.al_revertir(lambda: self._devolver_numero(clave, bloque, numero))
+        return self.formatear(prefijo, dia, numero)
+
+    def vista_previa(self, prefijo, fecha=None):
+        """
+        Número que probablemente recibirá el próximo recibo, para mostrarlo
+        en pantalla. No reserva nada: el número definitivo lo asigna siguiente()
+        al guardar
+        """
+        dia = (fecha or datetime.now()).strftime('%Y-%m-%d')
+        with self._lock:
+            bloque = self.bloques.get((prefijo, dia))
+            if bloque is not None and bloque[0] <= bloque[1]:
+                return self.formatear(prefijo, dia, bloque[0])
+
+        resultado = DatabaseManager(self.db_name).ejecutar_consulta(
+            "SELECT ultimo FROM secuencias WHERE prefijo = ? AND dia = ?", (prefijo, dia))
+        ultimo = resultado[0][0] if resultado else 0
+        return self.formatear(prefijo, dia, ultimo + 1)
+
+
+class AsignadorSku:
+    """
+    Asignación de SKU únicos (MARCA + 3 dígitos) sin consultar la base por
+    cada candidato. Por cada prefijo se leen una sola vez los SKU existentes
+    (un rango del índice idx_productos_sku) y se arma un mapa de bits de los
+    sufijos 000-999 ocupados; el siguiente libre se obtiene con operaciones
+    de bits. El mapa se vuelve a leer cuando PRAGMA data_version indica que
+    otra conexión escribió en la base, así los sufijos de productos borrados
+    vuelven a quedar libres.
+    Los productos inactivos cuentan como ocupados a propósito: conservan su
+    SKU (en etiquetas y ventas anteriores) y el índice único ux_productos_sku
+    también los incluye, así un SKU nunca se reutiliza mientras la fila exista.
+    Entre la lectura del mapa y la escritura otra terminal puede guardar el
+    mismo SKU; escribir_con_skus reintenta con otro cuando el índice lo rechaza.
+    """
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    CAPACIDAD = 1000
+    # Intentos de escritura ante un SKU que otra terminal guardó primero
+    REINTENTOS = 5
+
+    QUERY_SKUS_PREFIJO = "SELECT sku FROM productos WHERE sku >= ? AND sku < ?"
+
+    def __init__(self, db_name="inventario.db"):
+        self.db_name = db_name
+        # prefijo -> {'ocupados': int (mapa de bits), 'otros': set, 'firma': version_datos,
+        #            'entregados': int, 'otros_entregados': set (entregados desde la última lectura)}
+        self.prefijos = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls, db_name="inventario.db"):
+        """Obtener el asignador del proceso para un archivo"""
+        clave = os.path.abspath(db_name) if db_name != ":memory:" else db_name
+        instancia = cls._instancias.get(clave)
+        if instancia is None:
+            with cls._lock_instancias:
+                instancia = cls._instancias.get(clave)
+                if instancia is None:
+                    instancia = cls(db_name)
+                    cls._instancias[clave] = instancia
+        return instancia
+
+    @staticmethod
+    def prefijo_para(marca):
+        """Primeras 3 letras de la marca en mayúsculas (GEN si no hay marca)"""
+        if not marca:
+            return "GEN"
+        prefijo = marca[:3].upper().replace(" ", "")
+        # Si la marca es muy corta, rellenar con X
+        while len(prefijo) < 3:
+            prefijo += "X"
+        return prefijo
+
+    @staticmethod
+    def _sufijo(sku, prefijo):
+        """Sufijo numérico 0-999 de un SKU estándar del prefijo, o None"""
+        resto = sku[len(prefijo):]
+        if sku.startswith(prefijo) and len(resto) == 3 and resto.isdigit():
+            return int(resto)
+        return None
+
+    def _cargar(self, db, prefijo):
+        """Leer los SKU existentes del prefijo con una consulta por rango"""
+        limite = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+        filas = db.ejecutar_consulta(self.QUERY_SKUS_PREFIJO, (prefijo, limite)) or []
+        ocupados = 0
+        otros = set()
+        for (sku,) in filas:
+            sufijo = self._sufijo(sku, prefijo)
+            if sufijo is None:
+                otros.add(sku)
+            else:
+                ocupados |= 1 << sufijo
+        return {'ocupados': ocupados, 'otros': otros, 'entregados': 0, 'otros_entregados': set()}
+
+    def _entrada(self, db, prefijo, firma):
+        """Mapa del prefijo, releído si la base cambió desde otra conexión"""
+        entrada = self.prefijos.get(prefijo)
+        if entrada is None or firma is None or entrada['firma'] != firma:
+            nueva = self._cargar(db, prefijo)
+            if entrada is not None:
+                # Conservar solo lo entregado desde la lectura anterior, que puede
+                # no estar guardado todavía; lo demás sale de la base, sin los
+                # sufijos que se liberaron
+                nueva['ocupados'] |= entrada['entregados']
+                nueva['otros'] |= entrada['otros_entregados']
+            nueva['firma'] = firma
+            self.prefijos[prefijo] = entrada = nueva
+        return entrada
+
+    def _tomar(self, entrada, prefijo):
+        """Marcar y devolver el sufijo libre más bajo (o un SKU extendido si no quedan)"""
+        ocupados = entrada['ocupados']
+        # El bit 0 más bajo de ocupados es el primer sufijo libre
+        libre = (~ocupados & (ocupados + 1)).bit_length() - 1
+        if libre < self.CAPACIDAD:
+            entrada['ocupados'] = ocupados | (1 << libre)
+            entrada['entregados'] |= 1 << libre
+            return f"{prefijo}{libre:03d}"
+
+        # Sin sufijos de 3 dígitos libres: agregar letras adicionales
+        while True:
+            letras = ''.join(random.choices(string.ascii_uppercase, k=2))
+            sku = f"{prefijo}{random.randint(0, 999):03d}{letras}"
+            if sku not in entrada['otros']:
+                entrada['otros'].add(sku)
+                entrada['otros_entregados'].add(sku)
+                return sku
+
+    def siguiente(self, marca, db=None):
+        """Entregar un SKU único para la marca"""
+        return self.asignar_lote([marca], db)[0]
+
+    def asignar_lote(self, marcas, db=None):
+        """
+        Entregar un SKU único por cada marca de la lista (modo masivo).
+        Cada prefijo se lee a lo sumo una vez, sin importar cuántos SKU se pidan
+        """
+        db = db or DatabaseManager(self.db_name)
+        firma = db.version_datos()
+        skus = []
+        with self._lock:
+            for marca in marcas:
+                prefijo = self.prefijo_para(marca)
+                entrada = self._entrada(db, prefijo, firma)
+                skus.append(self._tomar(entrada, prefijo))
+        return skus
+
+    def escribir_con_skus(self, marcas, escribir, db=None):
+        """
+        Asignar un SKU por marca y llamar a escribir(skus) dentro de una
+        transacción. Si el índice único rechaza un SKU que otra terminal
+        guardó primero, se deshace la escritura y se reintenta con SKU
+        nuevos (los rechazados ya quedaron ocupados en el mapa).
+        Retorna la lista de SKU escritos; propaga el error si se agotan los intentos.
+        """
+        db = db or DatabaseManager(self.db_name)
+        for intento in range(1, self.REINTENTOS + 1):
+            skus = self.asignar_lote(marcas, db)
+            try:
+                with db.transaccion():
+                    escribir(skus)
+                return skus
+            except sqlite3.IntegrityError as e:
+                if "productos.sku" not in str(e) or intento == self.REINTENTOS:
+                    raise
+                print(f"SKU repetido por otra terminal, reintentando ({intento}/{self.REINTENTOS})")
+
+    def marcar(self, sku):
+        """Registrar un SKU escrito por esta terminal (cargado a mano o importado)"""
+        if not sku:
+            return
+        with self._lock:
+            for prefijo, entrada in self.prefijos.items():
+                if sku.startswith(prefijo):
+                    sufijo = self._sufijo(sku, prefijo)
+                    if sufijo is None:
+                        entrada['otros'].add(sku)
+                    else:
+                        entrada['ocupados'] |= 1 << sufijo
@@ -0,0 +1,49 @@
+"""
+Fixtures compartidas por los scripts de prueba.
+Cada prueba recibe una base temporal propia bajo tmp_path (pytest la
+elimina) y las conexiones del pool a ese archivo se cierran al terminar.
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager, PoolConexiones
+import config.mapeo as mapeo
+import models.producto as modelo_producto
+import models.cliente as modelo_cliente
+import models.venta as modelo_venta
+import models.cuenta_corriente as modelo_cuenta
+
+# Módulos que abren DatabaseManager() sobre inventario.db por defecto
+MODULOS_CON_BASE = (mapeo, modelo_producto, modelo_cliente, modelo_venta, modelo_cuenta)
+
+
+def cerrar_pools(db_name):
+    """Cerrar y olvidar los pools de conexiones abiertos sobre un archivo"""
+    archivo = os.path.abspath(db_name)
+    with PoolConexiones._lock:
+        claves = [clave for clave, pool in PoolConexiones._pools.items() if pool.archivo == archivo]
+        pools = [PoolConexiones._pools.pop(clave) for clave in claves]
+    for pool in pools:
+        pool.cerrar()
+    DatabaseManager._esquemas_listos.discard(archivo)
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    """Ruta de una base temporal para la prueba"""
+    ruta = str(tmp_path / "prueba.db")
+    yield ruta
+    cerrar_pools(ruta)
+
+
+@pytest.fixture
+def db_modelos(db_name, monkeypatch):
+    """Base temporal que los modelos usan en lugar de inventario.db"""
+    def abrir(*args, **kwargs):
+        return DatabaseManager(*(args or (db_name,)), **kwargs)
+
+    for modulo in MODULOS_CON_BASE:
+        monkeypatch.setattr(modulo, "DatabaseManager", abrir)
+    return db_name
@@ -40,10 +40,9 @@ class ClienteController:
             if cliente.guardar():
                 print("CONTROLLER DEBUG: Cliente guardado en BD")
             
-                # Obtener el ID del cliente recién creado
-                clientes = Cliente.obtener_todos()
+                # Obtener el ID del cliente recién creado (índice por nombre del directorio)
                 cliente_nuevo = None
-                for c in clientes:
+                for c in Cliente.buscar_en_directorio('nombre_completo', cliente.nombre_completo()):
                     if (c.nombre == datos['nombre'] and 
                         c.apellido == datos['apellido'] and 
                         c.telefono == datos['telefono']):
@@ -163,21 +162,18 @@ class ClienteController:
             messagebox.showerror("Error", f"Error al eliminar cliente: {str(e)}")
             return False
     
+    def obtener_todos_clientes(self):
+        """Obtener lista de todos los clientes activos"""
+        try:
+            return Cliente.obtener_todos()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al obtener clientes: {str(e)}")
+            return []
+
     def buscar_clientes(self, termino):
-        """Buscar clientes por nombre, apellido, teléfono o email"""
+        """Buscar clientes por nombre, apellido, email o terminación del teléfono"""
         try:
-            clientes = self.obtener_todos_clientes()
-            termino = termino.lower()
-            
-            clientes_filtrados = [
-                c for c in clientes 
-                if (termino in c.nombre.lower() or 
-                    termino in c.apellido.lower() or
-                    termino in c.telefono.lower() or
-                    termino in c.email.lower())
-            ]
-            
-            return clientes_filtrados
+            return Cliente.buscar(termino)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al buscar clientes: {str(e)}")
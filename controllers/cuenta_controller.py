@@ -3,8 +3,8 @@ Controlador para gestión de cuentas corrientes
 """
 from models.cuenta_corriente import CuentaCorriente
 from models.cliente import Cliente
+from config.secuencias import AsignadorNumeros
 from tkinter import messagebox
-from datetime import datetime
 
 class CuentaController:
     def __init__(self):
@@ -12,30 +12,16 @@ class CuentaController:
         pass
 
     def generar_numero_recibo_abono(self):
-        """Generar número de recibo automático para abonos"""
+        """
+        Número de recibo que recibirá el próximo abono (ABO-YYYYMMDD-XXXX), para mostrar.
+        El número definitivo se asigna de la secuencia al registrar el abono
+        """
         try:
-            from config.database import obtener_conexion
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-
-            # Obtener el último ID de abono
-            cursor.execute("SELECT MAX(id) FROM abonos")
-            resultado = cursor.fetchone()
-            ultimo_id = resultado[0] if resultado[0] else 0
-
-            conn.close()
-
-            # Generar número de recibo: formato ABO-YYYYMMDD-XXXX
-            fecha_actual = datetime.now().strftime("%Y%m%d")
-            numero_secuencial = str(ultimo_id + 1).zfill(4)
-            numero_recibo = f"ABO-{fecha_actual}-{numero_secuencial}"
-
-            return numero_recibo
+            return AsignadorNumeros.obtener().vista_previa(CuentaCorriente.PREFIJO_RECIBO_ABONO)
 
         except Exception as e:
             print(f"Error al generar número de recibo: {str(e)}")
-            # Generar un número básico en caso de error
-            return f"ABO-{datetime.now().strftime('%Y%m%d')}-0001"
+            return ""
     
     def registrar_abono(self, cliente_id, monto, metodo_pago, descripcion="", recibo_numero=""):
         """Registrar un abono del cliente"""
@@ -44,12 +30,13 @@ class CuentaController:
             if monto <= 0:
                 return False, "El monto debe ser mayor a 0"
             
-            # Crear cuenta si no existe
-            CuentaCorriente.crear_cuenta_si_no_existe(cliente_id)
-            
-            # Registrar abono
             cuenta = CuentaCorriente(cliente_id)
-            exito, mensaje = cuenta.registrar_abono(monto, metodo_pago, descripcion, recibo_numero)
+            with cuenta.db.transaccion():
+                # Crear cuenta si no existe
+                CuentaCorriente.crear_cuenta_si_no_existe(cliente_id)
+                
+                # Registrar abono
+                exito, mensaje = cuenta.registrar_abono(monto, metodo_pago, descripcion, recibo_numero)
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
@@ -119,12 +106,13 @@ class CuentaController:
     def agregar_venta_a_cuenta(self, cliente_id, monto_venta, descripcion="Venta", venta_id=None):
         """Agregar una venta a la cuenta corriente del cliente"""
         try:
-            # Crear cuenta si no existe
-            CuentaCorriente.crear_cuenta_si_no_existe(cliente_id)
-            
-            # Agregar deuda
             cuenta = CuentaCorriente(cliente_id)
-            return cuenta.agregar_deuda(monto_venta, descripcion, venta_id)
+            with cuenta.db.transaccion():
+                # Crear cuenta si no existe
+                CuentaCorriente.crear_cuenta_si_no_existe(cliente_id)
+                
+                # Agregar deuda
+                return cuenta.agregar_deuda(monto_venta, descripcion, venta_id)
             
         except Exception as e:
             print(f"Error al agregar venta a cuenta: {str(e)}")
@@ -131,22 +131,22 @@ class ProductoController:
             return False
     
     def buscar_productos(self, termino):
-        """Buscar productos por nombre o categoría"""
+        """Buscar productos por nombre, marca, tipo, categoría, proveedor o SKU (por relevancia)"""
         try:
-            productos = self.obtener_todos_productos()
-            termino = termino.lower()
-            
-            productos_filtrados = [
-                p for p in productos 
-                if termino in p.nombre.lower() or termino in p.categoria.lower()
-            ]
-            
-            return productos_filtrados
+            return Producto.buscar_texto(termino)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al buscar productos: {str(e)}")
             return []
     
+    def sugerir_productos(self, termino, limite=5):
+        """Productos con nombre o marca parecidos al término, para el ¿Quiso decir...?"""
+        try:
+            return [producto for producto, _ in Producto.sugerir_similares(termino, limite)]
+        except Exception as e:
+            print(f"Error al sugerir productos: {str(e)}")
+            return []
+
     def obtener_productos_bajo_stock(self):
         """Obtener productos que necesitan reabastecimiento"""
         try:
@@ -230,22 +230,16 @@ class ProductoController:
                 'ganancia_potencial': 0
             }
 
-    def generar_skus_faltantes(self):
-        """Generar SKUs para productos existentes que no los tengan"""
+    def generar_skus_faltantes(self, progreso=None):
+        """
+        Generar SKUs para productos existentes que no los tengan
+        progreso: función opcional que recibe (procesados, total)
+        """
         try:
-            from models.producto import Producto
-            productos = Producto.obtener_todos()
-            productos_actualizados = 0
-
-            for producto in productos:
-                if not producto.sku:  # Si no tiene SKU
-                    # Generar SKU para el producto
-                    producto.sku = producto.generar_sku_unico()
-
-                    # Actualizar en la base de datos
-                    if producto.actualizar():
-                        productos_actualizados += 1
-                        print(f"DEBUG: SKU generado para '{producto.nombre}': {producto.sku}")
+            productos_actualizados = Producto.completar_skus_faltantes(progreso=progreso)
+            if productos_actualizados is None:
+                messagebox.showerror("Error", "No se pudieron guardar los SKUs generados")
+                return 0
 
             if productos_actualizados > 0:
                 messagebox.showinfo("Éxito", f"Se generaron SKUs para {productos_actualizados} productos")
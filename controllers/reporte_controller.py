@@ -2,74 +2,91 @@
 Controlador para la lógica de reportes y análisis
 """
 from config.database import DatabaseManager
+from utils.herlpers import rango_semiabierto
 from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import messagebox
 
 class ReporteController:
-    def __init__(self):
-        """Inicializar el controlador de reportes"""
-        self.db = DatabaseManager()
+    def __init__(self, historico=False):
+        """
+        Inicializar el controlador de reportes
+        Los reportes usan conexiones de solo lectura, separadas de las que
+        escriben las ventas, para no competir por el bloqueo de escritura
+        historico: incluir en todos los reportes los años archivados
+        """
+        self.db = DatabaseManager(solo_lectura=True, historico=historico)
+        self.db_historico = DatabaseManager(solo_lectura=True, historico=True)
+
+    def db_para_rango(self, fecha_inicio):
+        """
+        Elegir la conexión según la fecha inicial consultada: los rangos que
+        comienzan antes del año en curso leen también los archivos históricos
+        """
+        if fecha_inicio and str(fecha_inicio) < f"{datetime.now().year}-01-01":
+            return self.db_historico
+        return self.db
     
     def obtener_resumen_general(self):
         """Obtener resumen general del negocio"""
         try:
-            # Productos
-            query_productos = "SELECT COUNT(*) FROM productos WHERE activo=1"
-            total_productos = self.db.ejecutar_consulta(query_productos)[0][0]
-
-            query_stock_bajo = """
-                SELECT COUNT(*) FROM productos
-                WHERE activo=1 AND stock <= stock_minimo
-            """
-            productos_stock_bajo = self.db.ejecutar_consulta(query_stock_bajo)[0][0]
-
-            query_valor_inventario = """
-                SELECT SUM(precio_compra * stock) FROM productos WHERE activo=1
-            """
-            resultado = self.db.ejecutar_consulta(query_valor_inventario)
-            valor_inventario = resultado[0][0] if resultado[0][0] else 0
-
-            # Clientes
-            query_clientes = "SELECT COUNT(*) FROM clientes WHERE activo=1"
-            total_clientes = self.db.ejecutar_consulta(query_clientes)[0][0]
-
-            # Clientes con compras
-            query_clientes_compras = """
-                SELECT COUNT(DISTINCT cliente_id) FROM ventas
-                WHERE cliente_id IS NOT NULL
-            """
-            resultado_clientes_compras = self.db.ejecutar_consulta(query_clientes_compras)
-            clientes_con_compras = resultado_clientes_compras[0][0] if resultado_clientes_compras[0][0] else 0
-
-            # Ventas del mes actual
-            query_ventas_mes = """
-                SELECT COUNT(*), SUM(total) FROM ventas
-                WHERE strftime('%Y-%m', fecha_venta) = strftime('%Y-%m', 'now')
-            """
-            resultado_ventas_mes = self.db.ejecutar_consulta(query_ventas_mes)[0]
-            cantidad_ventas_mes = resultado_ventas_mes[0] if resultado_ventas_mes[0] else 0
-            ventas_mes = resultado_ventas_mes[1] if resultado_ventas_mes[1] else 0
-
-            # Deuda pendiente
-            query_deuda = """
-                SELECT SUM(saldo_pendiente), COUNT(*) FROM cuentas_corrientes
-                WHERE activa = 1 AND saldo_pendiente > 0
-            """
-            resultado_deuda = self.db.ejecutar_consulta(query_deuda)[0]
-            deuda_pendiente = resultado_deuda[0] if resultado_deuda[0] else 0
-            clientes_con_deuda = resultado_deuda[1] if resultado_deuda[1] else 0
-
-            return {
-                'total_productos': total_productos,
-                'valor_inventario': valor_inventario,
-                'total_clientes': total_clientes,
-                'clientes_con_compras': clientes_con_compras,
-                'ventas_mes': ventas_mes,
-                'cantidad_ventas_mes': cantidad_ventas_mes,
-                'deuda_pendiente': deuda_pendiente,
-                'clientes_con_deuda': clientes_con_deuda
-            }
+            with self.db.instantanea():
+                # Productos
+                query_productos = "SELECT COUNT(*) FROM productos WHERE activo=1"
+                total_productos = self.db.ejecutar_consulta(query_productos)[0][0]
+
+                query_stock_bajo = """
+                    SELECT COUNT(*) FROM productos
+                    WHERE activo=1 AND stock <= stock_minimo
+                """
+                productos_stock_bajo = self.db.ejecutar_consulta(query_stock_bajo)[0][0]
+
+                query_valor_inventario = """
+                    SELECT SUM(precio_compra * stock) FROM productos WHERE activo=1
+                """
+                resultado = self.db.ejecutar_consulta(query_valor_inventario)
+                valor_inventario = resultado[0][0] if resultado[0][0] else 0
+
+                # Clientes
+                query_clientes = "SELECT COUNT(*) FROM clientes WHERE activo=1"
+                total_clientes = self.db.ejecutar_consulta(query_clientes)[0][0]
+
+                # Clientes con compras
+                query_clientes_compras = """
+                    SELECT COUNT(DISTINCT cliente_id) FROM ventas
+                    WHERE cliente_id IS NOT NULL
+                """
+                resultado_clientes_compras = self.db.ejecutar_consulta(query_clientes_compras)
+                clientes_con_compras = resultado_clientes_compras[0][0] if resultado_clientes_compras[0][0] else 0
+
+                # Ventas del mes actual
+                query_ventas_mes = """
+                    SELECT SUM(ventas), SUM(total) FROM ventas_resumen_diario
+                    WHERE dia >= date('now', 'start of month')
+                """
+                resultado_ventas_mes = self.db.ejecutar_consulta(query_ventas_mes)[0]
+                cantidad_ventas_mes = resultado_ventas_mes[0] if resultado_ventas_mes[0] else 0
+                ventas_mes = resultado_ventas_mes[1] if resultado_ventas_mes[1] else 0
+
+                # Deuda pendiente
+                query_deuda = """
+                    SELECT SUM(saldo_pendiente), COUNT(*) FROM cuentas_corrientes
+                    WHERE activa = 1 AND saldo_pendiente > 0
+                """
+                resultado_deuda = self.db.ejecutar_consulta(query_deuda)[0]
+                deuda_pendiente = resultado_deuda[0] if resultado_deuda[0] else 0
+                clientes_con_deuda = resultado_deuda[1] if resultado_deuda[1] else 0
+
+                return {
+                    'total_productos': total_productos,
+                    'valor_inventario': valor_inventario,
+                    'total_clientes': total_clientes,
+                    'clientes_con_compras': clientes_con_compras,
+                    'ventas_mes': ventas_mes,
+                    'cantidad_ventas_mes': cantidad_ventas_mes,
+                    'deuda_pendiente': deuda_pendiente,
+                    'clientes_con_deuda': clientes_con_deuda
+                }
 
         except Exception as e:
             print(f"Error al obtener resumen general: {str(e)}")
@@ -82,14 +99,13 @@ class ReporteController:
             fecha_fin = datetime.now().strftime('%Y-%m-%d')
             
             query = """
-                SELECT DATE(fecha_venta) as fecha, COUNT(*) as cantidad, SUM(total) as total
-                FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ?
-                GROUP BY DATE(fecha_venta)
-                ORDER BY fecha_venta
+                SELECT dia as fecha, ventas as cantidad, total
+                FROM ventas_resumen_diario
+                WHERE dia >= ? AND dia < ?
+                ORDER BY dia
             """
             
-            resultados = self.db.ejecutar_consulta(query, (fecha_inicio, fecha_fin))
+            resultados = self.db.ejecutar_consulta(query, rango_semiabierto(fecha_inicio, fecha_fin))
             return resultados or []
             
         except Exception as e:
@@ -185,13 +201,13 @@ class ReporteController:
         """Obtener estadísticas de los últimos meses"""
         try:
             query = """
-                SELECT strftime('%Y-%m', fecha_venta) as mes,
-                       COUNT(*) as total_ventas,
+                SELECT substr(dia, 1, 7) as mes,
+                       SUM(ventas) as total_ventas,
                        SUM(total) as ingresos,
-                       AVG(total) as ticket_promedio
-                FROM ventas
-                WHERE fecha_venta >= date('now', '-{} months')
-                GROUP BY strftime('%Y-%m', fecha_venta)
+                       SUM(total) / SUM(ventas) as ticket_promedio
+                FROM ventas_resumen_diario
+                WHERE dia >= date('now', '-{} months')
+                GROUP BY substr(dia, 1, 7)
                 ORDER BY mes
             """.format(meses)
             
@@ -205,26 +221,28 @@ class ReporteController:
     def obtener_rentabilidad_productos(self):
         """Obtener análisis de rentabilidad por producto"""
         try:
-            query = """
-                SELECT p.nombre, p.precio_compra, p.precio_venta,
-                       (p.precio_venta - p.precio_compra) as ganancia_unitaria,
-                       ((p.precio_venta - p.precio_compra) / p.precio_compra * 100) as margen_porcentaje,
-                       p.stock,
-                       COALESCE(SUM(dv.cantidad), 0) as total_vendido,
-                       COALESCE(SUM(dv.subtotal - (p.precio_compra * dv.cantidad)), 0) as ganancia_total
-                FROM productos p
-                LEFT JOIN detalle_ventas dv ON p.id = dv.producto_id
-                WHERE p.activo = 1
-                GROUP BY p.id, p.nombre, p.precio_compra, p.precio_venta, p.stock
-                ORDER BY ganancia_total DESC
-            """
-            
-            resultados = self.db.ejecutar_consulta(query)
-            return resultados or []
+            return list(self.iterar_rentabilidad_productos())
             
         except Exception as e:
             print(f"Error al obtener rentabilidad de productos: {str(e)}")
             return []
+
+    def iterar_rentabilidad_productos(self, tamano_bloque=500):
+        """Recorrer la rentabilidad por producto sin cargarla completa en memoria"""
+        query = """
+            SELECT p.nombre, p.precio_compra, p.precio_venta,
+                   (p.precio_venta - p.precio_compra) as ganancia_unitaria,
+                   ((p.precio_venta - p.precio_compra) / p.precio_compra * 100) as margen_porcentaje,
+                   p.stock,
+                   COALESCE(SUM(dv.cantidad), 0) as total_vendido,
+                   COALESCE(SUM(dv.subtotal - (p.precio_compra * dv.cantidad)), 0) as ganancia_total
+            FROM productos p
+            LEFT JOIN detalle_ventas dv ON p.id = dv.producto_id
+            WHERE p.activo = 1
+            GROUP BY p.id, p.nombre, p.precio_compra, p.precio_venta, p.stock
+            ORDER BY ganancia_total DESC
+        """
+        return self.db.consultar_iterador(query, tamano_bloque=tamano_bloque)
     
     def exportar_reporte_csv(self, datos, nombre_archivo, headers):
         """Exportar datos a CSV"""
@@ -262,12 +280,12 @@ class ReporteController:
         """Obtener ventas agrupadas por mes"""
         try:
             query = """
-                SELECT strftime('%Y-%m', fecha_venta) as mes,
+                SELECT substr(dia, 1, 7) as mes,
                        SUM(total) as total_ventas,
-                       COUNT(*) as cantidad_ventas
-                FROM ventas
-                WHERE fecha_venta >= date('now', '-{} months')
-                GROUP BY strftime('%Y-%m', fecha_venta)
+                       SUM(ventas) as cantidad_ventas
+                FROM ventas_resumen_diario
+                WHERE dia >= date('now', '-{} months')
+                GROUP BY substr(dia, 1, 7)
                 ORDER BY mes DESC
             """.format(meses)
 
@@ -281,27 +299,28 @@ class ReporteController:
     def obtener_resumen_productos(self):
         """Obtener resumen de productos"""
         try:
-            # Total productos
-            query_total = "SELECT COUNT(*) FROM productos WHERE activo=1"
-            total_productos = self.db.ejecutar_consulta(query_total)[0][0]
-
-            # Valor total inventario
-            query_valor = "SELECT SUM(precio_compra * stock) FROM productos WHERE activo=1"
-            resultado_valor = self.db.ejecutar_consulta(query_valor)
-            valor_total = resultado_valor[0][0] if resultado_valor[0][0] else 0
-
-            # Productos bajo stock
-            query_bajo_stock = """
-                SELECT COUNT(*) FROM productos
-                WHERE activo=1 AND stock <= stock_minimo
-            """
-            productos_bajo_stock = self.db.ejecutar_consulta(query_bajo_stock)[0][0]
-
-            return {
-                'total_productos': total_productos,
-                'valor_total': valor_total,
-                'productos_bajo_stock': productos_bajo_stock
-            }
+            with self.db.instantanea():
+                # Total productos
+                query_total = "SELECT COUNT(*) FROM productos WHERE activo=1"
+                total_productos = self.db.ejecutar_consulta(query_total)[0][0]
+
+                # Valor total inventario
+                query_valor = "SELECT SUM(precio_compra * stock) FROM productos WHERE activo=1"
+                resultado_valor = self.db.ejecutar_consulta(query_valor)
+                valor_total = resultado_valor[0][0] if resultado_valor[0][0] else 0
+
+                # Productos bajo stock
+                query_bajo_stock = """
+                    SELECT COUNT(*) FROM productos
+                    WHERE activo=1 AND stock <= stock_minimo
+                """
+                productos_bajo_stock = self.db.ejecutar_consulta(query_bajo_stock)[0][0]
+
+                return {
+                    'total_productos': total_productos,
+                    'valor_total': valor_total,
+                    'productos_bajo_stock': productos_bajo_stock
+                }
 
         except Exception as e:
             print(f"Error al obtener resumen de productos: {str(e)}")
@@ -327,27 +346,28 @@ class ReporteController:
     def obtener_resumen_clientes(self):
         """Obtener resumen de clientes"""
         try:
-            # Total clientes
-            query_total = "SELECT COUNT(*) FROM clientes WHERE activo=1"
-            total_clientes = self.db.ejecutar_consulta(query_total)[0][0]
-
-            # Clientes activos (con compras)
-            query_activos = """
-                SELECT COUNT(DISTINCT cliente_id) FROM ventas
-                WHERE cliente_id IS NOT NULL
-            """
-            clientes_activos = self.db.ejecutar_consulta(query_activos)[0][0]
-
-            # Mayor compra individual
-            query_mayor = "SELECT MAX(total) FROM ventas"
-            resultado_mayor = self.db.ejecutar_consulta(query_mayor)
-            mayor_compra = resultado_mayor[0][0] if resultado_mayor[0][0] else 0
-
-            return {
-                'total_clientes': total_clientes,
-                'clientes_activos': clientes_activos,
-                'mayor_compra': mayor_compra
-            }
+            with self.db.instantanea():
+                # Total clientes
+                query_total = "SELECT COUNT(*) FROM clientes WHERE activo=1"
+                total_clientes = self.db.ejecutar_consulta(query_total)[0][0]
+
+                # Clientes activos (con compras)
+                query_activos = """
+                    SELECT COUNT(DISTINCT cliente_id) FROM ventas
+                    WHERE cliente_id IS NOT NULL
+                """
+                clientes_activos = self.db.ejecutar_consulta(query_activos)[0][0]
+
+                # Mayor compra individual
+                query_mayor = "SELECT MAX(total) FROM ventas"
+                resultado_mayor = self.db.ejecutar_consulta(query_mayor)
+                mayor_compra = resultado_mayor[0][0] if resultado_mayor[0][0] else 0
+
+                return {
+                    'total_clientes': total_clientes,
+                    'clientes_activos': clientes_activos,
+                    'mayor_compra': mayor_compra
+                }
 
         except Exception as e:
             print(f"Error al obtener resumen de clientes: {str(e)}")
@@ -385,32 +405,33 @@ class ReporteController:
     def obtener_resumen_financiero(self):
         """Obtener resumen financiero"""
         try:
-            # Ingresos del mes actual
-            query_mes = """
-                SELECT SUM(total) FROM ventas
-                WHERE strftime('%Y-%m', fecha_venta) = strftime('%Y-%m', 'now')
-            """
-            resultado_mes = self.db.ejecutar_consulta(query_mes)
-            ingresos_mes = resultado_mes[0][0] if resultado_mes[0][0] else 0
-
-            # Cuentas por cobrar
-            query_cobrar = """
-                SELECT SUM(saldo_pendiente) FROM cuentas_corrientes
-                WHERE activa = 1 AND saldo_pendiente > 0
-            """
-            resultado_cobrar = self.db.ejecutar_consulta(query_cobrar)
-            cuentas_cobrar = resultado_cobrar[0][0] if resultado_cobrar[0][0] else 0
-
-            # Promedio de venta
-            query_promedio = "SELECT AVG(total) FROM ventas"
-            resultado_promedio = self.db.ejecutar_consulta(query_promedio)
-            promedio_venta = resultado_promedio[0][0] if resultado_promedio[0][0] else 0
-
-            return {
-                'ingresos_mes': ingresos_mes,
-                'cuentas_cobrar': cuentas_cobrar,
-                'promedio_venta': promedio_venta
-            }
+            with self.db.instantanea():
+                # Ingresos del mes actual
+                query_mes = """
+                    SELECT SUM(total) FROM ventas_resumen_diario
+                    WHERE dia >= date('now', 'start of month')
+                """
+                resultado_mes = self.db.ejecutar_consulta(query_mes)
+                ingresos_mes = resultado_mes[0][0] if resultado_mes[0][0] else 0
+
+                # Cuentas por cobrar
+                query_cobrar = """
+                    SELECT SUM(saldo_pendiente) FROM cuentas_corrientes
+                    WHERE activa = 1 AND saldo_pendiente > 0
+                """
+                resultado_cobrar = self.db.ejecutar_consulta(query_cobrar)
+                cuentas_cobrar = resultado_cobrar[0][0] if resultado_cobrar[0][0] else 0
+
+                # Promedio de venta
+                query_promedio = "SELECT SUM(total) / SUM(ventas) FROM ventas_resumen_diario"
+                resultado_promedio = self.db.ejecutar_consulta(query_promedio)
+                promedio_venta = resultado_promedio[0][0] if resultado_promedio[0][0] else 0
+
+                return {
+                    'ingresos_mes': ingresos_mes,
+                    'cuentas_cobrar': cuentas_cobrar,
+                    'promedio_venta': promedio_venta
+                }
 
         except Exception as e:
             print(f"Error al obtener resumen financiero: {str(e)}")
@@ -434,60 +455,65 @@ class ReporteController:
             print(f"Error al obtener cuentas por cobrar: {str(e)}")
             return []
 
+    # Listado de ventas con cliente y cantidad de productos
+    # (el conteo por subconsulta evita GROUP BY, así el filtro y el orden usan índices)
+    QUERY_LISTADO_VENTAS = """
+        SELECT v.numero_recibo, v.fecha_venta, c.nombre, c.apellido,
+               (SELECT COUNT(*) FROM detalle_ventas dv WHERE dv.venta_id = v.id) as cantidad_productos,
+               v.total
+        FROM ventas v
+        LEFT JOIN clientes c ON v.cliente_id = c.id
+    """
+
     def obtener_ventas_por_rango_fecha(self, fecha_inicio, fecha_fin):
         """Obtener ventas en un rango de fechas"""
         try:
-            query = """
-                SELECT v.numero_recibo, v.fecha_venta, c.nombre, c.apellido,
-                       COUNT(dv.id) as cantidad_productos, v.total
-                FROM ventas v
-                LEFT JOIN clientes c ON v.cliente_id = c.id
-                LEFT JOIN detalle_ventas dv ON v.id = dv.venta_id
-                WHERE DATE(v.fecha_venta) BETWEEN ? AND ?
-                GROUP BY v.id
-                ORDER BY v.fecha_venta DESC
-            """
-
-            resultados = self.db.ejecutar_consulta(query, (fecha_inicio, fecha_fin))
-            return resultados or []
+            return list(self.iterar_ventas_por_rango_fecha(fecha_inicio, fecha_fin))
 
         except Exception as e:
             print(f"Error al obtener ventas por rango: {str(e)}")
             return []
 
+    def iterar_ventas_por_rango_fecha(self, fecha_inicio, fecha_fin, tamano_bloque=500):
+        """Recorrer las ventas de un rango de fechas sin cargarlas completas en memoria"""
+        query = self.QUERY_LISTADO_VENTAS + """
+            WHERE v.fecha_dia >= ? AND v.fecha_dia < ?
+            ORDER BY v.fecha_venta DESC
+        """
+        db = self.db_para_rango(fecha_inicio)
+        return db.consultar_iterador(query, rango_semiabierto(fecha_inicio, fecha_fin), tamano_bloque)
+
     def obtener_ventas_recientes(self, limite=50):
         """Obtener ventas recientes"""
         try:
-            query = """
-                SELECT v.numero_recibo, v.fecha_venta, c.nombre, c.apellido,
-                       COUNT(dv.id) as cantidad_productos, v.total
-                FROM ventas v
-                LEFT JOIN clientes c ON v.cliente_id = c.id
-                LEFT JOIN detalle_ventas dv ON v.id = dv.venta_id
-                GROUP BY v.id
-                ORDER BY v.fecha_venta DESC
-                LIMIT ?
-            """
-
-            resultados = self.db.ejecutar_consulta(query, (limite,))
-            return resultados or []
+            return list(self.iterar_ventas_recientes(limite))
 
         except Exception as e:
             print(f"Error al obtener ventas recientes: {str(e)}")
             return []
 
+    def iterar_ventas_recientes(self, limite=None, tamano_bloque=500):
+        """Recorrer las ventas más recientes primero (todas si limite es None)"""
+        query = self.QUERY_LISTADO_VENTAS + """
+            ORDER BY v.fecha_venta DESC
+            LIMIT ?
+        """
+        return self.db.consultar_iterador(query, (limite if limite else -1,), tamano_bloque)
+
     def generar_reporte_completo(self):
         """Generar reporte completo del negocio"""
         try:
-            reporte = {
-                'fecha_generacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'resumen_general': self.obtener_resumen_general(),
-                'productos_mas_vendidos': self.obtener_productos_mas_vendidos(5),
-                'mejores_clientes': self.obtener_mejores_clientes(5),
-                'inventario_critico': self.obtener_inventario_critico(),
-                'analisis_categorias': self.obtener_analisis_categorias(),
-                'ventas_ultimos_30_dias': self.obtener_ventas_por_periodo(30)
-            }
+            # Una sola instantánea para que todas las cifras sean coherentes entre sí
+            with self.db.instantanea():
+                reporte = {
+                    'fecha_generacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'resumen_general': self.obtener_resumen_general(),
+                    'productos_mas_vendidos': self.obtener_productos_mas_vendidos(5),
+                    'mejores_clientes': self.obtener_mejores_clientes(5),
+                    'inventario_critico': self.obtener_inventario_critico(),
+                    'analisis_categorias': self.obtener_analisis_categorias(),
+                    'ventas_ultimos_30_dias': self.obtener_ventas_por_periodo(30)
+                }
 
             return reporte
 
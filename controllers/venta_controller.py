@@ -4,8 +4,10 @@ Controlador para la lógica de negocio de ventas
 from models.venta import Venta, DetalleVenta
 from models.producto import Producto
 from models.cliente import Cliente
+from config.secuencias import AsignadorNumeros
 from tkinter import messagebox
 from datetime import datetime, timedelta
+from utils.herlpers import rango_semiabierto
 
 class VentaController:
     def __init__(self):
@@ -13,35 +15,22 @@ class VentaController:
         pass
 
     def generar_numero_recibo(self):
-        """Generar número de recibo automático basado en la fecha y cantidad de ventas"""
+        """
+        Número de recibo que recibirá la próxima venta (REC-YYYYMMDD-XXXX), para mostrar.
+        El número definitivo se asigna de la secuencia al guardar la venta
+        """
         try:
-            from config.database import obtener_conexion
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-
-            # Obtener el último ID de venta
-            cursor.execute("SELECT MAX(id) FROM ventas")
-            resultado = cursor.fetchone()
-            ultimo_id = resultado[0] if resultado[0] else 0
-
-            conn.close()
-
-            # Generar número de recibo: formato REC-YYYYMMDD-XXXX
-            fecha_actual = datetime.now().strftime("%Y%m%d")
-            numero_secuencial = str(ultimo_id + 1).zfill(4)
-            numero_recibo = f"REC-{fecha_actual}-{numero_secuencial}"
-
-            return numero_recibo
+            return AsignadorNumeros.obtener().vista_previa(Venta.PREFIJO_RECIBO)
 
         except Exception as e:
             print(f"Error al generar número de recibo: {str(e)}")
-            # Generar un número básico en caso de error
-            return f"REC-{datetime.now().strftime('%Y%m%d')}-0001"
+            return ""
     
     def crear_venta(self, cliente_id, detalles_venta, observaciones="", numero_recibo=""):
         """
         Crear una nueva venta
         detalles_venta: lista de diccionarios con producto_id, cantidad, precio_unitario
+        numero_recibo: si se omite, se asigna de la secuencia de recibos al guardar
         """
         try:
             # Validar datos
@@ -61,13 +50,19 @@ class VentaController:
                     precio_unitario=detalle['precio_unitario']
                 )
             
-            # Guardar en la base de datos
-            if venta.guardar():
-                if cliente_id:
-                    from controllers.cuenta_controller import CuentaController
-                    cuenta_controller = CuentaController()
-                    cuenta_controller.agregar_venta_a_cuenta(cliente_id, venta.total, "Venta", venta.id)
-                messagebox.showinfo("Éxito", f"Venta registrada correctamente\nTotal: ${venta.total:,.0f}")
+            # Guardar la venta y el cargo en cuenta corriente en una sola transacción
+            guardada = False
+            with venta.db.transaccion():
+                if venta.guardar():
+                    if cliente_id:
+                        from controllers.cuenta_controller import CuentaController
+                        cuenta_controller = CuentaController()
+                        if not cuenta_controller.agregar_venta_a_cuenta(cliente_id, venta.total, "Venta", venta.id):
+                            raise Exception("No se pudo registrar el cargo en la cuenta corriente")
+                    guardada = True
+
+            if guardada:
+                messagebox.showinfo("Éxito", f"Venta registrada correctamente\nRecibo: {venta.numero_recibo}\nTotal: ${venta.total:,.0f}")
                 return True
             else:
                 messagebox.showerror("Error", "No se pudo guardar la venta")
@@ -161,11 +156,11 @@ class VentaController:
             hoy = datetime.now().strftime('%Y-%m-%d')
             print(f"DEBUG: Consultando ventas para la fecha: {hoy}")
 
-            # Consulta directa para ventas de hoy
+            # Las cifras salen del resumen diario (una fila por día, mantenida por triggers)
             query_hoy = """
-                SELECT COUNT(*) as cantidad, COALESCE(SUM(total), 0) as total
-                FROM ventas
-                WHERE DATE(fecha_venta) = ?
+                SELECT COALESCE(SUM(ventas), 0) as cantidad, COALESCE(SUM(total), 0) as total
+                FROM ventas_resumen_diario
+                WHERE dia = ?
             """
             resultado_hoy = db.ejecutar_consulta(query_hoy, (hoy,))
             print(f"DEBUG: Resultado ventas hoy: {resultado_hoy}")
@@ -177,8 +172,8 @@ class VentaController:
 
             # Estadísticas generales
             query_total = """
-                SELECT COUNT(*) as cantidad, COALESCE(SUM(total), 0) as total
-                FROM ventas
+                SELECT COALESCE(SUM(ventas), 0) as cantidad, COALESCE(SUM(total), 0) as total
+                FROM ventas_resumen_diario
             """
             resultado_total = db.ejecutar_consulta(query_total)
             total_ventas = resultado_total[0][0] if resultado_total and resultado_total[0] else 0
@@ -188,10 +183,10 @@ class VentaController:
             primer_dia_mes = datetime.now().replace(day=1).strftime('%Y-%m-%d')
             query_mes = """
                 SELECT COALESCE(SUM(total), 0)
-                FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ?
+                FROM ventas_resumen_diario
+                WHERE dia >= ? AND dia < ?
             """
-            resultado_mes = db.ejecutar_consulta(query_mes, (primer_dia_mes, hoy))
+            resultado_mes = db.ejecutar_consulta(query_mes, rango_semiabierto(primer_dia_mes, hoy))
             ingresos_mes = resultado_mes[0][0] if resultado_mes and resultado_mes[0] else 0
 
             return {
@@ -1,9 +1,21 @@
 """
 Modelo para gestión de clientes
 """
+import re
 from config.database import DatabaseManager
+from config.mapeo import Mapeador, ModeloPersistente
+from config.cache_filas import CacheFilas
+from utils.herlpers import expresion_busqueda_fts, digitos_invertidos
+
+class Cliente(ModeloPersistente):
+    __slots__ = ('id', 'nombre', 'apellido', 'telefono', 'email', 'direccion', 'ciudad', 'activo')
+
+    QUERY_INSERTAR = '''
+        INSERT INTO clientes
+        (nombre, apellido, telefono, email, direccion, ciudad)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
 
-class Cliente:
     def __init__(self, nombre="", apellido="", telefono="", email="", 
                  direccion="", ciudad=""):
         self.id = None
@@ -14,24 +26,15 @@ class Cliente:
         self.direccion = direccion
         self.ciudad = ciudad
         self.activo = True
-        self.db = DatabaseManager()
     
     def guardar(self):
         """Guardar cliente en la base de datos con validación"""
         try:
-            query = '''
-                INSERT INTO clientes 
-                (nombre, apellido, telefono, email, direccion, ciudad)
-                VALUES (?, ?, ?, ?, ?, ?)
-            '''
-            parametros = (
-                self.nombre, self.apellido, self.telefono,
-                self.email, self.direccion, self.ciudad
-            )
+            parametros = self.parametros_insercion()
         
             print(f"MODEL DEBUG: Ejecutando query con parámetros: {parametros}")
         
-            resultado = self.db.ejecutar_consulta(query, parametros)
+            resultado = self.db.ejecutar_consulta(Cliente.QUERY_INSERTAR, parametros)
         
             if resultado is not None:
                 print("MODEL DEBUG: Cliente guardado exitosamente")
@@ -44,6 +47,29 @@ class Cliente:
             print(f"MODEL ERROR: {str(e)}")
             return False
     
+    def parametros_insercion(self):
+        """Parámetros para QUERY_INSERTAR en el orden de sus columnas"""
+        return (
+            self.nombre, self.apellido, self.telefono,
+            self.email, self.direccion, self.ciudad
+        )
+
+    @staticmethod
+    def guardar_lote(clientes, tamano_lote=500, progreso=None):
+        """
+        Guardar muchos clientes nuevos en una sola transacción
+        progreso: función opcional que recibe la cantidad de filas procesadas
+        Retorna la cantidad de clientes insertados, o None si hubo error.
+        Sus cuentas corrientes se crean después, todas juntas, con
+        CuentaCorriente.crear_cuentas_faltantes
+        """
+        db = DatabaseManager()
+        return db.ejecutar_lote(
+            Cliente.QUERY_INSERTAR,
+            (cliente.parametros_insercion() for cliente in clientes),
+            tamano_lote, progreso
+        )
+    
     def actualizar(self):
         """Actualizar cliente existente"""
         if not self.id:
@@ -68,25 +94,26 @@ class Cliente:
         try:
             # Eliminar registros relacionados primero
         
-            # 1. Actualizar ventas para quitar referencia al cliente
-            query_ventas = "UPDATE ventas SET cliente_id = NULL WHERE cliente_id = ?"
-            self.db.ejecutar_consulta(query_ventas, (self.id,))
+            with self.db.transaccion():
+                # 1. Actualizar ventas para quitar referencia al cliente
+                query_ventas = "UPDATE ventas SET cliente_id = NULL WHERE cliente_id = ?"
+                self.db.ejecutar_consulta(query_ventas, (self.id,))
         
-            # 2. Eliminar cuenta corriente
-            query_cuenta = "DELETE FROM cuentas_corrientes WHERE cliente_id = ?"
-            self.db.ejecutar_consulta(query_cuenta, (self.id,))
+                # 2. Eliminar cuenta corriente
+                query_cuenta = "DELETE FROM cuentas_corrientes WHERE cliente_id = ?"
+                self.db.ejecutar_consulta(query_cuenta, (self.id,))
         
-            # 3. Eliminar movimientos de cuenta
-            query_movimientos = "DELETE FROM movimientos_cuenta WHERE cliente_id = ?"
-            self.db.ejecutar_consulta(query_movimientos, (self.id,))
+                # 3. Eliminar movimientos de cuenta
+                query_movimientos = "DELETE FROM movimientos_cuenta WHERE cliente_id = ?"
+                self.db.ejecutar_consulta(query_movimientos, (self.id,))
         
-            # 4. Eliminar abonos
-            query_abonos = "DELETE FROM abonos WHERE cliente_id = ?"
-            self.db.ejecutar_consulta(query_abonos, (self.id,))
+                # 4. Eliminar abonos
+                query_abonos = "DELETE FROM abonos WHERE cliente_id = ?"
+                self.db.ejecutar_consulta(query_abonos, (self.id,))
         
-            # 5. Finalmente eliminar el cliente
-            query_cliente = "DELETE FROM clientes WHERE id = ?"
-            resultado = self.db.ejecutar_consulta(query_cliente, (self.id,))
+                # 5. Finalmente eliminar el cliente
+                query_cliente = "DELETE FROM clientes WHERE id = ?"
+                resultado = self.db.ejecutar_consulta(query_cliente, (self.id,))
         
             return resultado is not None
         
@@ -96,74 +123,102 @@ class Cliente:
     
     @staticmethod
     def obtener_todos():
-        """Obtener todos los clientes activos"""
+        """
+        Obtener todos los clientes activos.
+        Desde el directorio en memoria se entrega su tupla compartida, sin
+        copiar: los objetos son de solo lectura, para modificar uno usar
+        buscar_por_id
+        """
         db = DatabaseManager()
-        query = "SELECT * FROM clientes WHERE activo=1 ORDER BY nombre, apellido"
-        resultados = db.ejecutar_consulta(query)
-        
-        clientes = []
-        if resultados:
-            for fila in resultados:
-                cliente = Cliente()
-                cliente.id = fila[0]
-                cliente.nombre = fila[1]
-                cliente.apellido = fila[2]
-                cliente.telefono = fila[3]
-                cliente.email = fila[4]
-                cliente.direccion = fila[5]
-                cliente.ciudad = fila[6]
-                clientes.append(cliente)
-        
-        return clientes
+        directorio = DirectorioClientes.obtener(db.db_name).consultar(db)
+        if directorio is not None:
+            return directorio.todos()
+        return MAPEO_CLIENTE.obtener(db, "activo=1", orden="nombre, apellido")
     
     @staticmethod
     def buscar_por_id(cliente_id):
-        """Buscar cliente por ID"""
+        """Buscar cliente por ID (copia propia, se puede modificar y actualizar)"""
         db = DatabaseManager()
-        query = "SELECT * FROM clientes WHERE id=? AND activo=1"
-        resultado = db.ejecutar_consulta(query, (cliente_id,))
-        
-        if resultado and len(resultado) > 0:
-            fila = resultado[0]
-            cliente = Cliente()
-            cliente.id = fila[0]
-            cliente.nombre = fila[1]
-            cliente.apellido = fila[2]
-            cliente.telefono = fila[3]
-            cliente.email = fila[4]
-            cliente.direccion = fila[5]
-            cliente.ciudad = fila[6]
-            return cliente
-        
-        return None
+        directorio = DirectorioClientes.obtener(db.db_name).consultar(db)
+        if directorio is not None:
+            return directorio.obtener_copia(cliente_id)
+        return MAPEO_CLIENTE.obtener_uno(db, "id=? AND activo=1", (cliente_id,))
+
+    @staticmethod
+    def buscar_en_directorio(indice, valor):
+        """
+        Clientes activos cuyo teléfono (solo dígitos), email (sin distinguir
+        mayúsculas) o nombre completo coincide exactamente con el valor.
+        indice: 'telefono', 'email' o 'nombre_completo'
+        """
+        db = DatabaseManager()
+        directorio = DirectorioClientes.obtener(db.db_name).consultar(db)
+        clave = DirectorioClientes.CLAVES[indice](valor)
+        if directorio is not None:
+            return directorio.buscar(indice, clave)
+        return [c for c in MAPEO_CLIENTE.obtener(db, "activo=1", orden="nombre, apellido")
+                if DirectorioClientes.INDICES[indice](c) == clave]
     
     @staticmethod
     def buscar_por_nombre(termino):
         """Buscar clientes por nombre o apellido"""
-        db = DatabaseManager()
-        query = '''
-            SELECT * FROM clientes 
-            WHERE (nombre LIKE ? OR apellido LIKE ?) AND activo=1
-            ORDER BY nombre, apellido
+        return Cliente.buscar_texto(termino, columnas=("nombre", "apellido"))
+
+    @staticmethod
+    def buscar_texto(termino, columnas=None, limite=200):
+        """
+        Buscar clientes activos en nombre, apellido y email usando el
+        índice clientes_fts, ordenados por relevancia (bm25)
+        columnas: limita la búsqueda a algunas columnas del índice
+        """
+        expresion = expresion_busqueda_fts(termino, columnas)
+        if not expresion:
+            return []
+
+        query = f'''
+            SELECT {MAPEO_CLIENTE.proyeccion}
+            FROM clientes
+            JOIN (SELECT rowid AS fts_id, {RANGO_BUSQUEDA} AS fts_rango
+                  FROM clientes_fts WHERE clientes_fts MATCH ?) coincidencias
+              ON coincidencias.fts_id = clientes.id
+            WHERE activo=1
+            ORDER BY coincidencias.fts_rango, nombre, apellido
+            LIMIT ?
         '''
-        termino_busqueda = f"%{termino}%"
-        resultados = db.ejecutar_consulta(query, (termino_busqueda, termino_busqueda))
-        
-        clientes = []
-        if resultados:
-            for fila in resultados:
-                cliente = Cliente()
-                cliente.id = fila[0]
-                cliente.nombre = fila[1]
-                cliente.apellido = fila[2]
-                cliente.telefono = fila[3]
-                cliente.email = fila[4]
-                cliente.direccion = fila[5]
-                cliente.ciudad = fila[6]
-                clientes.append(cliente)
-        
-        return clientes
-    
+        return DatabaseManager().ejecutar_consulta(
+            query, (expresion, limite), fabrica_filas=MAPEO_CLIENTE.fabrica_filas) or []
+
+    @staticmethod
+    def buscar_por_telefono(digitos, limite=200):
+        """
+        Buscar clientes activos cuyo teléfono termina en los dígitos dados
+        (sin importar espacios, guiones ni prefijo). Usa el índice sobre
+        telefono_invertido: la terminación invertida es un prefijo
+        """
+        invertidos = digitos_invertidos(digitos)
+        if not invertidos:
+            return []
+        # ':' es el carácter siguiente a '9': [invertidos, invertidos + ':') cubre todas las extensiones
+        # +activo evita que el planificador prefiera idx_clientes_activo_nombre por el ORDER BY
+        # y recorra todos los clientes recalculando la columna generada
+        query = MAPEO_CLIENTE.consulta(
+            "telefono_invertido >= ? AND telefono_invertido < ? AND +activo=1", "nombre, apellido"
+        ) + " LIMIT ?"
+        return DatabaseManager().ejecutar_consulta(
+            query, (invertidos, invertidos + ":", limite), fabrica_filas=MAPEO_CLIENTE.fabrica_filas) or []
+
+    @staticmethod
+    def buscar(termino, limite=200):
+        """
+        Buscar clientes por lo que escribe el usuario: si son solo dígitos
+        (con separadores de teléfono) busca por terminación del teléfono,
+        si no, por nombre, apellido y email
+        """
+        termino = (termino or "").strip()
+        if MINIMO_DIGITOS_TELEFONO <= len(digitos_invertidos(termino)) and SOLO_TELEFONO.match(termino):
+            return Cliente.buscar_por_telefono(termino, limite)
+        return Cliente.buscar_texto(termino, limite=limite)
+
     def nombre_completo(self):
         """Obtener nombre completo del cliente"""
         return f"{self.nombre} {self.apellido}".strip()
@@ -200,4 +255,38 @@ class Cliente:
     
     def __str__(self):
         """Representación en string del cliente"""
-        return f"{self.nombre_completo()} - {self.telefono}"
\ No newline at end of file
+        return f"{self.nombre_completo()} - {self.telefono}"
+
+
+# Proyección única de la tabla clientes
+MAPEO_CLIENTE = Mapeador(Cliente, "clientes", (
+    'id', 'nombre', 'apellido', 'telefono', 'email', 'direccion', 'ciudad', 'activo'
+))
+
+# Relevancia de la búsqueda: pesos bm25 de (nombre, apellido, email) en clientes_fts
+RANGO_BUSQUEDA = "bm25(clientes_fts, 4.0, 4.0, 1.0)"
+
+# Un término con solo dígitos y separadores se toma como teléfono desde 3 dígitos
+SOLO_TELEFONO = re.compile(r"^[\d\s\-+().]+$")
+MINIMO_DIGITOS_TELEFONO = 3
+
+
+class DirectorioClientes(CacheFilas):
+    """Clientes activos en memoria, con índices por teléfono, email y nombre completo"""
+    MAPEO = MAPEO_CLIENTE
+
+    # Forma de comparar cada dato: la clave de un valor buscado y la de un cliente coinciden
+    CLAVES = {
+        'telefono': lambda telefono: re.sub(r"\D", "", telefono or ""),
+        'email': lambda email: (email or "").strip().lower(),
+        'nombre_completo': lambda nombre: " ".join((nombre or "").split()).lower(),
+    }
+    INDICES = {
+        'telefono': lambda cliente: DirectorioClientes.CLAVES['telefono'](cliente.telefono),
+        'email': lambda cliente: DirectorioClientes.CLAVES['email'](cliente.email),
+        'nombre_completo': lambda cliente: DirectorioClientes.CLAVES['nombre_completo'](cliente.nombre_completo()),
+    }
+
+    @staticmethod
+    def clave_orden(cliente):
+        return (cliente.nombre or "", cliente.apellido or "")
@@ -2,9 +2,13 @@
 Modelo para gestión de cuentas corrientes
 """
 from config.database import DatabaseManager
+from config.secuencias import AsignadorNumeros
 from datetime import datetime
 
 class CuentaCorriente:
+    # Prefijo de los números de recibo de abono (ABO-AAAAMMDD-NNNN)
+    PREFIJO_RECIBO_ABONO = "ABO"
+
     def __init__(self, cliente_id=None):
         self.id = None
         self.cliente_id = cliente_id
@@ -26,24 +30,25 @@ class CuentaCorriente:
     def agregar_deuda(self, monto, descripcion="Venta", venta_id=None):
         """Agregar deuda por una venta"""
         try:
-            # Actualizar cuenta corriente
-            query_update = '''
-                UPDATE cuentas_corrientes 
-                SET saldo_total = saldo_total + ?,
-                    saldo_pendiente = saldo_pendiente + ?,
-                    fecha_ultima_actualizacion = CURRENT_TIMESTAMP
-                WHERE cliente_id = ?
-            '''
-            self.db.ejecutar_consulta(query_update, (monto, monto, self.cliente_id))
+            with self.db.transaccion():
+                # Actualizar cuenta corriente
+                query_update = '''
+                    UPDATE cuentas_corrientes 
+                    SET saldo_total = saldo_total + ?,
+                        saldo_pendiente = saldo_pendiente + ?,
+                        fecha_ultima_actualizacion = CURRENT_TIMESTAMP
+                    WHERE cliente_id = ?
+                '''
+                self.db.ejecutar_consulta(query_update, (monto, monto, self.cliente_id))
             
-            # Registrar movimiento
-            query_movimiento = '''
-                INSERT INTO movimientos_cuenta 
-                (cliente_id, tipo_movimiento, monto, descripcion, venta_id)
-                VALUES (?, 'CARGO', ?, ?, ?)
-            '''
-            self.db.ejecutar_consulta(query_movimiento, 
-                                    (self.cliente_id, monto, descripcion, venta_id))
+                # Registrar movimiento
+                query_movimiento = '''
+                    INSERT INTO movimientos_cuenta 
+                    (cliente_id, tipo_movimiento, monto, descripcion, venta_id)
+                    VALUES (?, 'CARGO', ?, ?, ?)
+                '''
+                self.db.ejecutar_consulta(query_movimiento, 
+                                        (self.cliente_id, monto, descripcion, venta_id))
             
             return True
         except Exception as e:
@@ -53,43 +58,49 @@ class CuentaCorriente:
     def registrar_abono(self, monto, metodo_pago="Efectivo", descripcion="", recibo_numero=""):
         """Registrar un abono/pago"""
         try:
-            # Validar que no se abone más de lo que debe
-            cuenta_actual = self.obtener_cuenta()
-            if not cuenta_actual:
-                return False, "Cuenta no encontrada"
+            with self.db.transaccion():
+                # Validar que no se abone más de lo que debe (dentro del bloqueo de escritura)
+                cuenta_actual = self.obtener_cuenta()
+                if not cuenta_actual:
+                    return False, "Cuenta no encontrada"
             
-            if monto > cuenta_actual['saldo_pendiente']:
-                return False, f"El abono (${monto:,.0f}) es mayor al saldo pendiente (${cuenta_actual['saldo_pendiente']:,.0f})"
+                if monto > cuenta_actual['saldo_pendiente']:
+                    return False, f"El abono (${monto:,.0f}) es mayor al saldo pendiente (${cuenta_actual['saldo_pendiente']:,.0f})"
             
-            # Registrar abono
-            query_abono = '''
-                INSERT INTO abonos 
-                (cliente_id, monto_abono, metodo_pago, descripcion, recibo_numero)
-                VALUES (?, ?, ?, ?, ?)
-            '''
-            self.db.ejecutar_consulta(query_abono, 
-                                    (self.cliente_id, monto, metodo_pago, descripcion, recibo_numero))
+                # El número de recibo sale de la secuencia dentro de la misma transacción
+                if not recibo_numero:
+                    recibo_numero = AsignadorNumeros.obtener(self.db.db_name).siguiente(
+                        CuentaCorriente.PREFIJO_RECIBO_ABONO, self.db)
+
+                # Registrar abono
+                query_abono = '''
+                    INSERT INTO abonos 
+                    (cliente_id, monto_abono, metodo_pago, descripcion, recibo_numero)
+                    VALUES (?, ?, ?, ?, ?)
+                '''
+                self.db.ejecutar_consulta(query_abono, 
+                                        (self.cliente_id, monto, metodo_pago, descripcion, recibo_numero))
             
-            # Actualizar saldo pendiente
-            query_update = '''
-                UPDATE cuentas_corrientes 
-                SET saldo_pendiente = saldo_pendiente - ?,
-                    fecha_ultima_actualizacion = CURRENT_TIMESTAMP
-                WHERE cliente_id = ?
-            '''
-            self.db.ejecutar_consulta(query_update, (monto, self.cliente_id))
+                # Actualizar saldo pendiente
+                query_update = '''
+                    UPDATE cuentas_corrientes 
+                    SET saldo_pendiente = saldo_pendiente - ?,
+                        fecha_ultima_actualizacion = CURRENT_TIMESTAMP
+                    WHERE cliente_id = ?
+                '''
+                self.db.ejecutar_consulta(query_update, (monto, self.cliente_id))
             
-            # Registrar movimiento
-            query_movimiento = '''
-                INSERT INTO movimientos_cuenta 
-                (cliente_id, tipo_movimiento, monto, descripcion)
-                VALUES (?, 'ABONO', ?, ?)
-            '''
-            descripcion_mov = f"Abono {metodo_pago}" + (f" - {descripcion}" if descripcion else "")
-            self.db.ejecutar_consulta(query_movimiento, 
-                                    (self.cliente_id, monto, descripcion_mov))
+                # Registrar movimiento
+                query_movimiento = '''
+                    INSERT INTO movimientos_cuenta 
+                    (cliente_id, tipo_movimiento, monto, descripcion)
+                    VALUES (?, 'ABONO', ?, ?)
+                '''
+                descripcion_mov = f"Abono {metodo_pago}" + (f" - {descripcion}" if descripcion else "")
+                self.db.ejecutar_consulta(query_movimiento, 
+                                        (self.cliente_id, monto, descripcion_mov))
             
-            return True, "Abono registrado correctamente"
+            return True, f"Abono registrado correctamente\nRecibo: {recibo_numero}"
             
         except Exception as e:
             print(f"Error al registrar abono: {str(e)}")
@@ -176,39 +187,52 @@ class CuentaCorriente:
         """Crear cuenta si no existe para el cliente"""
         db = DatabaseManager()
         
-        # Verificar si ya existe
-        query_check = "SELECT id FROM cuentas_corrientes WHERE cliente_id = ?"
-        resultado = db.ejecutar_consulta(query_check, (cliente_id,))
-        
-        if not resultado:
-            # Crear nueva cuenta
-            query_create = '''
-                INSERT INTO cuentas_corrientes (cliente_id, saldo_total, saldo_pendiente)
-                VALUES (?, 0, 0)
-            '''
-            db.ejecutar_consulta(query_create, (cliente_id,))
-            return True
+        with db.transaccion():
+            # Verificar si ya existe
+            query_check = "SELECT id FROM cuentas_corrientes WHERE cliente_id = ?"
+            resultado = db.ejecutar_consulta(query_check, (cliente_id,))
+            
+            if not resultado:
+                # Crear nueva cuenta
+                query_create = '''
+                    INSERT INTO cuentas_corrientes (cliente_id, saldo_total, saldo_pendiente)
+                    VALUES (?, 0, 0)
+                '''
+                db.ejecutar_consulta(query_create, (cliente_id,))
+                return True
         return False
 
+    @staticmethod
+    def crear_cuentas_faltantes():
+        """Crear en una sola sentencia las cuentas de los clientes activos que no tengan"""
+        db = DatabaseManager()
+        query = '''
+            INSERT OR IGNORE INTO cuentas_corrientes (cliente_id, saldo_total, saldo_pendiente)
+            SELECT id, 0, 0 FROM clientes WHERE activo = 1
+        '''
+        resultado = db.ejecutar_consulta(query)
+        return resultado or 0
+
     def revertir_cargo_venta(self, monto_venta, venta_id):
         """Revertir el cargo de una venta eliminada"""
         try:
-            # Revertir saldos en cuenta corriente
-            query_update = '''
-                UPDATE cuentas_corrientes
-                SET saldo_total = saldo_total - ?,
-                    saldo_pendiente = saldo_pendiente - ?,
-                    fecha_ultima_actualizacion = CURRENT_TIMESTAMP
-                WHERE cliente_id = ?
-            '''
-            self.db.ejecutar_consulta(query_update, (monto_venta, monto_venta, self.cliente_id))
+            with self.db.transaccion():
+                # Revertir saldos en cuenta corriente
+                query_update = '''
+                    UPDATE cuentas_corrientes
+                    SET saldo_total = saldo_total - ?,
+                        saldo_pendiente = saldo_pendiente - ?,
+                        fecha_ultima_actualizacion = CURRENT_TIMESTAMP
+                    WHERE cliente_id = ?
+                '''
+                self.db.ejecutar_consulta(query_update, (monto_venta, monto_venta, self.cliente_id))
 
-            # Eliminar movimiento asociado a la venta
-            query_delete_mov = '''
-                DELETE FROM movimientos_cuenta
-                WHERE cliente_id = ? AND venta_id = ?
-            '''
-            self.db.ejecutar_consulta(query_delete_mov, (self.cliente_id, venta_id))
+                # Eliminar movimiento asociado a la venta
+                query_delete_mov = '''
+                    DELETE FROM movimientos_cuenta
+                    WHERE cliente_id = ? AND venta_id = ?
+                '''
+                self.db.ejecutar_consulta(query_delete_mov, (self.cliente_id, venta_id))
 
             return True
 
@@ -219,9 +243,11 @@ class CuentaCorriente:
     def eliminar_cuenta_vacia(self):
         """Eliminar cuenta corriente si tiene saldo cero"""
         try:
-            # Verificar que realmente tenga saldo cero
-            cuenta_info = self.obtener_cuenta()
-            if cuenta_info and cuenta_info['saldo_pendiente'] == 0 and cuenta_info['saldo_total'] == 0:
+            with self.db.transaccion():
+                # Verificar que realmente tenga saldo cero
+                cuenta_info = self.obtener_cuenta()
+                if not (cuenta_info and cuenta_info['saldo_pendiente'] == 0 and cuenta_info['saldo_total'] == 0):
+                    return False
 
                 # Eliminar movimientos históricos
                 query_movimientos = "DELETE FROM movimientos_cuenta WHERE cliente_id = ?"
@@ -235,10 +261,8 @@ class CuentaCorriente:
                 query_cuenta = "DELETE FROM cuentas_corrientes WHERE cliente_id = ?"
                 self.db.ejecutar_consulta(query_cuenta, (self.cliente_id,))
 
-                print(f"DEBUG: Cuenta corriente del cliente {self.cliente_id} eliminada completamente")
-                return True
-
-            return False
+            print(f"DEBUG: Cuenta corriente del cliente {self.cliente_id} eliminada completamente")
+            return True
 
         except Exception as e:
             print(f"Error al eliminar cuenta vacía: {str(e)}")
@@ -1,11 +1,27 @@
 """
 Modelo para gestión de productos
 """
-import random
-import string
+import sqlite3
 from config.database import DatabaseManager
+from config.mapeo import Mapeador, ModeloPersistente
+from config.secuencias import AsignadorSku
+from config.cache_filas import CacheFilas
+from utils.herlpers import (expresion_busqueda_fts, normalizar_texto, palabras_normalizadas,
+                            trigramas, similitud_trigramas)
+
+class Producto(ModeloPersistente):
+    __slots__ = ('id', 'nombre', 'descripcion', 'precio_compra', 'precio_venta', 'stock',
+                 'stock_minimo', 'categoria', 'marca', 'tipo', 'proveedor', 'sku', 'activo')
+
+    QUERY_INSERTAR = '''
+        INSERT INTO productos
+        (nombre, descripcion, precio_compra, precio_venta, stock, stock_minimo, categoria, marca, tipo, proveedor, sku)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+    # +activo: buscar los SKU vacíos en idx_productos_sku en vez de recorrer los activos
+    QUERY_SIN_SKU = "SELECT id, marca FROM productos WHERE (sku IS NULL OR sku = '') AND +activo = 1"
 
-class Producto:
     def __init__(self, nombre="", descripcion="", precio_compra=0.0,
                  precio_venta=0.0, stock=0, stock_minimo=5, categoria="",
                  marca="", tipo="", proveedor="", sku=""):
@@ -22,85 +38,158 @@ class Producto:
         self.proveedor = proveedor
         self.sku = sku
         self.activo = True
-        self.db = DatabaseManager()
 
     def generar_sku_unico(self):
-        """Generar SKU único basado en marca + 3 números aleatorios"""
-        if not self.marca:
-            prefijo = "GEN"  # Prefijo genérico si no hay marca
-        else:
-            # Tomar las primeras 3 letras de la marca y convertir a mayúsculas
-            prefijo = self.marca[:3].upper().replace(" ", "")
-            # Si la marca es muy corta, rellenar con X
-            while len(prefijo) < 3:
-                prefijo += "X"
-
-        # Generar SKU único verificando que no exista
-        max_intentos = 100
-        for _ in range(max_intentos):
-            # Generar 3 números aleatorios
-            numeros = ''.join([str(random.randint(0, 9)) for _ in range(3)])
-            sku_candidato = f"{prefijo}{numeros}"
-
-            # Verificar si el SKU ya existe
-            if not self.sku_existe(sku_candidato):
-                return sku_candidato
-
-        # Si después de 100 intentos no encontramos uno único, agregar letras adicionales
-        letras = ''.join(random.choices(string.ascii_uppercase, k=2))
-        numeros = ''.join([str(random.randint(0, 9)) for _ in range(3)])
-        return f"{prefijo}{numeros}{letras}"
+        """
+        Generar SKU único basado en marca + 3 números.
+        El asignador conoce en memoria los sufijos usados de cada marca,
+        así no se consulta la base por cada candidato
+        """
+        return AsignadorSku.obtener(self.db.db_name).siguiente(self.marca, self.db)
 
     def sku_existe(self, sku):
         """Verificar si un SKU ya existe en la base de datos"""
+        catalogo = CatalogoProductos.obtener(self.db.db_name).consultar(self.db)
+        if catalogo is not None:
+            return bool(catalogo.buscar('sku', sku))
         query = "SELECT COUNT(*) FROM productos WHERE sku = ? AND activo = 1"
         resultado = self.db.ejecutar_consulta(query, (sku,))
         return resultado and resultado[0][0] > 0
 
+    def _escribir_con_sku_generado(self, query, parametros):
+        """
+        Generar el SKU y ejecutar la escritura; si otra terminal guardó el
+        mismo SKU primero, el asignador reintenta con otro.
+        parametros: función que arma los parámetros con el SKU ya asignado
+        Retorna lo mismo que ejecutar_consulta (None si hubo error)
+        """
+        resultados = []
+
+        def escribir(skus):
+            self.sku = skus[0]
+            resultados.append(self.db.ejecutar_consulta(query, parametros()))
+
+        try:
+            AsignadorSku.obtener(self.db.db_name).escribir_con_skus([self.marca], escribir, self.db)
+        except sqlite3.Error:
+            self.sku = ""
+            return None
+        return resultados[-1]
+
     def guardar(self):
         """Guardar producto en la base de datos"""
-        # Generar SKU automáticamente si no se ha asignado uno
-        if not self.sku:
-            self.sku = self.generar_sku_unico()
+        if self.sku:
+            resultado = self.db.ejecutar_consulta(Producto.QUERY_INSERTAR, self.parametros_insercion())
+        else:
+            # Generar SKU automáticamente si no se ha asignado uno
+            resultado = self._escribir_con_sku_generado(Producto.QUERY_INSERTAR, self.parametros_insercion)
+        if resultado is not None:
+            AsignadorSku.obtener(self.db.db_name).marcar(self.sku)
+            print(f"DEBUG: Producto guardado con SKU: {self.sku}")
+        return resultado is not None
 
-        query = '''
-            INSERT INTO productos
-            (nombre, descripcion, precio_compra, precio_venta, stock, stock_minimo, categoria, marca, tipo, proveedor, sku)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        '''
-        parametros = (
+    def parametros_insercion(self):
+        """Parámetros para QUERY_INSERTAR en el orden de sus columnas"""
+        return (
             self.nombre, self.descripcion, self.precio_compra,
             self.precio_venta, self.stock, self.stock_minimo, self.categoria,
             self.marca, self.tipo, self.proveedor, self.sku
         )
 
-        resultado = self.db.ejecutar_consulta(query, parametros)
-        if resultado is not None:
-            print(f"DEBUG: Producto guardado con SKU: {self.sku}")
-        return resultado is not None
+    @staticmethod
+    def guardar_lote(productos, tamano_lote=500, progreso=None):
+        """
+        Guardar muchos productos nuevos en una sola transacción
+        progreso: función opcional que recibe la cantidad de filas procesadas
+        Retorna la cantidad de productos insertados, o None si hubo error
+        """
+        db = DatabaseManager()
+        asignador = AsignadorSku.obtener(db.db_name)
+
+        # Generar los SKU faltantes de una vez, sin repetir los que trae el lote
+        productos = list(productos)
+        provistos = {producto.sku for producto in productos if producto.sku}
+        faltantes = [producto for producto in productos if not producto.sku]
+        insertados = []
+
+        def escribir(skus):
+            for producto, sku in zip(faltantes, skus):
+                while sku in provistos:
+                    sku = asignador.siguiente(producto.marca, db)
+                producto.sku = sku
+            insertados.append(db.ejecutar_lote(
+                Producto.QUERY_INSERTAR,
+                (producto.parametros_insercion() for producto in productos),
+                tamano_lote, progreso
+            ))
+
+        try:
+            asignador.escribir_con_skus([producto.marca for producto in faltantes], escribir, db)
+        except sqlite3.Error:
+            for producto in faltantes:
+                producto.sku = ""
+            return None
+        for sku in provistos:
+            asignador.marcar(sku)
+        return insertados[-1]
     
+    @staticmethod
+    def completar_skus_faltantes(tamano_lote=500, progreso=None):
+        """
+        Asignar SKU a todos los productos activos que no lo tienen.
+        Los SKU se calculan en memoria (una lectura por marca) y se escriben
+        con executemany en una sola transacción.
+        progreso: función opcional que recibe (procesados, total)
+        Retorna la cantidad de productos actualizados, o None si hubo error
+        """
+        db = DatabaseManager()
+        faltantes = db.ejecutar_consulta(Producto.QUERY_SIN_SKU)
+        if faltantes is None:
+            return None
+        if not faltantes:
+            return 0
+
+        total = len(faltantes)
+        actualizados = []
+
+        def escribir(skus):
+            actualizados.append(db.ejecutar_lote(
+                "UPDATE productos SET sku = ? WHERE id = ?",
+                [(sku, producto_id) for (producto_id, _), sku in zip(faltantes, skus)],
+                tamano_lote,
+                (lambda procesados: progreso(procesados, total)) if progreso else None
+            ))
+
+        try:
+            AsignadorSku.obtener(db.db_name).escribir_con_skus([marca for _, marca in faltantes], escribir, db)
+        except sqlite3.Error:
+            return None
+        return actualizados[-1]
+
     def actualizar(self):
         """Actualizar producto existente"""
         if not self.id:
             return False
 
-        # Si no tiene SKU, generar uno nuevo
-        if not self.sku:
-            self.sku = self.generar_sku_unico()
-
         query = '''
             UPDATE productos SET
             nombre=?, descripcion=?, precio_compra=?, precio_venta=?,
             stock=?, stock_minimo=?, categoria=?, marca=?, tipo=?, proveedor=?, sku=?
             WHERE id=?
         '''
-        parametros = (
+        parametros = lambda: (
             self.nombre, self.descripcion, self.precio_compra,
             self.precio_venta, self.stock, self.stock_minimo,
             self.categoria, self.marca, self.tipo, self.proveedor, self.sku, self.id
         )
 
-        resultado = self.db.ejecutar_consulta(query, parametros)
+        if self.sku:
+            resultado = self.db.ejecutar_consulta(query, parametros())
+        else:
+            # Si no tiene SKU, generar uno nuevo
+            resultado = self._escribir_con_sku_generado(query, parametros)
+        if resultado is not None:
+            AsignadorSku.obtener(self.db.db_name).marcar(self.sku)
         return resultado is not None
     
     def eliminar(self):
@@ -114,58 +203,114 @@ class Producto:
     
     @staticmethod
     def obtener_todos():
-        """Obtener todos los productos activos ordenados alfabéticamente"""
+        """
+        Obtener todos los productos activos ordenados alfabéticamente.
+        Desde el catálogo en memoria se entrega su tupla compartida, sin
+        copiar: los objetos son de solo lectura, para modificar uno usar
+        buscar_por_id
+        """
         db = DatabaseManager()
-        query = "SELECT * FROM productos WHERE activo=1 ORDER BY nombre ASC"
-        resultados = db.ejecutar_consulta(query)
-
-        productos = []
-        if resultados:
-            for fila in resultados:
-                producto = Producto()
-                producto.id = fila[0]
-                producto.nombre = fila[1]
-                producto.descripcion = fila[2]
-                producto.precio_compra = fila[3]
-                producto.precio_venta = fila[4]
-                producto.stock = fila[5]
-                producto.stock_minimo = fila[6]
-                producto.categoria = fila[7]
-                # Nuevos campos (pueden ser None en productos existentes)
-                producto.marca = str(fila[10]) if len(fila) > 10 and fila[10] is not None else ""
-                producto.tipo = str(fila[11]) if len(fila) > 11 and fila[11] is not None else ""
-                producto.proveedor = str(fila[12]) if len(fila) > 12 and fila[12] is not None else ""
-                producto.sku = str(fila[13]) if len(fila) > 13 and fila[13] is not None else ""
-                productos.append(producto)
-
-        return productos
+        catalogo = CatalogoProductos.obtener(db.db_name).consultar(db)
+        if catalogo is not None:
+            return catalogo.todos()
+        return MAPEO_PRODUCTO.obtener(db, "activo=1", orden="nombre ASC")
     
     @staticmethod
     def buscar_por_id(producto_id):
-        """Buscar producto por ID"""
+        """Buscar producto por ID (copia propia, se puede modificar y actualizar)"""
         db = DatabaseManager()
-        query = "SELECT * FROM productos WHERE id=? AND activo=1"
-        resultado = db.ejecutar_consulta(query, (producto_id,))
-
-        if resultado and len(resultado) > 0:
-            fila = resultado[0]
-            producto = Producto()
-            producto.id = fila[0]
-            producto.nombre = fila[1]
-            producto.descripcion = fila[2]
-            producto.precio_compra = fila[3]
-            producto.precio_venta = fila[4]
-            producto.stock = fila[5]
-            producto.stock_minimo = fila[6]
-            producto.categoria = fila[7]
-            # Nuevos campos (pueden ser None en productos existentes)
-            producto.marca = str(fila[10]) if len(fila) > 10 and fila[10] is not None else ""
-            producto.tipo = str(fila[11]) if len(fila) > 11 and fila[11] is not None else ""
-            producto.proveedor = str(fila[12]) if len(fila) > 12 and fila[12] is not None else ""
-            producto.sku = str(fila[13]) if len(fila) > 13 and fila[13] is not None else ""
-            return producto
-
-        return None
+        catalogo = CatalogoProductos.obtener(db.db_name).consultar(db)
+        if catalogo is not None:
+            return catalogo.obtener_copia(producto_id)
+        return MAPEO_PRODUCTO.obtener_uno(db, "id=? AND activo=1", (producto_id,))
+
+    @staticmethod
+    def buscar_exactos(termino):
+        """
+        Productos activos cuyo SKU o nombre (sin distinguir mayúsculas ni
+        acentos) es exactamente el término, por ejemplo al leer un código
+        """
+        db = DatabaseManager()
+        catalogo = CatalogoProductos.obtener(db.db_name).consultar(db)
+        if catalogo is not None:
+            return catalogo.buscar('sku', termino.strip().upper()) or catalogo.buscar('nombre', normalizar_texto(termino))
+        return MAPEO_PRODUCTO.obtener(db, "sku = ? AND activo=1", (termino.strip().upper(),))
+
+    @staticmethod
+    def buscar_texto(termino, limite=200):
+        """
+        Buscar productos activos en nombre, descripción, marca, tipo,
+        categoría, proveedor y SKU usando el índice productos_fts.
+        Retorna los productos ordenados por relevancia (bm25)
+        """
+        expresion = expresion_busqueda_fts(termino)
+        if not expresion:
+            return Producto.obtener_todos()
+
+        query = f'''
+            SELECT {MAPEO_PRODUCTO.proyeccion}
+            FROM productos
+            JOIN (SELECT rowid AS fts_id, {RANGO_BUSQUEDA} AS fts_rango
+                  FROM productos_fts WHERE productos_fts MATCH ?) coincidencias
+              ON coincidencias.fts_id = productos.id
+            WHERE activo=1
+            ORDER BY coincidencias.fts_rango, nombre
+            LIMIT ?
+        '''
+        return DatabaseManager().ejecutar_consulta(
+            query, (expresion, limite), fabrica_filas=MAPEO_PRODUCTO.fabrica_filas) or []
+
+    @staticmethod
+    def sugerir_similares(termino, limite=5, umbral=0.3, candidatos=100):
+        """
+        Buscar productos activos con nombre o marca parecidos al término,
+        tolerando errores de tipeo y acentos ("aqua di gio" -> "Acqua di Giò").
+        El índice productos_trigramas preselecciona los candidatos que
+        comparten trigramas con cada palabra y se ordenan por similitud_trigramas.
+        Retorna una lista de tuplas (producto, similitud) de mayor a menor
+        """
+        # Trigramas de cada palabra de al menos 3 letras ("di" no aporta ninguno)
+        grupos = [trigramas(palabra, relleno=False) for palabra in palabras_normalizadas(termino)]
+        grupos = [" OR ".join(f'"{trigrama}"' for trigrama in sorted(grupo)) for grupo in grupos if grupo]
+        if not grupos:
+            return []
+
+        db = DatabaseManager()
+        query = '''
+            SELECT t.rowid, t.texto
+            FROM productos_trigramas t
+            JOIN productos p ON p.id = t.rowid
+            WHERE t.productos_trigramas MATCH ? AND p.activo = 1
+            ORDER BY t.rank
+            LIMIT ?
+        '''
+        # Primero candidatos que se parecen en todas las palabras; si una palabra
+        # está tan mal escrita que no comparte trigramas, en todas menos una.
+        # Ordenar por rank cuesta por cada fila coincidente, por eso no se
+        # consulta directamente la unión de todos los trigramas
+        filas = db.ejecutar_consulta(query, (Producto._coincidir_todas(grupos), candidatos)) or []
+        if not filas and len(grupos) > 1:
+            todas_menos_una = " OR ".join(
+                f"({Producto._coincidir_todas(grupos[:i] + grupos[i + 1:])})" for i in range(len(grupos)))
+            filas = db.ejecutar_consulta(query, (todas_menos_una, candidatos)) or []
+
+        puntajes = sorted(
+            ((similitud_trigramas(termino, texto), producto_id) for producto_id, texto in filas),
+            key=lambda puntaje: -puntaje[0]
+        )
+        puntajes = [(similitud, producto_id) for similitud, producto_id in puntajes if similitud >= umbral][:limite]
+        if not puntajes:
+            return []
+
+        marcadores = ", ".join("?" for _ in puntajes)
+        productos = MAPEO_PRODUCTO.obtener(db, f"id IN ({marcadores})", [producto_id for _, producto_id in puntajes])
+        por_id = {producto.id: producto for producto in productos}
+        return [(por_id[producto_id], similitud) for similitud, producto_id in puntajes if producto_id in por_id]
+
+    @staticmethod
+    def _coincidir_todas(grupos):
+        """Expresión MATCH que exige algún trigrama de cada grupo (palabra)"""
+        return " AND ".join(f"({grupo})" for grupo in grupos)
 
     @staticmethod
     def obtener_para_combobox():
@@ -198,4 +343,33 @@ class Producto:
     
     def __str__(self):
         """Representación en string del producto"""
-        return f"{self.nombre} - Stock: {self.stock} - Precio: ${self.precio_venta}"
\ No newline at end of file
+        return f"{self.nombre} - Stock: {self.stock} - Precio: ${self.precio_venta}"
+
+
+# Proyección única de la tabla productos (los campos nuevos pueden ser NULL en productos antiguos)
+MAPEO_PRODUCTO = Mapeador(Producto, "productos", (
+    'id', 'nombre', 'descripcion', 'precio_compra', 'precio_venta', 'stock',
+    'stock_minimo', 'categoria',
+    ('marca', "COALESCE(marca, '')"),
+    ('tipo', "COALESCE(tipo, '')"),
+    ('proveedor', "COALESCE(proveedor, '')"),
+    ('sku', "COALESCE(sku, '')"),
+    'activo'
+))
+
+# Relevancia de la búsqueda: pesos bm25 en el orden de las columnas de productos_fts
+# (nombre, descripcion, marca, tipo, categoria, proveedor, sku)
+RANGO_BUSQUEDA = "bm25(productos_fts, 10.0, 1.0, 6.0, 2.0, 2.0, 1.0, 8.0)"
+
+
+class CatalogoProductos(CacheFilas):
+    """Productos activos en memoria, con índices por SKU y nombre normalizado"""
+    MAPEO = MAPEO_PRODUCTO
+    INDICES = {
+        'sku': lambda producto: producto.sku,
+        'nombre': lambda producto: normalizar_texto(producto.nombre or ""),
+    }
+
+    @staticmethod
+    def clave_orden(producto):
+        return producto.nombre or ""
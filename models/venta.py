@@ -2,9 +2,18 @@
 Modelo para gestión de ventas
 """
 from config.database import DatabaseManager
+from config.mapeo import Mapeador, ModeloPersistente
+from config.secuencias import AsignadorNumeros
+from utils.herlpers import rango_semiabierto
 from datetime import datetime
 
-class Venta:
+class Venta(ModeloPersistente):
+    __slots__ = ('id', 'cliente_id', 'total', 'fecha_venta', 'observaciones',
+                 'numero_recibo', 'detalles', 'cliente_nombre')
+
+    # Prefijo de los números de recibo de venta (REC-AAAAMMDD-NNNN)
+    PREFIJO_RECIBO = "REC"
+
     def __init__(self, cliente_id=None, observaciones="", numero_recibo=""):
         self.id = None
         self.cliente_id = cliente_id
@@ -13,7 +22,6 @@ class Venta:
         self.observaciones = observaciones
         self.numero_recibo = numero_recibo
         self.detalles = []  # Lista de DetalleVenta
-        self.db = DatabaseManager()
     
     def agregar_detalle(self, producto_id, cantidad, precio_unitario):
         """Agregar un detalle de venta"""
@@ -30,81 +38,67 @@ class Venta:
         self.total = sum(detalle.subtotal for detalle in self.detalles)
     
     def guardar(self):
-        """Guardar venta y sus detalles en la base de datos"""
+        """
+        Guardar venta y sus detalles en la base de datos
+        Si se llama dentro de db.transaccion() se une a esa transacción
+        """
         try:
-            # Iniciar transacción
-            conn = self.db.conectar()
-            cursor = conn.cursor()
-            
-            # Guardar venta principal
-            query_venta = '''
-                INSERT INTO ventas (cliente_id, total, observaciones, numero_recibo)
-                VALUES (?, ?, ?, ?)
-            '''
-            cursor.execute(query_venta, (self.cliente_id, self.total, self.observaciones, self.numero_recibo))
-            self.id = cursor.lastrowid
-            
-            # Guardar detalles de venta
-            for detalle in self.detalles:
-                detalle.venta_id = self.id
+            with self.db.transaccion() as conn:
+                cursor = conn.cursor()
+
+                # El número de recibo sale de la secuencia dentro de la misma transacción
+                if not self.numero_recibo:
+                    self.numero_recibo = AsignadorNumeros.obtener(self.db.db_name).siguiente(Venta.PREFIJO_RECIBO, self.db)
+                
+                # Guardar venta principal
+                query_venta = '''
+                    INSERT INTO ventas (cliente_id, total, observaciones, numero_recibo)
+                    VALUES (?, ?, ?, ?)
+                '''
+                cursor.execute(query_venta, (self.cliente_id, self.total, self.observaciones, self.numero_recibo))
+                self.id = cursor.lastrowid
+                
+                # Guardar detalles de venta (una sola sentencia para todas las líneas)
+                for detalle in self.detalles:
+                    detalle.venta_id = self.id
                 query_detalle = '''
                     INSERT INTO detalle_ventas 
                     (venta_id, producto_id, cantidad, precio_unitario, subtotal)
                     VALUES (?, ?, ?, ?, ?)
                 '''
-                cursor.execute(query_detalle, (
-                    detalle.venta_id,
-                    detalle.producto_id,
-                    detalle.cantidad,
-                    detalle.precio_unitario,
-                    detalle.subtotal
-                ))
+                cursor.executemany(query_detalle, [
+                    (detalle.venta_id, detalle.producto_id, detalle.cantidad,
+                     detalle.precio_unitario, detalle.subtotal)
+                    for detalle in self.detalles
+                ])
                 
-                # Actualizar stock del producto
+                # Actualizar stock de los productos
                 query_stock = '''
                     UPDATE productos 
                     SET stock = stock - ? 
                     WHERE id = ?
                 '''
-                cursor.execute(query_stock, (detalle.cantidad, detalle.producto_id))
+                cursor.executemany(query_stock, [
+                    (detalle.cantidad, detalle.producto_id) for detalle in self.detalles
+                ])
             
-            conn.commit()
-            self.db.cerrar_conexion()
             return True
             
         except Exception as e:
             print(f"Error al guardar venta: {str(e)}")
-            if conn:
-                conn.rollback()
-                self.db.cerrar_conexion()
+            self.id = None
             return False
     
     @staticmethod
     def obtener_todas():
         """Obtener todas las ventas"""
-        db = DatabaseManager()
-        query = '''
-            SELECT v.id, v.cliente_id, v.total, v.fecha_venta, v.observaciones,
-                   c.nombre, c.apellido
-            FROM ventas v
-            LEFT JOIN clientes c ON v.cliente_id = c.id
-            ORDER BY v.fecha_venta DESC
-        '''
-        resultados = db.ejecutar_consulta(query)
-        
-        ventas = []
-        if resultados:
-            for fila in resultados:
-                venta = Venta()
-                venta.id = fila[0]
-                venta.cliente_id = fila[1]
-                venta.total = fila[2]
-                venta.fecha_venta = fila[3]
-                venta.observaciones = fila[4]
-                venta.cliente_nombre = f"{fila[5] or ''} {fila[6] or ''}".strip()
-                ventas.append(venta)
-        
-        return ventas
+        return list(Venta.iterar_todas())
+
+    @staticmethod
+    def iterar_todas(tamano_bloque=500):
+        """Recorrer todas las ventas sin cargarlas completas en memoria"""
+        return MAPEO_VENTA.iterar(DatabaseManager(), orden="v.fecha_venta DESC",
+                                  tamano_bloque=tamano_bloque)
     
     @staticmethod
     def obtener_por_id(venta_id):
@@ -112,78 +106,27 @@ class Venta:
         db = DatabaseManager()
         
         # Obtener venta principal
-        query_venta = '''
-            SELECT v.id, v.cliente_id, v.total, v.fecha_venta, v.observaciones,
-                   c.nombre, c.apellido
-            FROM ventas v
-            LEFT JOIN clientes c ON v.cliente_id = c.id
-            WHERE v.id = ?
-        '''
-        resultado = db.ejecutar_consulta(query_venta, (venta_id,))
-        
-        if not resultado:
+        venta = MAPEO_VENTA.obtener_uno(db, "v.id = ?", (venta_id,))
+        if not venta:
             return None
         
-        fila = resultado[0]
-        venta = Venta()
-        venta.id = fila[0]
-        venta.cliente_id = fila[1]
-        venta.total = fila[2]
-        venta.fecha_venta = fila[3]
-        venta.observaciones = fila[4]
-        venta.cliente_nombre = f"{fila[5] or ''} {fila[6] or ''}".strip()
-        
         # Obtener detalles
-        query_detalles = '''
-            SELECT dv.id, dv.producto_id, dv.cantidad, dv.precio_unitario, dv.subtotal,
-                   p.nombre
-            FROM detalle_ventas dv
-            JOIN productos p ON dv.producto_id = p.id
-            WHERE dv.venta_id = ?
-        '''
-        detalles = db.ejecutar_consulta(query_detalles, (venta_id,))
-        
-        if detalles:
-            for detalle_fila in detalles:
-                detalle = DetalleVenta()
-                detalle.id = detalle_fila[0]
-                detalle.venta_id = venta.id
-                detalle.producto_id = detalle_fila[1]
-                detalle.cantidad = detalle_fila[2]
-                detalle.precio_unitario = detalle_fila[3]
-                detalle.subtotal = detalle_fila[4]
-                detalle.producto_nombre = detalle_fila[5]
-                venta.detalles.append(detalle)
-        
+        venta.detalles = MAPEO_DETALLE_VENTA.obtener(db, "dv.venta_id = ?", (venta_id,))
         return venta
     
     @staticmethod
     def obtener_ventas_por_fecha(fecha_inicio, fecha_fin):
         """Obtener ventas en un rango de fechas"""
-        db = DatabaseManager()
-        query = '''
-            SELECT v.id, v.cliente_id, v.total, v.fecha_venta, v.observaciones,
-                   c.nombre, c.apellido
-            FROM ventas v
-            LEFT JOIN clientes c ON v.cliente_id = c.id
-            WHERE DATE(v.fecha_venta) BETWEEN ? AND ?
-            ORDER BY v.fecha_venta DESC
-        '''
-        resultados = db.ejecutar_consulta(query, (fecha_inicio, fecha_fin))
-        
-        ventas = []
-        if resultados:
-            for fila in resultados:
-                venta = Venta()
-                venta.id = fila[0]
-                venta.cliente_id = fila[1]
-                venta.total = fila[2]
-                venta.fecha_venta = fila[3]
-                venta.observaciones = fila[4]
-                venta.cliente_nombre = f"{fila[5] or ''} {fila[6] or ''}".strip()
-                ventas.append(venta)
-        
-        return ventas
+        return list(Venta.iterar_ventas_por_fecha(fecha_inicio, fecha_fin))
+
+    @staticmethod
+    def iterar_ventas_por_fecha(fecha_inicio, fecha_fin, tamano_bloque=500):
+        """Recorrer las ventas de un rango de fechas sin cargarlas completas en memoria"""
+        return MAPEO_VENTA.iterar(
+            DatabaseManager(), "v.fecha_dia >= ? AND v.fecha_dia < ?",
+            rango_semiabierto(fecha_inicio, fecha_fin),
+            orden="v.fecha_venta DESC", tamano_bloque=tamano_bloque
+        )
     
     def calcular_ganancia_total(self):
         """Calcular la ganancia total de la venta"""
@@ -195,108 +138,92 @@ class Venta:
     def eliminar(self):
         """Eliminar venta y sus detalles"""
         try:
-            conn = self.db.conectar()
-            cursor = conn.cursor()
+            with self.db.transaccion() as conn:
+                cursor = conn.cursor()
 
-            # Primero eliminar los detalles de venta
-            cursor.execute("DELETE FROM detalle_ventas WHERE venta_id = ?", (self.id,))
+                # Primero eliminar los detalles de venta
+                cursor.execute("DELETE FROM detalle_ventas WHERE venta_id = ?", (self.id,))
 
-            # Luego eliminar la venta principal
-            cursor.execute("DELETE FROM ventas WHERE id = ?", (self.id,))
-
-            # Confirmar los cambios
-            conn.commit()
-            conn.close()
+                # Luego eliminar la venta principal
+                cursor.execute("DELETE FROM ventas WHERE id = ?", (self.id,))
 
             return True
 
         except Exception as e:
             print(f"Error al eliminar venta: {str(e)}")
-            if 'conn' in locals():
-                conn.rollback()
-                conn.close()
             return False
 
     def eliminar_completa(self):
         """Eliminar venta completamente y revertir todos los movimientos"""
         try:
-            conn = self.db.conectar()
-            if not conn:
-                print("ERROR: No se pudo conectar a la base de datos")
-                return False
+            # Transacción explícita (se une a una exterior si existe)
+            with self.db.transaccion() as conn:
+                cursor = conn.cursor()
+                print(f"DEBUG: Iniciando eliminación completa de venta {self.id}")
 
-            cursor = conn.cursor()
+                # 1. REVERTIR STOCK DE PRODUCTOS
+                print(f"DEBUG: Revirtiendo stock para {len(self.detalles)} productos...")
+                for detalle in self.detalles:
+                    # Verificar stock actual antes de revertir
+                    cursor.execute("SELECT stock, nombre FROM productos WHERE id = ?", (detalle.producto_id,))
+                    resultado = cursor.fetchone()
+                    if resultado:
+                        stock_actual, nombre_producto = resultado
+                        nuevo_stock = stock_actual + detalle.cantidad
 
-            # Comenzar transacción explícita
-            cursor.execute("BEGIN IMMEDIATE TRANSACTION")
-            print(f"DEBUG: Iniciando eliminación completa de venta {self.id}")
+                        # Devolver stock al inventario
+                        cursor.execute(
+                            "UPDATE productos SET stock = ? WHERE id = ?",
+                            (nuevo_stock, detalle.producto_id)
+                        )
+                        print(f"  -> {nombre_producto}: {stock_actual} + {detalle.cantidad} = {nuevo_stock}")
+                    else:
+                        print(f"  -> ADVERTENCIA: Producto {detalle.producto_id} no encontrado")
 
-            # 1. REVERTIR STOCK DE PRODUCTOS
-            print(f"DEBUG: Revirtiendo stock para {len(self.detalles)} productos...")
-            for detalle in self.detalles:
-                # Verificar stock actual antes de revertir
-                cursor.execute("SELECT stock, nombre FROM productos WHERE id = ?", (detalle.producto_id,))
-                resultado = cursor.fetchone()
-                if resultado:
-                    stock_actual, nombre_producto = resultado
-                    nuevo_stock = stock_actual + detalle.cantidad
+                # 2. REVERTIR MOVIMIENTOS EN CUENTA CORRIENTE (si hay cliente)
+                if self.cliente_id and self.cliente_id > 0:
+                    print(f"DEBUG: Revirtiendo cuenta corriente para cliente {self.cliente_id}...")
 
-                    # Devolver stock al inventario
-                    cursor.execute(
-                        "UPDATE productos SET stock = ? WHERE id = ?",
-                        (nuevo_stock, detalle.producto_id)
-                    )
-                    print(f"  -> {nombre_producto}: {stock_actual} + {detalle.cantidad} = {nuevo_stock}")
-                else:
-                    print(f"  -> ADVERTENCIA: Producto {detalle.producto_id} no encontrado")
+                    # Verificar si existe cuenta corriente
+                    cursor.execute("SELECT saldo_total, saldo_pendiente FROM cuentas_corrientes WHERE cliente_id = ?", (self.cliente_id,))
+                    cuenta_resultado = cursor.fetchone()
 
-            # 2. REVERTIR MOVIMIENTOS EN CUENTA CORRIENTE (si hay cliente)
-            if self.cliente_id and self.cliente_id > 0:
-                print(f"DEBUG: Revirtiendo cuenta corriente para cliente {self.cliente_id}...")
+                    if cuenta_resultado:
+                        saldo_total_actual, saldo_pendiente_actual = cuenta_resultado
+                        nuevo_saldo_total = saldo_total_actual - self.total
+                        nuevo_saldo_pendiente = saldo_pendiente_actual - self.total
 
-                # Verificar si existe cuenta corriente
-                cursor.execute("SELECT saldo_total, saldo_pendiente FROM cuentas_corrientes WHERE cliente_id = ?", (self.cliente_id,))
-                cuenta_resultado = cursor.fetchone()
+                        # Asegurar que no queden saldos negativos
+                        nuevo_saldo_total = max(0, nuevo_saldo_total)
+                        nuevo_saldo_pendiente = max(0, nuevo_saldo_pendiente)
 
-                if cuenta_resultado:
-                    saldo_total_actual, saldo_pendiente_actual = cuenta_resultado
-                    nuevo_saldo_total = saldo_total_actual - self.total
-                    nuevo_saldo_pendiente = saldo_pendiente_actual - self.total
+                        # Revertir el cargo en cuenta corriente
+                        cursor.execute(
+                            """UPDATE cuentas_corrientes
+                               SET saldo_total = ?,
+                                   saldo_pendiente = ?,
+                                   fecha_ultima_actualizacion = CURRENT_TIMESTAMP
+                               WHERE cliente_id = ?""",
+                            (nuevo_saldo_total, nuevo_saldo_pendiente, self.cliente_id)
+                        )
 
-                    # Asegurar que no queden saldos negativos
-                    nuevo_saldo_total = max(0, nuevo_saldo_total)
-                    nuevo_saldo_pendiente = max(0, nuevo_saldo_pendiente)
+                        print(f"  -> Saldo total: ${saldo_total_actual:,.0f} -> ${nuevo_saldo_total:,.0f}")
+                        print(f"  -> Saldo pendiente: ${saldo_pendiente_actual:,.0f} -> ${nuevo_saldo_pendiente:,.0f}")
 
-                    # Revertir el cargo en cuenta corriente
+                    # Eliminar movimiento asociado a esta venta
                     cursor.execute(
-                        """UPDATE cuentas_corrientes
-                           SET saldo_total = ?,
-                               saldo_pendiente = ?,
-                               fecha_ultima_actualizacion = CURRENT_TIMESTAMP
-                           WHERE cliente_id = ?""",
-                        (nuevo_saldo_total, nuevo_saldo_pendiente, self.cliente_id)
+                        "DELETE FROM movimientos_cuenta WHERE venta_id = ? AND cliente_id = ?",
+                        (self.id, self.cliente_id)
                     )
+                    print(f"  -> Movimientos de venta eliminados")
 
-                    print(f"  -> Saldo total: ${saldo_total_actual:,.0f} -> ${nuevo_saldo_total:,.0f}")
-                    print(f"  -> Saldo pendiente: ${saldo_pendiente_actual:,.0f} -> ${nuevo_saldo_pendiente:,.0f}")
-
-                # Eliminar movimiento asociado a esta venta
-                cursor.execute(
-                    "DELETE FROM movimientos_cuenta WHERE venta_id = ? AND cliente_id = ?",
-                    (self.id, self.cliente_id)
-                )
-                print(f"  -> Movimientos de venta eliminados")
-
-            # 3. ELIMINAR DETALLES DE VENTA
-            cursor.execute("DELETE FROM detalle_ventas WHERE venta_id = ?", (self.id,))
-            print(f"DEBUG: Detalles de venta eliminados")
-
-            # 4. ELIMINAR VENTA PRINCIPAL
-            cursor.execute("DELETE FROM ventas WHERE id = ?", (self.id,))
-            print(f"DEBUG: Venta principal eliminada")
+                # 3. ELIMINAR DETALLES DE VENTA
+                cursor.execute("DELETE FROM detalle_ventas WHERE venta_id = ?", (self.id,))
+                print(f"DEBUG: Detalles de venta eliminados")
 
-            # Confirmar todos los cambios
-            conn.commit()
+                # 4. ELIMINAR VENTA PRINCIPAL
+                cursor.execute("DELETE FROM ventas WHERE id = ?", (self.id,))
+                print(f"DEBUG: Venta principal eliminada")
 
             print(f"SUCCESS: Venta {self.id} eliminada completamente con reversión total")
             return True
@@ -305,21 +232,13 @@ class Venta:
             print(f"ERROR al eliminar venta completa: {str(e)}")
             import traceback
             traceback.print_exc()
-            if 'conn' in locals() and conn:
-                try:
-                    conn.rollback()
-                    print("DEBUG: Transacción revertida por error")
-                except:
-                    pass
+            print("DEBUG: Transacción revertida por error")
             return False
-        finally:
-            if 'conn' in locals() and conn:
-                try:
-                    conn.close()
-                except:
-                    pass
 
 class DetalleVenta:
+    __slots__ = ('id', 'venta_id', 'producto_id', 'cantidad', 'precio_unitario', 'subtotal',
+                 'producto_nombre', 'producto_precio_compra')
+
     def __init__(self, venta_id=None, producto_id=None, cantidad=0, precio_unitario=0.0):
         self.id = None
         self.venta_id = venta_id
@@ -340,4 +259,28 @@ class DetalleVenta:
         if self.producto_precio_compra > 0:
             ganancia_unitaria = self.precio_unitario - self.producto_precio_compra
             return ganancia_unitaria * self.cantidad
-        return 0
\ No newline at end of file
+        return 0
+
+
+# Listados de ventas con el nombre del cliente
+MAPEO_VENTA = Mapeador(Venta, "ventas v LEFT JOIN clientes c ON v.cliente_id = c.id", (
+    ('id', 'v.id'),
+    ('cliente_id', 'v.cliente_id'),
+    ('total', 'v.total'),
+    ('fecha_venta', 'v.fecha_venta'),
+    ('observaciones', 'v.observaciones'),
+    ('numero_recibo', 'v.numero_recibo'),
+    ('cliente_nombre', "TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, ''))")
+), extras={'detalles': list})
+
+# Detalles de una venta con los datos del producto
+MAPEO_DETALLE_VENTA = Mapeador(DetalleVenta, "detalle_ventas dv JOIN productos p ON dv.producto_id = p.id", (
+    ('id', 'dv.id'),
+    ('venta_id', 'dv.venta_id'),
+    ('producto_id', 'dv.producto_id'),
+    ('cantidad', 'dv.cantidad'),
+    ('precio_unitario', 'dv.precio_unitario'),
+    ('subtotal', 'dv.subtotal'),
+    ('producto_nombre', 'p.nombre'),
+    ('producto_precio_compra', 'p.precio_compra')
+))
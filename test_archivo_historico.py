@@ -0,0 +1,131 @@
+"""
+Script de prueba para verificar el archivado de ventas de años cerrados
+"""
+import sys
+import os
+from datetime import datetime
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.archivo_historico import ArchivadorVentas, archivos_historicos, ruta_archivo
+from controllers.reporte_controller import ReporteController
+
+ANIO_CERRADO = datetime.now().year - 2
+
+def crear_db_con_ventas(db_name):
+    """Base temporal con ventas del año cerrado y del año en curso"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES ('Lapiz', 50, 100)")
+    db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES ('Ana', 'Paz')")
+
+    fechas = [f"{ANIO_CERRADO}-0{mes}-15 10:00:00" for mes in (1, 6, 9)]
+    fechas.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    for fecha in fechas:
+        db.ejecutar_consulta("INSERT INTO ventas (cliente_id, total, fecha_venta) VALUES (1, 100, ?)", (fecha,))
+        venta_id = db.ejecutar_consulta("SELECT MAX(id) FROM ventas")[0][0]
+        db.ejecutar_consulta(
+            "INSERT INTO detalle_ventas (venta_id, producto_id, cantidad, precio_unitario, subtotal) "
+            "VALUES (?, 1, 1, 100, 100)", (venta_id,))
+        db.ejecutar_consulta(
+            "INSERT INTO movimientos_cuenta (cliente_id, tipo_movimiento, monto, venta_id, fecha_movimiento) "
+            "VALUES (1, 'CARGO', 100, ?, ?)", (venta_id, fecha))
+
+def contar(db, tabla):
+    return db.ejecutar_consulta(f"SELECT COUNT(*) FROM {tabla}")[0][0]
+
+def test_archivar_anio_cerrado(db_name):
+    """Las ventas del año cerrado pasan al archivo y salen de la base principal"""
+    print("\n=== ARCHIVAR AÑO CERRADO ===")
+    crear_db_con_ventas(db_name)
+    archivador = ArchivadorVentas(db_name)
+
+    pendientes = archivador.anios_pendientes()
+    totales = archivador.archivar_cerrados()
+    db = DatabaseManager(db_name)
+    print(f"Pendientes: {pendientes} | Totales: {totales}")
+
+    assert pendientes == [ANIO_CERRADO]
+    assert totales[ANIO_CERRADO] == {'ventas': 3, 'detalle_ventas': 3, 'movimientos_cuenta': 3}
+    assert contar(db, "ventas") == 1
+    assert contar(db, "detalle_ventas") == 1
+    assert contar(db, "movimientos_cuenta") == 1
+    assert archivos_historicos(db_name) == [(ANIO_CERRADO, ruta_archivo(db_name, ANIO_CERRADO))]
+    assert archivador.anios_pendientes() == []
+
+def test_archivar_es_idempotente(db_name):
+    """Repetir el archivado no duplica filas"""
+    print("\n=== ARCHIVADO REPETIDO ===")
+    crear_db_con_ventas(db_name)
+    archivador = ArchivadorVentas(db_name)
+    archivador.archivar_anio(ANIO_CERRADO)
+    segundo = archivador.archivar_anio(ANIO_CERRADO)
+
+    historico = DatabaseManager(db_name, historico=True)
+    print(f"Segundo archivado: {segundo} | Ventas en historial: {contar(historico, 'ventas')}")
+    assert segundo == {'ventas': 0, 'detalle_ventas': 0, 'movimientos_cuenta': 0}
+    assert contar(historico, "ventas") == 4
+
+def test_anio_en_curso_no_se_archiva(db_name):
+    """Solo se archivan años cerrados"""
+    print("\n=== AÑO EN CURSO ===")
+    crear_db_con_ventas(db_name)
+    archivador = ArchivadorVentas(db_name)
+    try:
+        archivador.archivar_anio(datetime.now().year)
+        assert False, "Debió rechazar el año en curso"
+    except ValueError as e:
+        print(f"Rechazado: {e}")
+
+def test_historial_completo_en_reportes(db_name):
+    """Las conexiones con historial ven los años archivados con las mismas consultas"""
+    print("\n=== HISTORIAL COMPLETO ===")
+    crear_db_con_ventas(db_name)
+    ArchivadorVentas(db_name).archivar_anio(ANIO_CERRADO)
+
+    actual = DatabaseManager(db_name, solo_lectura=True)
+    historico = DatabaseManager(db_name, historico=True)
+    consulta = '''
+        SELECT COUNT(DISTINCT v.id), SUM(dv.subtotal)
+        FROM ventas v JOIN detalle_ventas dv ON dv.venta_id = v.id
+    '''
+    print(f"Actual: {actual.ejecutar_consulta(consulta)} | Historial: {historico.ejecutar_consulta(consulta)}")
+
+    assert actual.ejecutar_consulta(consulta)[0] == (1, 100)
+    assert historico.ejecutar_consulta(consulta)[0] == (4, 400)
+    assert historico.ejecutar_consulta("INSERT INTO clientes (nombre) VALUES ('X')") is None
+
+    # El controlador de reportes elige el historial según el rango pedido
+    controlador = ReporteController()
+    controlador.db = actual
+    controlador.db_historico = historico
+    antiguas = controlador.obtener_ventas_por_rango_fecha(f"{ANIO_CERRADO}-01-01", f"{ANIO_CERRADO}-12-31")
+    print(f"Ventas del año archivado en el reporte: {len(antiguas)}")
+    assert len(antiguas) == 3
+
+def test_historial_adjunta_una_vez(db_name, monkeypatch):
+    """Los archivos se adjuntan una vez por conexión y otra vez solo al crear uno nuevo"""
+    print("\n=== ADJUNTAR UNA VEZ ===")
+    import config.database as modulo_database
+    llamadas = []
+    adjuntar = modulo_database.adjuntar_historico
+    monkeypatch.setattr(modulo_database, "adjuntar_historico",
+                        lambda *args: llamadas.append(1) or adjuntar(*args))
+
+    crear_db_con_ventas(db_name)
+    historico = DatabaseManager(db_name, historico=True)
+    for _ in range(5):
+        assert contar(historico, "ventas") == 4
+    assert len(llamadas) == 1
+
+    ArchivadorVentas(db_name).archivar_anio(ANIO_CERRADO)
+    assert contar(historico, "ventas") == 4
+    assert contar(historico, "ventas") == 4
+    print(f"Adjuntos: {len(llamadas)}")
+    assert len(llamadas) == 2
+
+if __name__ == "__main__":
+    print("PRUEBA DE ARCHIVO HISTORICO")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
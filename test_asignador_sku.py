@@ -0,0 +1,176 @@
+"""
+Script de prueba para verificar la asignación de SKU con mapa de bits
+"""
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.perfilador import PERFILADOR
+from config.migraciones import migracion_014_sku_unico
+from config.secuencias import AsignadorSku
+from models.producto import Producto
+
+def crear_db_temporal(db_name, skus=()):
+    """Base temporal con productos que ya tienen los SKU indicados"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, marca, sku, precio_compra, precio_venta) VALUES (?, 'Samsung', ?, 100, 200)",
+        [(f"Producto {sku}", sku) for sku in skus]
+    )
+    return db
+
+def test_siguiente_libre(db_name):
+    """Se entrega el sufijo libre más bajo de cada marca"""
+    print("\n=== SUFIJOS LIBRES ===")
+    db = crear_db_temporal(db_name, ["SAM000", "SAM001", "SAM002", "SAM004", "SAM012X"])
+    asignador = AsignadorSku(db.db_name)
+
+    skus = [asignador.siguiente("Samsung", db) for _ in range(3)]
+    print(f"Samsung: {skus}")
+    assert skus == ["SAM003", "SAM005", "SAM006"]
+    assert asignador.siguiente("", db) == "GEN000"
+    assert asignador.siguiente("LG", db) == "LGX000"
+
+def test_una_consulta_por_marca(db_name):
+    """El modo masivo lee cada prefijo una sola vez"""
+    print("\n=== MODO MASIVO ===")
+    db = crear_db_temporal(db_name, ["SAM000"])
+    asignador = AsignadorSku(db.db_name)
+
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        skus = asignador.asignar_lote(["Samsung", "Dior", "Samsung", "Dior", "Samsung"] * 40, db)
+    lecturas = [s for s in sentencias if "FROM productos" in s]
+    print(f"SKU asignados: {len(skus)} | Lecturas de productos: {len(lecturas)}")
+    assert len(set(skus)) == 200
+    assert len(lecturas) == 2
+    assert "SAM000" not in skus and "SAM001" in skus and "DIO000" in skus
+
+def test_cambios_de_otra_terminal(db_name):
+    """Un SKU escrito por otra conexión se detecta por data_version"""
+    print("\n=== OTRA TERMINAL ===")
+    db = crear_db_temporal(db_name, ["SAM000"])
+    asignador = AsignadorSku(db.db_name)
+    assert asignador.siguiente("Samsung", db) == "SAM001"
+
+    otra = sqlite3.connect(db.db_name)
+    otra.execute("INSERT INTO productos (nombre, marca, sku, precio_compra, precio_venta) VALUES ('X', 'Samsung', 'SAM002', 1, 2)")
+    otra.commit()
+    otra.close()
+
+    siguiente = asignador.siguiente("Samsung", db)
+    print(f"Después de la otra terminal: {siguiente}")
+    assert siguiente == "SAM003"
+
+def test_prefijo_completo(db_name):
+    """Sin sufijos de 3 dígitos libres se agregan letras"""
+    print("\n=== PREFIJO COMPLETO ===")
+    db = crear_db_temporal(db_name, [f"SAM{n:03d}" for n in range(1000)])
+    sku = AsignadorSku(db.db_name).siguiente("Samsung", db)
+    print(f"SKU extendido: {sku}")
+    assert sku.startswith("SAM") and len(sku) == 8
+
+def test_guardar_y_lote_sin_repetir(db_modelos):
+    """Los SKU cargados a mano y los generados nunca se repiten"""
+    print("\n=== GUARDAR Y GUARDAR_LOTE ===")
+    db = crear_db_temporal(db_modelos, ["SAM000"])
+    manual = Producto(nombre="Manual", marca="Samsung", sku="SAM001")
+    manual.db = db
+    assert manual.guardar()
+
+    automatico = Producto(nombre="Automatico", marca="Samsung")
+    automatico.db = db
+    assert automatico.guardar()
+    assert automatico.sku == "SAM002"
+
+    lote = [Producto(nombre="Lote 1", marca="Samsung"), Producto(nombre="Lote 2", marca="Samsung", sku="SAM003"),
+            Producto(nombre="Lote 3", marca="Samsung")]
+    assert Producto.guardar_lote(lote) == 3
+
+    skus = [fila[0] for fila in db.ejecutar_consulta("SELECT sku FROM productos ORDER BY sku")]
+    print(f"SKU guardados: {skus}")
+    assert skus == ["SAM000", "SAM001", "SAM002", "SAM003", "SAM004", "SAM005"]
+
+def test_completar_skus_faltantes(db_modelos):
+    """El relleno masivo escribe todos los SKU en una transacción con avance"""
+    print("\n=== RELLENO MASIVO DE SKU ===")
+    db = crear_db_temporal(db_modelos, ["SAM000"])
+    marcas = ["Samsung", "Dior", "", "LG"]
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, marca, precio_compra, precio_venta) VALUES (?, ?, 100, 200)",
+        [(f"Sin SKU {i}", marcas[i % 4]) for i in range(1200)]
+    )
+    db.ejecutar_consulta("INSERT INTO productos (nombre, marca, activo, precio_compra, precio_venta) VALUES ('Inactivo', 'Dior', 0, 1, 2)")
+
+    avances = []
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        actualizados = Producto.completar_skus_faltantes(tamano_lote=500, progreso=lambda p, t: avances.append((p, t)))
+    commits = [s for s in sentencias if s.strip().upper() == "COMMIT"]
+    assert Producto.completar_skus_faltantes() == 0
+
+    print(f"Actualizados: {actualizados} | Avance: {avances} | COMMIT: {len(commits)}")
+    assert actualizados == 1200
+    assert avances == [(500, 1200), (1000, 1200), (1200, 1200)]
+    assert len(commits) == 1
+    skus = [fila[0] for fila in db.ejecutar_consulta("SELECT sku FROM productos WHERE activo = 1")]
+    assert len(set(skus)) == 1201 and "" not in skus
+    assert db.ejecutar_consulta("SELECT sku FROM productos WHERE activo = 0")[0][0] in (None, "")
+
+def test_sufijos_liberados(db_name):
+    """Al releer el mapa, los sufijos de productos borrados por otra terminal vuelven a estar libres"""
+    print("\n=== SUFIJOS LIBERADOS ===")
+    db = crear_db_temporal(db_name, ["SAM000", "SAM001"])
+    asignador = AsignadorSku(db.db_name)
+    assert asignador.siguiente("Samsung", db) == "SAM002"
+
+    otra = sqlite3.connect(db.db_name)
+    otra.execute("DELETE FROM productos WHERE sku = 'SAM000'")
+    otra.commit()
+    otra.close()
+
+    # SAM002 se entregó y aún no se guardó: sigue ocupado
+    skus = [asignador.siguiente("Samsung", db) for _ in range(2)]
+    print(f"Después del borrado: {skus}")
+    assert skus == ["SAM000", "SAM003"]
+
+def test_reintento_ante_sku_repetido(db_modelos):
+    """Si el SKU asignado ya se guardó sin pasar por el mapa, se reintenta con otro"""
+    print("\n=== REINTENTO POR SKU REPETIDO ===")
+    db = crear_db_temporal(db_modelos, ["SAM000"])
+    AsignadorSku.obtener(db.db_name).siguiente("Samsung", db)
+    # Escritura de la misma conexión: data_version no cambia y el mapa no se relee
+    db.ejecutar_consulta("INSERT INTO productos (nombre, marca, sku, precio_compra, precio_venta) "
+                         "VALUES ('Sin marcar', 'Samsung', 'SAM002', 1, 2)")
+
+    producto = Producto(nombre="Nuevo", marca="Samsung")
+    producto.db = db
+    assert producto.guardar()
+    print(f"SKU guardado: {producto.sku}")
+    assert producto.sku == "SAM003"
+    assert db.ejecutar_consulta("SELECT COUNT(*) FROM productos WHERE sku = 'SAM002'")[0][0] == 1
+
+def test_indice_unico_de_sku(db_name):
+    """La migración renombra los SKU repetidos y el índice único rechaza nuevos repetidos"""
+    print("\n=== INDICE UNICO DE SKU ===")
+    db = crear_db_temporal(db_name, ["SAM000"])
+    conn = sqlite3.connect(db.db_name)
+    conn.execute("DROP INDEX ux_productos_sku")
+    conn.executemany("INSERT INTO productos (nombre, sku, activo, precio_compra, precio_venta) VALUES (?, ?, ?, 1, 2)",
+                     [("Inactivo", "SAM001", 0), ("Activo", "SAM001", 1), ("Sin SKU 1", "", 1), ("Sin SKU 2", "", 1)])
+    migracion_014_sku_unico(conn.cursor())
+    conn.commit()
+
+    filas = conn.execute("SELECT nombre, sku FROM productos WHERE nombre IN ('Inactivo', 'Activo')").fetchall()
+    print(f"Después de migrar: {filas}")
+    assert dict(filas) == {'Activo': 'SAM001', 'Inactivo': 'SAM001-2'}
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO productos (nombre, sku, precio_compra, precio_venta) VALUES ('Repetido', 'SAM000', 1, 2)")
+    conn.close()
+
+if __name__ == "__main__":
+    print("PRUEBA DE ASIGNACION DE SKU")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
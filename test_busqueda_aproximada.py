@@ -0,0 +1,89 @@
+"""
+Script de prueba para verificar la búsqueda aproximada (trigramas) de productos
+"""
+import sys
+import os
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from models.producto import Producto
+from utils.herlpers import normalizar_texto, similitud_trigramas
+
+PERFUMES = [
+    ("212 VIP Men", "Carolina Herrera"),
+    ("1 Million", "Paco Rabanne"),
+    ("Acqua di Giò Profondo", "Giorgio Armani"),
+    ("La Vie Est Belle", "Lancôme"),
+    ("Olympéa", "Paco Rabanne"),
+    ("Sauvage", "Dior"),
+]
+
+# Productos de relleno que compiten con los perfumes en las sugerencias
+RELLENO = 3000
+
+def crear_db_temporal(db_name, relleno=0):
+    """Base temporal con perfumes conocidos y, opcionalmente, productos de relleno"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, marca, precio_compra, precio_venta) VALUES (?, ?, 100, 200)",
+        ((f"Fragancia {i} {'EDT' if i % 2 else 'EDP'} {i % 7 * 25 + 30}ml", f"Marca {i % 300}")
+         for i in range(relleno))
+    )
+    db.ejecutar_lote("INSERT INTO productos (nombre, marca, precio_compra, precio_venta) VALUES (?, ?, 100, 200)",
+                     PERFUMES)
+    return db
+
+def mejor_sugerencia(termino):
+    sugerencias = Producto.sugerir_similares(termino)
+    return sugerencias[0][0].nombre if sugerencias else None
+
+def test_normalizacion(db_modelos):
+    """El índice guarda nombre y marca en minúsculas y sin acentos"""
+    print("\n=== NORMALIZACION ===")
+    db = crear_db_temporal(db_modelos)
+    texto = db.ejecutar_consulta(
+        "SELECT t.texto FROM productos_trigramas t JOIN productos p ON p.id = t.rowid "
+        "WHERE p.nombre = 'Olympéa'")[0][0]
+    print(f"Texto indexado: {texto}")
+    assert texto == normalizar_texto("Olympéa Paco Rabanne") == "olympea paco rabanne"
+    assert similitud_trigramas("aqua di gio", "Acqua di Giò Profondo") > similitud_trigramas("aqua di gio", "Sauvage")
+
+def test_sugerencias_con_errores(db_modelos):
+    """Los nombres mal escritos encuentran el perfume correcto primero"""
+    print("\n=== SUGERENCIAS ===")
+    crear_db_temporal(db_modelos, relleno=RELLENO)
+    casos = {
+        "sovage": "Sauvage",
+        "aqua di gio": "Acqua di Giò Profondo",
+        "carolina herera 212": "212 VIP Men",
+        "paco rabane one milion": "1 Million",
+        "olimpea": "Olympéa",
+        "LANCOME la vie": "La Vie Est Belle",
+    }
+    for termino, esperado in casos.items():
+        inicio = time.perf_counter()
+        sugerido = mejor_sugerencia(termino)
+        print(f"'{termino}' -> {sugerido} ({(time.perf_counter() - inicio) * 1000:.1f} ms)")
+        assert sugerido == esperado
+    assert Producto.sugerir_similares("xq") == []
+
+def test_indice_sincronizado(db_modelos):
+    """Los triggers mantienen los trigramas al renombrar, desactivar y borrar"""
+    print("\n=== TRIGRAMAS SINCRONIZADOS ===")
+    db = crear_db_temporal(db_modelos)
+    db.ejecutar_consulta("UPDATE productos SET nombre = 'Sauvage Élixir' WHERE nombre = 'Sauvage'")
+    assert mejor_sugerencia("elixr") == "Sauvage Élixir"
+
+    db.ejecutar_consulta("UPDATE productos SET activo = 0 WHERE nombre = 'Olympéa'")
+    assert mejor_sugerencia("olimpea") is None
+
+    db.ejecutar_consulta("DELETE FROM productos WHERE nombre = '1 Million'")
+    assert db.ejecutar_consulta("SELECT COUNT(*) FROM productos_trigramas")[0][0] == len(PERFUMES) - 1
+
+if __name__ == "__main__":
+    print("PRUEBA DE BUSQUEDA APROXIMADA DE PRODUCTOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,73 @@
+"""
+Script de prueba para verificar la búsqueda de clientes por texto y teléfono
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+import models.cliente as modelo_cliente
+from models.cliente import Cliente
+
+def crear_db_temporal(db_name):
+    """Base temporal con algunos clientes, usada por defecto por el modelo"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO clientes (nombre, apellido, telefono, email) VALUES (?, ?, ?, ?)",
+        [
+            ("Ana", "Pérez", "+56 9 8765-4321", "ana.perez@correo.cl"),
+            ("Andrés", "Soto", "(2) 2345 4321", "asoto@empresa.cl"),
+            ("Beatriz", "Muñoz", "912345678", ""),
+            ("Carlos", "Paz", None, "carlos@correo.cl"),
+        ]
+    )
+    return db
+
+def nombres(clientes):
+    return [c.nombre for c in clientes]
+
+def test_busqueda_por_texto(db_modelos):
+    """Nombre, apellido y email por prefijo y sin acentos"""
+    print("\n=== BUSQUEDA POR TEXTO ===")
+    crear_db_temporal(db_modelos)
+    print(f"'an': {nombres(Cliente.buscar('an'))}")
+    assert nombres(Cliente.buscar("an")) == ["Ana", "Andrés"]
+    assert nombres(Cliente.buscar("ana per")) == ["Ana"]
+    assert nombres(Cliente.buscar("munoz")) == ["Beatriz"]
+    assert sorted(nombres(Cliente.buscar("correo"))) == ["Ana", "Carlos"]
+    assert nombres(Cliente.buscar_por_nombre("paz")) == ["Carlos"]
+    assert Cliente.buscar_por_nombre("correo") == []
+
+def test_busqueda_por_telefono(db_modelos):
+    """Los últimos dígitos encuentran el teléfono sin importar el formato"""
+    print("\n=== BUSQUEDA POR TELEFONO ===")
+    db = crear_db_temporal(db_modelos)
+    print(f"'4321': {nombres(Cliente.buscar('4321'))}")
+    assert nombres(Cliente.buscar("4321")) == ["Ana", "Andrés"]
+    assert nombres(Cliente.buscar("8765-4321")) == ["Ana"]
+    assert nombres(Cliente.buscar("+56 9 8765 4321")) == ["Ana"]
+    assert nombres(Cliente.buscar("678")) == ["Beatriz"]
+    assert Cliente.buscar("0000") == []
+
+    # La columna invertida sigue los cambios del teléfono
+    db.ejecutar_consulta("UPDATE clientes SET telefono = '+56 9 1111 0000' WHERE nombre = 'Carlos'")
+    assert nombres(Cliente.buscar("0000")) == ["Carlos"]
+
+def test_telefono_usa_indice(db_modelos):
+    """La búsqueda por terminación es un rango sobre idx_clientes_telefono_invertido"""
+    print("\n=== PLAN DE LA BUSQUEDA POR TELEFONO ===")
+    db = crear_db_temporal(db_modelos)
+    conn = db.conectar()
+    consulta = modelo_cliente.MAPEO_CLIENTE.consulta(
+        "telefono_invertido >= '1234' AND telefono_invertido < '1234:' AND +activo=1", "nombre, apellido")
+    plan = [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {consulta}").fetchall()]
+    db.cerrar_conexion()
+    print(f"Plan: {plan}")
+    assert any("idx_clientes_telefono_invertido" in detalle for detalle in plan)
+
+if __name__ == "__main__":
+    print("PRUEBA DE BUSQUEDA DE CLIENTES")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,75 @@
+"""
+Script de prueba para verificar la búsqueda de productos con FTS5
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from models.producto import Producto
+
+def crear_db_temporal(db_name):
+    """Base temporal con algunos perfumes, usada por defecto por el modelo"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, descripcion, marca, tipo, categoria, proveedor, sku, "
+        "precio_compra, precio_venta) VALUES (?, ?, ?, ?, ?, ?, ?, 100, 200)",
+        [
+            ("Sauvage", "Fragancia fresca y especiada", "Dior", "EDT", "Perfumería", "Distribuidora Sur", "DIO101"),
+            ("Bleu de Chanel", "Amaderada aromática", "Chanel", "EDP", "Perfumería", "Distribuidora Sur", "CHA202"),
+            ("Eros", "Notas de menta y vainilla", "Versace", "EDT", "Perfumería", "Importadora Norte", "VER303"),
+            ("Agua de Colonía", "Cítrica", "Genérica", "Colonia", "Perfumería", "Importadora Norte", "GEN404"),
+        ]
+    )
+    return db
+
+def nombres(productos):
+    return [p.nombre for p in productos]
+
+def test_busqueda_por_prefijos(db_modelos):
+    """Las palabras incompletas buscan por prefijo en todas las columnas"""
+    print("\n=== BUSQUEDA POR PREFIJOS ===")
+    crear_db_temporal(db_modelos)
+    print(f"'dio sau': {nombres(Producto.buscar_texto('dio sau'))}")
+    assert nombres(Producto.buscar_texto("dio sau")) == ["Sauvage"]
+    assert nombres(Producto.buscar_texto("cha202")) == ["Bleu de Chanel"]
+    assert nombres(Producto.buscar_texto("import")) == ["Agua de Colonía", "Eros"]
+    assert nombres(Producto.buscar_texto("colonia")) == ["Agua de Colonía"]
+    assert Producto.buscar_texto("dior chanel") == []
+    # Los signos del usuario no rompen la sintaxis de MATCH
+    assert nombres(Producto.buscar_texto('"vainilla" (')) == ["Eros"]
+
+def test_relevancia(db_modelos):
+    """Las coincidencias en el nombre pesan más que en la descripción"""
+    print("\n=== RELEVANCIA ===")
+    db = crear_db_temporal(db_modelos)
+    db.ejecutar_consulta(
+        "INSERT INTO productos (nombre, descripcion, marca, precio_compra, precio_venta) "
+        "VALUES ('Vainilla Intensa', 'Dulce', 'Genérica', 100, 200)")
+    resultado = nombres(Producto.buscar_texto("vainilla"))
+    print(f"'vainilla': {resultado}")
+    assert resultado == ["Vainilla Intensa", "Eros"]
+
+def test_indice_sincronizado(db_modelos):
+    """Los triggers mantienen el índice al modificar, desactivar y borrar"""
+    print("\n=== INDICE SINCRONIZADO ===")
+    db = crear_db_temporal(db_modelos)
+    db.ejecutar_consulta("UPDATE productos SET nombre = 'Sauvage Elixir' WHERE sku = 'DIO101'")
+    assert nombres(Producto.buscar_texto("elixir")) == ["Sauvage Elixir"]
+
+    db.ejecutar_consulta("UPDATE productos SET activo = 0 WHERE sku = 'VER303'")
+    assert Producto.buscar_texto("eros") == []
+
+    db.ejecutar_consulta("DELETE FROM productos WHERE sku = 'CHA202'")
+    assert Producto.buscar_texto("bleu") == []
+
+    # Verificación interna de FTS5 contra la tabla productos
+    assert db.ejecutar_consulta("INSERT INTO productos_fts (productos_fts, rank) VALUES ('integrity-check', 1)") is not None
+    assert db.ejecutar_consulta("SELECT COUNT(*) FROM productos_fts")[0][0] == 3
+
+if __name__ == "__main__":
+    print("PRUEBA DE BUSQUEDA DE PRODUCTOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
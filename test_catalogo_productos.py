@@ -0,0 +1,172 @@
+"""
+Script de prueba para verificar el catálogo de productos en memoria
+"""
+import sys
+import os
+import sqlite3
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.perfilador import PERFILADOR
+from models.producto import Producto, MAPEO_PRODUCTO
+
+def crear_db_temporal(db_name):
+    """Base temporal con algunos productos, usada por defecto por el modelo"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, marca, sku, stock, precio_compra, precio_venta) VALUES (?, ?, ?, 10, 100, 200)",
+        [("Sauvage", "Dior", "DIO101"), ("Eros", "Versace", "VER303"), ("Agua de Colonía", "Genérica", "GEN404")]
+    )
+    return db
+
+def nombres(productos):
+    return [p.nombre for p in productos]
+
+def lecturas_productos(sentencias):
+    return [s for s in sentencias if "productos" in s and not s.startswith("PRAGMA")]
+
+def test_lecturas_desde_memoria(db_modelos):
+    """Sin escrituras, las lecturas repetidas no consultan la tabla"""
+    print("\n=== LECTURAS DESDE MEMORIA ===")
+    crear_db_temporal(db_modelos)
+    assert nombres(Producto.obtener_todos()) == ["Agua de Colonía", "Eros", "Sauvage"]
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        for _ in range(20):
+            Producto.obtener_todos()
+            Producto.buscar_por_id(1)
+    print(f"Sentencias en 40 lecturas: {len(sentencias)} | sobre productos: {len(lecturas_productos(sentencias))}")
+    assert lecturas_productos(sentencias) == []
+
+def test_cambios_incrementales(db_modelos):
+    """Una escritura propia o de otra terminal relee solo las filas cambiadas"""
+    print("\n=== CAMBIOS INCREMENTALES ===")
+    db = crear_db_temporal(db_modelos)
+    Producto.obtener_todos()
+
+    producto = Producto.buscar_por_id(2)
+    producto.db = db
+    producto.stock = 3
+    assert producto.actualizar()
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        eros = [p for p in Producto.obtener_todos() if p.id == 2][0]
+    print(f"Stock de Eros: {eros.stock} | Consultas: {lecturas_productos(sentencias)}")
+    assert eros.stock == 3
+    assert any("version_fila >" in s for s in sentencias)
+    # No se vuelve a leer todo el catálogo
+    assert not any(s.startswith("SELECT id,") and "version_fila" not in s for s in sentencias)
+
+    otra = sqlite3.connect(db.db_name)
+    otra.execute("UPDATE productos SET precio_venta = 250 WHERE sku = 'DIO101'")
+    otra.execute("INSERT INTO productos (nombre, sku, precio_compra, precio_venta) VALUES ('Bleu', 'CHA202', 1, 2)")
+    otra.commit()
+    otra.close()
+    productos = {p.sku: p for p in Producto.obtener_todos()}
+    print(f"Después de la otra terminal: {sorted(productos)}")
+    assert productos["DIO101"].precio_venta == 250
+    assert "CHA202" in productos
+
+def test_bajas_y_borrados(db_modelos):
+    """Los productos desactivados o borrados salen del catálogo"""
+    print("\n=== BAJAS Y BORRADOS ===")
+    db = crear_db_temporal(db_modelos)
+    Producto.obtener_todos()
+    producto = Producto.buscar_por_id(1)
+    producto.db = db
+    producto.eliminar()
+    db.ejecutar_consulta("DELETE FROM productos WHERE sku = 'VER303'")
+    assert nombres(Producto.obtener_todos()) == ["Agua de Colonía"]
+    assert Producto.buscar_por_id(1) is None
+    assert Producto.buscar_exactos("VER303") == []
+
+def test_borrado_e_insercion_entre_lecturas(db_modelos):
+    """Un borrado seguido de un alta (aun con el mismo id) no deja la fila borrada en memoria"""
+    print("\n=== BORRADO E INSERCION ===")
+    db = crear_db_temporal(db_modelos)
+    Producto.obtener_todos()
+
+    otra = sqlite3.connect(db.db_name)
+    otra.execute("DELETE FROM productos WHERE sku = 'DIO101'")
+    otra.execute("INSERT INTO productos (nombre, sku, precio_compra, precio_venta) VALUES ('Nuevo', 'NUE001', 1, 2)")
+    # Borrar el id más alto y volver a insertar: SQLite reutiliza ese id
+    otra.execute("DELETE FROM productos WHERE id = (SELECT MAX(id) FROM productos)")
+    otra.execute("INSERT INTO productos (nombre, sku, precio_compra, precio_venta) VALUES ('Reemplazo', 'REE001', 1, 2)")
+    otra.commit()
+    otra.close()
+
+    print(f"Catálogo: {nombres(Producto.obtener_todos())}")
+    assert nombres(Producto.obtener_todos()) == ["Agua de Colonía", "Eros", "Reemplazo"]
+    assert Producto.buscar_exactos("DIO101") == []
+
+def test_indices_y_copias(db_modelos):
+    """Búsqueda exacta por SKU y nombre normalizado; buscar_por_id da una copia"""
+    print("\n=== INDICES Y COPIAS ===")
+    db = crear_db_temporal(db_modelos)
+    assert nombres(Producto.buscar_exactos(" dio101 ")) == ["Sauvage"]
+    assert nombres(Producto.buscar_exactos("agua de  COLONIA")) == ["Agua de Colonía"]
+    assert Producto.buscar_exactos("sauv") == []
+    producto = Producto()
+    producto.db = db
+    assert producto.sku_existe("GEN404") and not producto.sku_existe("GEN405")
+
+    copia = Producto.buscar_por_id(1)
+    copia.nombre = "Cambiado sin guardar"
+    assert "Cambiado sin guardar" not in nombres(Producto.obtener_todos())
+
+    # Los listados y las búsquedas entregan los objetos de la caché, de solo lectura
+    with pytest.raises(AttributeError):
+        Producto.obtener_todos()[0].nombre = "Cambiado en el listado"
+    with pytest.raises(AttributeError):
+        Producto.buscar_exactos("GEN404")[0].stock = 0
+    assert Producto.buscar_exactos("GEN404")[0].stock == 10
+    assert isinstance(Producto.obtener_todos()[0], Producto)
+    assert Producto.obtener_todos() is Producto.obtener_todos()
+
+def test_listado_sin_copias(db_modelos):
+    """obtener_todos desde memoria no rehidrata objetos: es mucho más rápido que leer la tabla"""
+    print("\n=== LISTADO SIN COPIAS ===")
+    db = DatabaseManager(db_modelos)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, marca, sku, stock, precio_compra, precio_venta) VALUES (?, 'Dior', ?, 10, 100, 200)",
+        [(f"Producto {i}", f"P{i:05d}") for i in range(5000)]
+    )
+    Producto.obtener_todos()
+    repeticiones = 20
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        Producto.obtener_todos()
+    en_memoria = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        MAPEO_PRODUCTO.obtener(db, "activo=1", orden="nombre ASC")
+    sin_cache = (time.perf_counter() - inicio) / repeticiones
+
+    print(f"5000 productos | en memoria: {en_memoria * 1000:.3f} ms | sin caché: {sin_cache * 1000:.1f} ms")
+    assert en_memoria * 20 < sin_cache
+
+def test_transaccion_revertida(db_modelos):
+    """Dentro de una transacción se lee la base; lo revertido no queda en memoria"""
+    print("\n=== TRANSACCION REVERTIDA ===")
+    db = crear_db_temporal(db_modelos)
+    Producto.obtener_todos()
+    try:
+        with db.transaccion():
+            db.ejecutar_consulta("UPDATE productos SET stock = 0 WHERE id = 1")
+            assert Producto.buscar_por_id(1).stock == 0
+            raise ValueError("venta cancelada")
+    except ValueError:
+        pass
+    assert Producto.buscar_por_id(1).stock == 10
+
+    # Los cambios posteriores se siguen detectando
+    db.ejecutar_consulta("UPDATE productos SET stock = 7 WHERE id = 1")
+    assert Producto.buscar_por_id(1).stock == 7
+
+if __name__ == "__main__":
+    print("PRUEBA DEL CATALOGO DE PRODUCTOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
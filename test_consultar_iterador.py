@@ -0,0 +1,49 @@
+"""
+Script de prueba para verificar la lectura por bloques (consultar_iterador)
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+
+def crear_db_con_ventas(db_name, cantidad):
+    """Crear una base temporal con la cantidad indicada de ventas"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO ventas (total, fecha_venta) VALUES (?, ?)",
+        ((i, f"2024-01-01 10:{i % 60:02d}:00") for i in range(cantidad))
+    )
+    return db
+
+def test_iterador_entrega_todas_las_filas(db_name):
+    """El iterador entrega las mismas filas que ejecutar_consulta"""
+    print("\n=== ITERADOR COMPLETO ===")
+    db = crear_db_con_ventas(db_name, 1050)
+    query = "SELECT id, total FROM ventas ORDER BY id"
+
+    filas_iterador = list(db.consultar_iterador(query, tamano_bloque=100))
+    filas_lista = db.ejecutar_consulta(query)
+
+    print(f"Filas por iterador: {len(filas_iterador)} | Filas por lista: {len(filas_lista)}")
+    assert filas_iterador == filas_lista
+
+def test_iterador_cerrado_devuelve_conexion(db_name):
+    """Cerrar el iterador a medias devuelve la conexión al pool"""
+    print("\n=== ITERADOR CERRADO ANTES DE TERMINAR ===")
+    db = crear_db_con_ventas(db_name, 300)
+
+    iterador = db.consultar_iterador("SELECT id FROM ventas", tamano_bloque=50)
+    primera = next(iterador)
+    iterador.close()
+
+    en_uso = db.pool._local.en_uso
+    print(f"Primera fila: {primera} | Conexiones en uso: {en_uso}")
+    assert en_uso == 0
+
+if __name__ == "__main__":
+    print("PRUEBA DE LECTURA POR BLOQUES")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
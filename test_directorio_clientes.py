@@ -0,0 +1,127 @@
+"""
+Script de prueba para verificar el directorio de clientes en memoria
+"""
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.perfilador import PERFILADOR
+from models.cliente import Cliente
+
+def crear_db_temporal(db_name):
+    """Base temporal con algunos clientes, usada por defecto por los modelos"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO clientes (nombre, apellido, telefono, email) VALUES (?, ?, ?, ?)",
+        [("Ana", "Paz", "+56 9 8765-4321", "Ana.Paz@Correo.cl"),
+         ("Luis", "Soto", "22 345 6789", "luis@correo.cl"),
+         ("Berta", "", "", "")]
+    )
+    return db
+
+def nombres(clientes):
+    return [c.nombre for c in clientes]
+
+def test_busquedas_por_indice(db_modelos):
+    """Teléfono, email y nombre completo se buscan sin consultar la tabla"""
+    print("\n=== BUSQUEDAS POR INDICE ===")
+    crear_db_temporal(db_modelos)
+    assert nombres(Cliente.obtener_todos()) == ["Ana", "Berta", "Luis"]
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        assert nombres(Cliente.buscar_en_directorio('telefono', "56987654321")) == ["Ana"]
+        assert nombres(Cliente.buscar_en_directorio('email', " ana.paz@correo.CL ")) == ["Ana"]
+        assert nombres(Cliente.buscar_en_directorio('nombre_completo', "luis  soto")) == ["Luis"]
+        assert nombres(Cliente.buscar_en_directorio('nombre_completo', "Berta")) == ["Berta"]
+        assert Cliente.buscar_en_directorio('telefono', "") == []
+        assert Cliente.buscar_por_id(2).apellido == "Soto"
+    consultas = [s for s in sentencias if "clientes" in s]
+    print(f"Sentencias: {len(sentencias)} | sobre clientes: {consultas}")
+    assert consultas == []
+
+def test_escrituras_del_modelo(db_modelos):
+    """Los cambios hechos con el modelo se ven en la siguiente lectura"""
+    print("\n=== ESCRITURAS DEL MODELO ===")
+    db = crear_db_temporal(db_modelos)
+    Cliente.obtener_todos()
+    cliente = Cliente.buscar_por_id(2)
+    cliente.db = db
+    cliente.telefono = "9 1111 2222"
+    assert cliente.actualizar()
+    assert Cliente.buscar_en_directorio('telefono', "22 345 6789") == []
+    assert nombres(Cliente.buscar_en_directorio('telefono', "911112222")) == ["Luis"]
+
+    nuevo = Cliente(nombre="Carla", apellido="Rios", telefono="123")
+    nuevo.db = db
+    assert nuevo.guardar()
+    assert nombres(Cliente.buscar_en_directorio('telefono', "123")) == ["Carla"]
+
+    cliente.eliminar()
+    print(f"Después de eliminar: {nombres(Cliente.obtener_todos())}")
+    assert nombres(Cliente.obtener_todos()) == ["Ana", "Berta", "Carla"]
+    assert Cliente.buscar_por_id(2) is None
+
+def test_eliminar_y_crear_antes_de_releer(db_modelos):
+    """Un cliente eliminado y otro creado antes de la siguiente lectura: el eliminado no queda en memoria"""
+    print("\n=== ELIMINAR Y CREAR ===")
+    db = crear_db_temporal(db_modelos)
+    Cliente.obtener_todos()
+
+    luis = Cliente.buscar_por_id(2)
+    luis.db = db
+    luis.eliminar()
+    carla = Cliente(nombre="Carla", apellido="Rios", telefono="123")
+    carla.db = db
+    assert carla.guardar()
+
+    print(f"Directorio: {nombres(Cliente.obtener_todos())}")
+    assert nombres(Cliente.obtener_todos()) == ["Ana", "Berta", "Carla"]
+    assert Cliente.buscar_por_id(2) is None
+    assert Cliente.buscar_en_directorio('telefono', "22 345 6789") == []
+
+    # Borrar el cliente de id más alto: el siguiente alta reutiliza su id
+    carla = Cliente.buscar_por_id(4)
+    carla.db = db
+    carla.eliminar()
+    diego = Cliente(nombre="Diego", apellido="Mora")
+    diego.db = db
+    assert diego.guardar()
+    assert nombres(Cliente.obtener_todos()) == ["Ana", "Berta", "Diego"]
+    assert Cliente.buscar_en_directorio('nombre_completo', "carla rios") == []
+
+def test_cambios_de_otra_terminal(db_modelos):
+    """Un cliente creado en otra terminal aparece por data_version"""
+    print("\n=== OTRA TERMINAL ===")
+    db = crear_db_temporal(db_modelos)
+    Cliente.obtener_todos()
+    otra = sqlite3.connect(db.db_name)
+    otra.execute("INSERT INTO clientes (nombre, apellido, email) VALUES ('Diego', 'Mora', 'diego@correo.cl')")
+    otra.commit()
+    otra.close()
+    with PERFILADOR.capturar_sentencias() as sentencias:
+        encontrados = Cliente.buscar_en_directorio('email', "DIEGO@correo.cl")
+    print(f"Encontrados: {nombres(encontrados)} | Releídas: {[s for s in sentencias if 'version_fila >' in s]}")
+    assert nombres(encontrados) == ["Diego"]
+    assert any("version_fila >" in s for s in sentencias)
+
+def test_crear_cliente_con_cuenta(db_modelos):
+    """crear_cliente encuentra al cliente nuevo por el directorio y le abre la cuenta"""
+    print("\n=== CREAR CLIENTE CON CUENTA ===")
+    from controllers.cliente_controller import ClienteController
+    db = crear_db_temporal(db_modelos)
+    creado = ClienteController().crear_cliente({
+        'nombre': "Elena", 'apellido': "Vega", 'telefono': "",
+        'email': "", 'direccion': "", 'ciudad': ""
+    })
+    cuentas = db.ejecutar_consulta(
+        "SELECT c.nombre FROM cuentas_corrientes cc JOIN clientes c ON c.id = cc.cliente_id")
+    print(f"Creado: {creado} | Cuentas: {cuentas}")
+    assert creado and cuentas == [("Elena",)]
+
+if __name__ == "__main__":
+    print("PRUEBA DEL DIRECTORIO DE CLIENTES")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,50 @@
+"""
+Script de prueba para verificar las escrituras masivas (ejecutar_lote)
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+
+def test_insercion_masiva_con_progreso(db_name):
+    """Insertar muchas filas en lotes informando el progreso"""
+    print("\n=== INSERCION MASIVA ===")
+    db = DatabaseManager(db_name)
+    avances = []
+
+    filas = ((f"Producto {i}", 100, 150, i) for i in range(1234))
+    insertadas = db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta, stock) VALUES (?, ?, ?, ?)",
+        filas, tamano_lote=500, progreso=avances.append
+    )
+
+    total = db.ejecutar_consulta("SELECT COUNT(*) FROM productos")[0][0]
+    print(f"Filas insertadas: {insertadas} | En tabla: {total} | Avances: {avances}")
+    assert insertadas == 1234
+    assert total == 1234
+    assert avances == [500, 1000, 1234]
+
+def test_lote_con_error_se_revierte(db_name):
+    """Un error en cualquier fila revierte el lote completo"""
+    print("\n=== REVERSION ANTE ERROR ===")
+    db = DatabaseManager(db_name)
+
+    # La tercera fila viola NOT NULL en nombre
+    filas = [("A", 1, 2), ("B", 1, 2), (None, 1, 2), ("D", 1, 2)]
+    resultado = db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+        filas, tamano_lote=2
+    )
+
+    total = db.ejecutar_consulta("SELECT COUNT(*) FROM productos")[0][0]
+    print(f"Resultado: {resultado} | Filas en tabla: {total}")
+    assert resultado is None
+    assert total == 0
+
+if __name__ == "__main__":
+    print("PRUEBA DE ESCRITURAS MASIVAS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,119 @@
+"""
+Script de prueba para verificar el ejecutor de base de datos en segundo plano
+"""
+import sys
+import os
+import threading
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.ejecutor_db import EjecutorDB
+
+def test_consulta_en_hilo_trabajador(db_name):
+    """La consulta se ejecuta fuera del hilo que la envía"""
+    print("\n=== CONSULTA EN SEGUNDO PLANO ===")
+    DatabaseManager(db_name).ejecutar_consulta(
+        "INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+
+    ejecutor = EjecutorDB()
+    hilo = ejecutor.enviar(lambda: threading.current_thread().name).result(timeout=5)
+    filas = ejecutor.consultar("SELECT nombre FROM clientes", db_name=db_name).result(timeout=5)
+    ejecutor.cerrar()
+
+    print(f"Hilo: {hilo} | Filas: {filas}")
+    assert hilo != threading.current_thread().name
+    assert filas == [("Ana",)]
+
+def test_trabajos_en_orden():
+    """Con un solo hilo los trabajos terminan en el orden de envío"""
+    print("\n=== ORDEN DE TRABAJOS ===")
+    ejecutor = EjecutorDB()
+    orden = []
+    futuros = [ejecutor.enviar(orden.append, i) for i in range(20)]
+    for futuro in futuros:
+        futuro.result(timeout=5)
+    ejecutor.cerrar()
+
+    assert orden == list(range(20))
+
+class WidgetFalso:
+    """Sustituto de un widget de Tk: guarda los after() para ejecutarlos a mano"""
+    def __init__(self):
+        self.pendientes = []
+        self.existe = True
+
+    def after(self, ms, funcion):
+        self.pendientes.append(funcion)
+
+    def winfo_exists(self):
+        return self.existe
+
+    def procesar(self, hasta):
+        """Ejecutar los after() pendientes hasta que hasta() sea verdadero"""
+        limite = time.monotonic() + 5
+        while not hasta() and time.monotonic() < limite:
+            if self.pendientes:
+                self.pendientes.pop(0)()
+            else:
+                time.sleep(0.001)
+
+def test_entrega_por_bloques(db_name):
+    """Las filas llegan de a bloques y la lectura nunca se adelanta más de uno"""
+    print("\n=== ENTREGA POR BLOQUES ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote("INSERT INTO clientes (nombre) VALUES (?)", ((f"Cliente {i}",) for i in range(1234)))
+
+    leidas = []
+    def producir():
+        for fila in db.consultar_iterador("SELECT nombre FROM clientes ORDER BY id", tamano_bloque=100):
+            leidas.append(fila)
+            yield fila
+
+    ejecutor = EjecutorDB()
+    widget = WidgetFalso()
+    bloques, adelanto, fin = [], [], []
+    def recibir(bloque):
+        bloques.append(len(bloque))
+        adelanto.append(len(leidas) - sum(bloques))
+
+    ejecutor.entregar_por_bloques_en_tk(widget, producir, recibir, lambda: fin.append(True), tamano_bloque=100)
+    widget.procesar(lambda: fin)
+    en_uso = ejecutor.enviar(lambda: db.pool._local.en_uso).result(timeout=5)
+    ejecutor.cerrar()
+
+    print(f"Bloques: {len(bloques)} | Adelanto máximo de la lectura: {max(adelanto)}")
+    assert sum(bloques) == 1234 and max(bloques) == 100
+    # Como mucho se leyó la fila que indica el fin del bloque siguiente
+    assert max(adelanto) <= 1
+    assert en_uso == 0
+
+def test_entrega_por_bloques_se_cancela(db_name):
+    """Si el receptor retorna False el recorrido se cierra y devuelve su conexión"""
+    print("\n=== CANCELACION DE LA ENTREGA ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote("INSERT INTO clientes (nombre) VALUES (?)", ((f"Cliente {i}",) for i in range(500)))
+
+    ejecutor = EjecutorDB()
+    widget = WidgetFalso()
+    bloques = []
+    def recibir(bloque):
+        bloques.append(bloque)
+        return False
+
+    ejecutor.entregar_por_bloques_en_tk(
+        widget, lambda: db.consultar_iterador("SELECT nombre FROM clientes"), recibir, tamano_bloque=50)
+    widget.procesar(lambda: bloques)
+    en_uso = ejecutor.enviar(lambda: db.pool._local.en_uso).result(timeout=5)
+    ejecutor.cerrar()
+
+    print(f"Bloques recibidos: {len(bloques)} | Conexión en uso: {en_uso}")
+    assert len(bloques) == 1
+    assert en_uso == 0
+
+if __name__ == "__main__":
+    print("PRUEBA DEL EJECUTOR DE BASE DE DATOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,72 @@
+"""
+Script de prueba para verificar los índices y los planes de consulta
+de los modelos
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.migraciones import indices_faltantes
+from config.plan_consultas import verificar_consultas_modelos, obtener_plan, es_recorrido_completo
+from controllers.reporte_controller import ReporteController
+
+def test_indices_creados():
+    """Verificar que existan todos los índices administrados"""
+    print("\n=== INDICES ADMINISTRADOS ===")
+    db = DatabaseManager()
+    conn = db.conectar()
+    faltantes = indices_faltantes(conn.cursor())
+    db.cerrar_conexion()
+
+    print(f"Índices faltantes: {faltantes if faltantes else 'ninguno'}")
+    assert faltantes == []
+
+# Listados que a propósito leen todas las filas, en el orden de un índice
+# (Venta.obtener_todas: todas las ventas por fecha)
+LISTADOS_COMPLETOS = {"SCAN v USING INDEX idx_ventas_fecha"}
+
+def test_consultas_sin_scan():
+    """Verificar que ninguna consulta de los modelos recorra tablas o índices completos"""
+    print("\n=== PLANES DE CONSULTA DE LOS MODELOS ===")
+    con_recorridos = verificar_consultas_modelos()
+    inesperados = [detalle for r in con_recorridos for detalle in r['recorridos']
+                   if detalle not in LISTADOS_COMPLETOS]
+    assert inesperados == []
+
+def test_scan_de_indice_es_recorrido():
+    """Un SCAN sobre un índice (cubriente o no) también es un recorrido completo"""
+    print("\n=== SCAN DE INDICE ===")
+    assert es_recorrido_completo("SCAN productos")
+    assert es_recorrido_completo("SCAN v USING INDEX idx_ventas_fecha")
+    assert es_recorrido_completo("SCAN productos USING COVERING INDEX idx_productos_sku")
+    assert not es_recorrido_completo("SCAN productos_fts VIRTUAL TABLE INDEX 0:M1")
+    assert not es_recorrido_completo("SEARCH productos USING INDEX idx_productos_sku (sku=?)")
+
+def test_filtros_fecha_usan_indice():
+    """Los filtros por rango de días recorren solo el rango del índice de fecha_dia"""
+    print("\n=== FILTROS DE FECHA ===")
+    db = DatabaseManager()
+    conn = db.conectar()
+    rango = " WHERE v.fecha_dia >= '2024-01-01' AND v.fecha_dia < '2024-02-01'"
+    consultas = [
+        "SELECT id FROM ventas v" + rango,
+        ReporteController.QUERY_LISTADO_VENTAS + rango + " ORDER BY v.fecha_venta DESC",
+    ]
+    planes = [obtener_plan(conn, consulta) for consulta in consultas]
+    db.cerrar_conexion()
+
+    for plan in planes:
+        print(plan)
+        assert any("idx_ventas_fecha_dia (fecha_dia>? AND fecha_dia<?)" in detalle for detalle in plan)
+
+if __name__ == "__main__":
+    print("PRUEBA DE INDICES Y PLANES DE CONSULTA")
+    print("="*50)
+
+    test_indices_creados()
+    test_consultas_sin_scan()
+    test_scan_de_indice_es_recorrido()
+    test_filtros_fecha_usan_indice()
+
+    print("\n=== PRUEBA COMPLETADA ===")
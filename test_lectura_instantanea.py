@@ -0,0 +1,70 @@
+"""
+Script de prueba para verificar las conexiones de solo lectura de los reportes
+"""
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+
+def test_conexion_solo_lectura(db_name):
+    """Las conexiones de reportes rechazan escrituras"""
+    print("\n=== SOLO LECTURA ===")
+    lector = DatabaseManager(db_name, solo_lectura=True)
+
+    pragmas = lector.estado_pragmas()
+    resultado = lector.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES ('Ana', 'Paz')")
+    print(f"query_only: {pragmas['query_only']} | Resultado INSERT: {resultado}")
+
+    assert pragmas['query_only'] == 1
+    assert resultado is None
+    assert lector.ejecutar_consulta("SELECT COUNT(*) FROM clientes")[0][0] == 0
+
+def test_instantanea_coherente(db_name):
+    """Dentro de la instantánea no se ven las escrituras concurrentes"""
+    print("\n=== INSTANTANEA ===")
+    escritor = DatabaseManager(db_name)
+    lector = DatabaseManager(db_name, solo_lectura=True)
+    escritor.ejecutar_consulta("INSERT INTO ventas (total) VALUES (100)")
+
+    with lector.instantanea():
+        antes = lector.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+        escritor.ejecutar_consulta("INSERT INTO ventas (total) VALUES (50)")
+        durante = lector.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+
+    despues = lector.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+    print(f"Antes: {antes} | Durante: {durante} | Después: {despues}")
+
+    assert antes == durante == 100
+    assert despues == 150
+
+def test_transaccion_dentro_de_instantanea(db_name):
+    """transaccion() dentro de instantanea() se rechaza sin confirmar ni romper la instantánea"""
+    print("\n=== TRANSACCION DENTRO DE INSTANTANEA ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("INSERT INTO ventas (total) VALUES (100)")
+
+    with db.instantanea():
+        antes = db.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+        otra = sqlite3.connect(db_name)
+        otra.execute("INSERT INTO ventas (total) VALUES (50)")
+        otra.commit()
+        otra.close()
+        with pytest.raises(sqlite3.OperationalError):
+            with db.transaccion():
+                db.ejecutar_consulta("INSERT INTO ventas (total) VALUES (7)")
+        durante = db.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+
+    despues = db.ejecutar_consulta("SELECT SUM(total) FROM ventas")[0][0]
+    print(f"Antes: {antes} | Durante: {durante} | Después: {despues}")
+    assert antes == durante == 100
+    assert despues == 150
+    assert not db.en_transaccion()
+
+if __name__ == "__main__":
+    print("PRUEBA DE CONEXIONES DE SOLO LECTURA")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
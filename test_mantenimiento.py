@@ -0,0 +1,162 @@
+"""
+Script de prueba para verificar el mantenimiento de la base de datos
+"""
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.mantenimiento import MantenimientoDB
+from models.cliente import DirectorioClientes
+
+def crear_mantenimiento(db_name):
+    """Mantenimiento que escribe su registro junto a la base temporal"""
+    return MantenimientoDB(db_name, archivo_log=db_name + ".log")
+
+def test_auto_vacuum_incremental(db_name):
+    """La migración deja la base con auto_vacuum incremental"""
+    print("\n=== AUTO_VACUUM ===")
+    db = DatabaseManager(db_name)
+    modo = db.ejecutar_consulta("PRAGMA auto_vacuum")[0][0]
+    print(f"auto_vacuum: {modo}")
+    assert modo == 2
+
+def test_base_existente_se_compacta_en_inactividad(db_name):
+    """En una base antigua la migración no hace VACUUM; lo hace el mantenimiento"""
+    print("\n=== VACUUM PENDIENTE EN BASE ANTIGUA ===")
+    conn = sqlite3.connect(db_name)
+    conn.execute("CREATE TABLE notas (texto TEXT)")
+    conn.executemany("INSERT INTO notas VALUES (?)", (("x" * 300,) for _ in range(2000)))
+    conn.commit()
+    conn.close()
+
+    DatabaseManager(db_name).ejecutar_consulta("SELECT 1")
+    mantenimiento = crear_mantenimiento(db_name)
+    assert mantenimiento.auto_vacuum_pendiente()
+
+    # Con el sistema en uso no se reconstruye el archivo
+    mantenimiento.revisar()
+    assert mantenimiento.auto_vacuum_pendiente()
+
+    mantenimiento.SEGUNDOS_INACTIVIDAD = 0
+    mantenimiento.revisar()
+    registro = mantenimiento.historial[-1]
+    print(f"Registro: {registro}")
+    assert registro['operacion'] == "vacuum"
+    assert not mantenimiento.auto_vacuum_pendiente()
+
+def test_vacuum_incremental_libera_paginas(db_name):
+    """Después de borrar muchas filas el archivo se reduce"""
+    print("\n=== INCREMENTAL VACUUM ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+        ((f"Producto {i} " + "x" * 300, 100, 150) for i in range(3000))
+    )
+    db.ejecutar_consulta("DELETE FROM productos")
+
+    mantenimiento = crear_mantenimiento(db_name)
+    libres = mantenimiento.paginas_libres()
+    registro = mantenimiento.vacuum_incremental()
+    print(f"Páginas libres: {libres} | Registro: {registro}")
+
+    assert libres > 0
+    assert registro['paginas_libres_despues'] == 0
+    assert registro['bytes_despues'] < registro['bytes_antes']
+    assert registro['detalle']['paginas_liberadas'] == libres
+    assert mantenimiento.historial[-1] is registro
+
+def test_vacuum_incremental_se_detiene(db_name):
+    """El vacuum se interrumpe si el sistema deja de estar inactivo"""
+    print("\n=== INTERRUPCION DEL VACUUM ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+        ((f"Producto {i} " + "x" * 300, 100, 150) for i in range(3000))
+    )
+    db.ejecutar_consulta("DELETE FROM productos")
+
+    mantenimiento = crear_mantenimiento(db_name)
+    mantenimiento.PAGINAS_POR_PASO = 10
+    pasos = []
+    registro = mantenimiento.vacuum_incremental(continuar=lambda: len(pasos) < 3 and not pasos.append(1))
+    print(f"Páginas liberadas: {registro['detalle']['paginas_liberadas']}")
+
+    assert registro['detalle']['paginas_liberadas'] == 30
+    assert registro['paginas_libres_despues'] > 0
+
+def test_analyze_despues_de_escrituras_masivas(db_name):
+    """ANALYZE se ejecuta solo cuando las escrituras masivas superan el umbral"""
+    print("\n=== ANALYZE TRAS ESCRITURAS MASIVAS ===")
+    db = DatabaseManager(db_name)
+    mantenimiento = crear_mantenimiento(db_name)
+    # Descartar lo que registró la migración
+    db.pool.tomar_cambios()
+
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+        ((f"Producto {i}", 100, 150) for i in range(600))
+    )
+    primero = mantenimiento.analizar_si_corresponde()
+
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+        ((f"Producto {i}", 100, 150) for i in range(600))
+    )
+    segundo = mantenimiento.analizar_si_corresponde()
+
+    estadisticas = db.ejecutar_consulta("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'productos'")[0][0]
+    print(f"Primero: {primero} | Segundo: {segundo and segundo['operacion']} | Stats: {estadisticas}")
+
+    assert primero is None
+    assert segundo['operacion'] == "analyze"
+    assert estadisticas > 0
+    assert db.pool.filas_sin_analizar == 0
+
+def test_optimize_registra_tamano_y_tiempo(db_name):
+    """PRAGMA optimize deja su registro en el archivo de mantenimiento"""
+    print("\n=== OPTIMIZE ===")
+    DatabaseManager(db_name).ejecutar_consulta("SELECT 1")
+    mantenimiento = crear_mantenimiento(db_name)
+
+    mantenimiento.detener()
+    registro = mantenimiento.historial[-1]
+    print(f"Registro: {registro}")
+
+    assert registro['operacion'] == "optimize"
+    assert registro['segundos'] >= 0
+    assert registro['bytes_antes'] > 0
+
+def test_depurar_filas_borradas(db_name):
+    """Se depuran las anotaciones ya vistas, sin perder la numeración ni los borrados no vistos"""
+    print("\n=== DEPURAR FILAS BORRADAS ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote("INSERT INTO clientes (nombre, apellido) VALUES (?, '')", [(f"C{i}",) for i in range(50)])
+    directorio = DirectorioClientes.obtener(db_name).consultar(db)
+    # Caché de otra terminal: no se registra en este proceso
+    otra_terminal = DirectorioClientes(db_name).consultar(db)
+
+    db.ejecutar_consulta("DELETE FROM clientes WHERE id <= 40")
+    version_borrada = db.ejecutar_consulta("SELECT MAX(version_fila) FROM filas_borradas")[0][0]
+    directorio.consultar(db)
+
+    registro = crear_mantenimiento(db_name).depurar_filas_borradas()
+    restantes = db.ejecutar_consulta("SELECT COUNT(*) FROM filas_borradas")[0][0]
+    print(f"Depuradas: {registro['detalle']} | Restantes: {restantes}")
+    assert registro['detalle'] == {'anotaciones_borradas': 39}
+    assert restantes == 1
+
+    # La caché que no vio los borrados relee la tabla completa
+    assert len(otra_terminal.consultar(db).todos()) == 10
+    # La numeración sigue después de la versión más alta borrada
+    db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES ('Nuevo', '')")
+    assert db.ejecutar_consulta("SELECT version_fila FROM clientes WHERE nombre = 'Nuevo'")[0][0] > version_borrada
+    assert len(directorio.consultar(db).todos()) == 11
+
+if __name__ == "__main__":
+    print("PRUEBA DE MANTENIMIENTO DE LA BASE DE DATOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,62 @@
+"""
+Script de prueba para verificar el mapeo de filas a modelos por nombre de columna
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from models.producto import Producto, MAPEO_PRODUCTO
+from models.venta import MAPEO_VENTA
+
+def test_hidratacion_productos(db_name):
+    """Los productos se arman por nombre de columna y sin NULL en los campos nuevos"""
+    print("\n=== HIDRATACION DE PRODUCTOS ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta, stock, marca, sku) VALUES (?, ?, ?, ?, ?, ?)",
+        ("Perfume", 100, 150, 7, None, "ABC123"))
+
+    producto = MAPEO_PRODUCTO.obtener_uno(db, "nombre = ?", ("Perfume",))
+    print(f"{producto} | marca='{producto.marca}' | sku={producto.sku}")
+
+    assert isinstance(producto, Producto)
+    assert producto.stock == 7
+    assert producto.marca == ""
+    assert producto.sku == "ABC123"
+    # __slots__: sin diccionario de atributos por instancia
+    assert not hasattr(producto, '__dict__')
+
+def test_columna_nueva_no_altera_mapeo(db_name):
+    """Agregar columnas a la tabla no desplaza los valores mapeados"""
+    print("\n=== COLUMNA NUEVA ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("INSERT INTO productos (nombre, precio_compra, precio_venta, stock) VALUES ('A', 1, 2, 3)")
+    db.ejecutar_consulta("ALTER TABLE productos ADD COLUMN codigo_barras TEXT")
+
+    producto = MAPEO_PRODUCTO.obtener(db)[0]
+    print(f"nombre={producto.nombre} stock={producto.stock}")
+    assert producto.nombre == "A"
+    assert producto.stock == 3
+
+def test_listado_ventas_con_cliente(db_name):
+    """El listado de ventas arma el nombre del cliente e inicializa los detalles"""
+    print("\n=== LISTADO DE VENTAS ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES ('Ana', 'Paz')")
+    db.ejecutar_consulta("INSERT INTO ventas (cliente_id, total) VALUES (1, 500)")
+    db.ejecutar_consulta("INSERT INTO ventas (cliente_id, total) VALUES (NULL, 80)")
+
+    ventas = list(MAPEO_VENTA.iterar(db, orden="v.id"))
+    print([(v.id, v.cliente_nombre, v.total) for v in ventas])
+
+    assert ventas[0].cliente_nombre == "Ana Paz"
+    assert ventas[1].cliente_nombre == ""
+    assert ventas[0].detalles == [] and ventas[0].detalles is not ventas[1].detalles
+
+if __name__ == "__main__":
+    print("PRUEBA DE MAPEO DE MODELOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
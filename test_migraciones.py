@@ -0,0 +1,73 @@
+"""
+Script de prueba para verificar las migraciones versionadas del esquema
+"""
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.migraciones import MIGRACIONES, aplicar_migraciones, columnas_tabla
+
+def test_constructor_sin_io(db_name):
+    """Verificar que crear un DatabaseManager no toca el disco"""
+    print("\n=== CONSTRUCTOR SIN E/S ===")
+    DatabaseManager(db_name)
+
+    print(f"Archivo creado por el constructor: {'SI' if os.path.exists(db_name) else 'NO'}")
+    assert not os.path.exists(db_name)
+
+def test_esquema_versionado(db_name):
+    """Verificar que todas las migraciones quedan registradas"""
+    print("\n=== VERSIONES APLICADAS ===")
+    db = DatabaseManager(db_name)
+
+    versiones = db.ejecutar_consulta("SELECT version FROM schema_version ORDER BY version")
+    versiones = [fila[0] for fila in versiones]
+    print(f"Versiones: {versiones}")
+    assert versiones == [m[0] for m in MIGRACIONES]
+
+    # Una segunda ejecución no debe aplicar nada
+    conn = sqlite3.connect(db_name)
+    assert aplicar_migraciones(conn) == 0
+    conn.close()
+
+def test_base_existente_sin_version(db_name):
+    """Verificar la actualización de una base creada antes de las migraciones"""
+    print("\n=== BASE ANTIGUA SIN schema_version ===")
+
+    conn = sqlite3.connect(db_name)
+    conn.execute('''
+        CREATE TABLE productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            precio_compra REAL NOT NULL,
+            precio_venta REAL NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0,
+            stock_minimo INTEGER DEFAULT 5,
+            categoria TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT 1,
+            marca TEXT
+        )
+    ''')
+    conn.execute("INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES ('Antiguo', 1, 2)")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(db_name)
+    conn = db.conectar()
+    columnas = columnas_tabla(conn.cursor(), "productos")
+    db.cerrar_conexion()
+
+    print(f"Columnas de productos: {columnas}")
+    assert 'sku' in columnas and 'marca' in columnas
+    assert db.ejecutar_consulta("SELECT nombre FROM productos") == [('Antiguo',)]
+
+if __name__ == "__main__":
+    print("PRUEBA DE MIGRACIONES DEL ESQUEMA")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,53 @@
+"""
+Script de prueba para verificar los perfiles de rendimiento de SQLite
+"""
+import sys
+import os
+import json
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.perfil_sqlite import ARCHIVO_CONFIGURACION, PERFILES
+
+def test_perfil_pos_por_defecto(db_name):
+    """Verificar que las conexiones usan WAL y el perfil pos"""
+    print("\n=== PERFIL POR DEFECTO ===")
+    db = DatabaseManager(db_name)
+    pragmas = db.estado_pragmas()
+    print(f"PRAGMAs: {pragmas}")
+
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['busy_timeout'] == PERFILES['pos']['busy_timeout']
+    assert pragmas['cache_size'] == PERFILES['pos']['cache_size']
+    assert pragmas['synchronous'] == 1  # NORMAL
+
+def test_perfil_explicito(db_name):
+    """Verificar que un perfil explícito usa sus propios valores"""
+    print("\n=== PERFIL reporting ===")
+    db = DatabaseManager(db_name, perfil="reporting")
+    pragmas = db.estado_pragmas()
+    print(f"PRAGMAs: {pragmas}")
+
+    assert pragmas['synchronous'] == 1  # NORMAL
+    assert pragmas['cache_size'] == PERFILES['reporting']['cache_size']
+
+def test_configuracion_desde_archivo(db_name):
+    """Verificar que el archivo JSON modifica el perfil"""
+    print("\n=== CONFIGURACION DESDE ARCHIVO ===")
+    ruta = os.path.join(os.path.dirname(db_name), ARCHIVO_CONFIGURACION)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({"perfil": "reporting", "pragmas": {"cache_size": -1234}}, archivo)
+
+    db = DatabaseManager(db_name)
+    pragmas = db.estado_pragmas()
+    print(f"PRAGMAs: {pragmas}")
+
+    assert pragmas['cache_size'] == -1234
+    assert pragmas['busy_timeout'] == PERFILES['reporting']['busy_timeout']
+
+if __name__ == "__main__":
+    print("PRUEBA DE PERFILES DE SQLITE")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,66 @@
+"""
+Script de prueba para verificar el perfilador de consultas
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.perfilador import PerfiladorConsultas, PERFILADOR, normalizar_consulta
+
+def test_normalizacion():
+    """Los literales y espacios no generan entradas distintas"""
+    print("\n=== NORMALIZACION ===")
+    a = normalizar_consulta("SELECT *  FROM productos\n WHERE id = 5 AND nombre = 'Perfume'")
+    b = normalizar_consulta("SELECT * FROM productos WHERE id = 12 AND nombre = 'O''Neil'")
+    c = normalizar_consulta("SELECT * FROM ventas WHERE id IN (1, 2, 3)")
+    print(a)
+    print(c)
+    assert a == b == "SELECT * FROM productos WHERE id = ? AND nombre = ?"
+    assert c == "SELECT * FROM ventas WHERE id IN (?...)"
+
+def test_registro_desde_database_manager(db_name):
+    """ejecutar_consulta y las sentencias directas quedan registradas"""
+    print("\n=== REGISTRO DE CONSULTAS ===")
+    db = DatabaseManager(db_name)
+    PERFILADOR.reiniciar()
+
+    for i in range(5):
+        db.ejecutar_consulta("INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)",
+                             (f"P{i}", 1, 2))
+    db.ejecutar_consulta("SELECT id FROM productos")
+
+    # Sentencia ejecutada directamente sobre la conexión
+    conn = db.conectar()
+    conn.execute("SELECT COUNT(*) FROM clientes").fetchone()
+    db.cerrar_conexion()
+
+    resumen = {fila['consulta']: fila for fila in PERFILADOR.resumen()}
+    print(PERFILADOR.texto_resumen())
+
+    insercion = resumen["INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES (?, ?, ?)"]
+    assert insercion['llamadas'] == 5
+    assert insercion['filas'] == 5
+    assert resumen["SELECT id FROM productos"]['filas'] == 5
+    assert resumen["SELECT COUNT(*) FROM clientes"]['llamadas'] == 1
+
+def test_registro_consultas_lentas(tmp_path):
+    """Las consultas sobre el umbral se escriben en el archivo rotativo"""
+    print("\n=== CONSULTAS LENTAS ===")
+    archivo_log = str(tmp_path / "lentas.log")
+    perfilador = PerfiladorConsultas()
+    perfilador.configurar({'umbral_lento_ms': 0, 'archivo_log': archivo_log})
+
+    perfilador.registrar("SELECT * FROM ventas WHERE id = 7", perfilador.medir(), 1)
+
+    with open(archivo_log, encoding='utf-8') as archivo:
+        contenido = archivo.read()
+    print(contenido.strip())
+    assert "SELECT * FROM ventas WHERE id = ?" in contenido
+
+if __name__ == "__main__":
+    print("PRUEBA DEL PERFILADOR DE CONSULTAS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
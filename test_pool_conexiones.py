@@ -0,0 +1,107 @@
+"""
+Script de prueba para verificar el pool de conexiones persistentes
+"""
+import sys
+import os
+import sqlite3
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager, PoolConexiones
+
+def test_misma_conexion_por_hilo(db_name):
+    """Verificar que las consultas de un hilo reutilizan la conexión"""
+    print("\n=== CONEXION REUTILIZADA EN EL HILO ===")
+    db1 = DatabaseManager(db_name)
+    db2 = DatabaseManager(db_name)
+
+    conn1 = db1.conectar()
+    db1.cerrar_conexion()
+    conn2 = db2.conectar()
+    db2.cerrar_conexion()
+
+    print(f"Misma conexión: {'SI' if conn1 is conn2 else 'NO'}")
+    assert conn1 is conn2
+
+def test_conexion_distinta_por_hilo(db_name):
+    """Verificar que cada hilo recibe su propia conexión"""
+    print("\n=== CONEXION INDEPENDIENTE POR HILO ===")
+    pool = PoolConexiones.obtener(db_name)
+
+    conn_principal = pool.obtener_conexion()
+    pool.devolver_conexion(conn_principal)
+
+    conexiones = []
+    def trabajo():
+        conn = pool.obtener_conexion()
+        conexiones.append(conn)
+        pool.devolver_conexion(conn)
+
+    hilo = threading.Thread(target=trabajo)
+    hilo.start()
+    hilo.join()
+
+    print(f"Conexión distinta en otro hilo: {'SI' if conexiones[0] is not conn_principal else 'NO'}")
+    assert conexiones[0] is not conn_principal
+
+def test_reconexion_tras_cierre(db_name):
+    """Verificar que una conexión cerrada se reemplaza en el checkout"""
+    print("\n=== VERIFICACION DE SALUD ===")
+    pool = PoolConexiones.obtener(db_name)
+
+    conn = pool.obtener_conexion()
+    pool.devolver_conexion(conn)
+    conn.close()
+
+    # Forzar la verificación en el próximo checkout
+    pool._local.ultimo_uso -= PoolConexiones.INTERVALO_VERIFICACION + 1
+    nueva = pool.obtener_conexion()
+    resultado = nueva.execute("SELECT 1").fetchone()
+    pool.devolver_conexion(nueva)
+
+    print(f"Conexión reemplazada: {'SI' if nueva is not conn else 'NO'}")
+    assert nueva is not conn
+    assert resultado == (1,)
+
+def test_transaccion_pendiente_se_revierte(db_name):
+    """Verificar que devolver la conexión descarta cambios sin confirmar"""
+    print("\n=== DEVOLUCION CON TRANSACCION ABIERTA ===")
+    db = DatabaseManager(db_name)
+
+    conn = db.conectar()
+    conn.execute("INSERT INTO clientes (nombre) VALUES ('Sin confirmar')")
+    db.cerrar_conexion()
+
+    resultado = db.ejecutar_consulta("SELECT COUNT(*) FROM clientes")
+    print(f"Clientes tras devolver sin commit: {resultado[0][0]}")
+    assert resultado[0][0] == 0
+
+def test_conexiones_de_hilos_terminados(db_name):
+    """Las conexiones de hilos que terminaron se cierran al abrir otra"""
+    print("\n=== HILOS TERMINADOS ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("SELECT 1")
+    pool = db.pool
+
+    abandonadas = []
+    def trabajo():
+        db.ejecutar_consulta("SELECT COUNT(*) FROM productos")
+        abandonadas.append(pool._local.conexion)
+
+    for _ in range(20):
+        hilo = threading.Thread(target=trabajo)
+        hilo.start()
+        hilo.join()
+
+    print(f"Hilos: 20 | Conexiones abiertas: {len(pool._conexiones)}")
+    # La del hilo principal y, como mucho, la del último hilo
+    assert len(pool._conexiones) <= 2
+    with pytest.raises(sqlite3.ProgrammingError):
+        abandonadas[0].execute("SELECT 1")
+
+if __name__ == "__main__":
+    print("PRUEBA DEL POOL DE CONEXIONES")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
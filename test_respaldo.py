@@ -0,0 +1,193 @@
+"""
+Script de prueba para verificar el respaldo en línea (MotorRespaldo)
+"""
+import sys
+import os
+import sqlite3
+import threading
+import lzma
+from datetime import datetime, timedelta
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from utils.respaldo import MotorRespaldo, PlanificadorRespaldos, seleccionar_conservados
+
+def crear_db_temporal(db_name):
+    """Crear una base de datos temporal con algunos miles de productos"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote(
+        "INSERT INTO productos (nombre, precio_compra, precio_venta, stock) VALUES (?, ?, ?, ?)",
+        ((f"Producto {i} " + "x" * 200, 100, 150, i) for i in range(5000))
+    )
+
+def test_respaldo_con_progreso(db_name):
+    """La copia se verifica y el progreso llega hasta el total de páginas"""
+    print("\n=== RESPALDO CON PROGRESO ===")
+    crear_db_temporal(db_name)
+    destino = db_name.replace(".db", "_copia.db")
+    avances = []
+
+    resultado = MotorRespaldo(db_name, paginas_por_paso=16).respaldar(
+        destino, progreso=lambda copiadas, total: avances.append((copiadas, total))
+    )
+
+    copia = sqlite3.connect(destino)
+    filas = copia.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+    modo = copia.execute("PRAGMA journal_mode").fetchone()[0]
+    copia.close()
+    print(f"Resultado: {resultado} | Avances: {len(avances)} | Filas: {filas}")
+
+    assert resultado['verificacion'] == "ok"
+    assert filas == 5000
+    assert modo == "delete"
+    assert len(avances) > 1
+    assert avances[-1][0] == avances[-1][1]
+    assert not os.path.exists(destino + ".parcial")
+
+def test_respaldo_coherente_con_escrituras(db_name):
+    """Las escrituras concurrentes no bloquean ni corrompen la copia"""
+    print("\n=== RESPALDO CON ESCRITURAS CONCURRENTES ===")
+    crear_db_temporal(db_name)
+    destino = db_name.replace(".db", "_copia.db")
+    terminado = threading.Event()
+    escrituras = []
+
+    def escribir():
+        db = DatabaseManager(db_name)
+        while not terminado.is_set():
+            db.ejecutar_consulta("INSERT INTO ventas (total) VALUES (10)")
+            escrituras.append(1)
+
+    hilo = threading.Thread(target=escribir)
+    hilo.start()
+    try:
+        resultado = MotorRespaldo(db_name, paginas_por_paso=8, pausa=0.001).respaldar(destino)
+    finally:
+        terminado.set()
+        hilo.join()
+
+    copia = sqlite3.connect(destino)
+    productos = copia.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+    ventas = copia.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+    copia.close()
+    print(f"Verificación: {resultado['verificacion']} | Escrituras: {len(escrituras)} | "
+          f"Ventas en copia: {ventas}")
+
+    assert resultado['verificacion'] == "ok"
+    assert productos == 5000
+    assert ventas <= len(escrituras)
+    assert len(escrituras) > 0
+
+def test_respaldo_en_segundo_plano(db_name):
+    """El respaldo puede correr en el hilo dedicado"""
+    print("\n=== RESPALDO EN SEGUNDO PLANO ===")
+    crear_db_temporal(db_name)
+    destino = db_name.replace(".db", "_copia.db")
+
+    futuro = MotorRespaldo(db_name).respaldar_en_segundo_plano(destino)
+    resultado = futuro.result(timeout=30)
+    print(f"Resultado: {resultado}")
+
+    assert resultado['destino'] == destino
+    assert os.path.exists(destino)
+
+def test_respaldo_comprimido(db_name):
+    """El respaldo comprimido con lzma se descomprime en una base válida"""
+    print("\n=== RESPALDO COMPRIMIDO ===")
+    crear_db_temporal(db_name)
+    destino = db_name.replace(".db", "_copia.db")
+
+    resultado = MotorRespaldo(db_name).respaldar(destino, compresion="lzma")
+    restaurado = destino + ".restaurado"
+    with lzma.open(resultado['destino'], 'rb') as entrada, open(restaurado, 'wb') as salida:
+        salida.write(entrada.read())
+
+    copia = sqlite3.connect(restaurado)
+    filas = copia.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+    copia.close()
+    tamano = os.path.getsize(resultado['destino'])
+    print(f"Archivo: {resultado['destino']} | Tamaño: {tamano} | Filas: {filas}")
+
+    assert resultado['destino'] == destino + ".xz"
+    assert not os.path.exists(destino)
+    assert tamano < os.path.getsize(restaurado)
+    assert filas == 5000
+
+def test_retencion_abuelo_padre_hijo():
+    """Se conservan las últimas horas, días, semanas y meses"""
+    print("\n=== RETENCION ===")
+    ahora = datetime(2024, 6, 30, 23, 0, 0)
+    # Un respaldo por hora durante 90 días
+    fechas = [ahora - timedelta(hours=h) for h in range(24 * 90)]
+
+    conservados = seleccionar_conservados(
+        fechas, {'horarios': 24, 'diarios': 7, 'semanales': 4, 'mensuales': 3}
+    )
+    print(f"Respaldos: {len(fechas)} | Conservados: {len(conservados)}")
+
+    # Las últimas 24 horas están completas
+    assert all(ahora - timedelta(hours=h) in conservados for h in range(24))
+    # El último respaldo de cada uno de los 3 meses más recientes
+    assert datetime(2024, 5, 31, 23, 0, 0) in conservados
+    assert min(conservados).month == 4
+    assert len(conservados) < 24 + 7 + 4 + 3
+
+def test_planificador_aplica_retencion(db_name):
+    """El planificador respalda, comprime y borra los respaldos sobrantes"""
+    print("\n=== PLANIFICADOR ===")
+    crear_db_temporal(db_name)
+    planificador = PlanificadorRespaldos(db_name, compresion="zlib",
+                                         conservar={'horarios': 2, 'diarios': 0,
+                                                    'semanales': 0, 'mensuales': 0})
+    inicio = datetime(2024, 1, 1, 8, 0, 0)
+    for hora in range(4):
+        assert planificador.ejecutar_ahora(inicio + timedelta(hours=hora))
+
+    archivos = sorted(os.listdir(planificador.directorio))
+    print(f"Archivos: {archivos}")
+    assert archivos == ["prueba_20240101_100000.db.gz",
+                        "prueba_20240101_110000.db.gz"]
+
+def test_planificador_respalda_historicos(db_name):
+    """Los archivo_AAAA.db se copian a respaldos/historicos solo cuando cambiaron"""
+    print("\n=== RESPALDO DE HISTORICOS ===")
+    crear_db_temporal(db_name)
+    historico = os.path.join(os.path.dirname(db_name), "archivo_2020.db")
+    conn = sqlite3.connect(historico)
+    conn.execute("CREATE TABLE ventas (id INTEGER PRIMARY KEY, total REAL)")
+    conn.execute("INSERT INTO ventas (total) VALUES (10)")
+    conn.commit()
+    conn.close()
+
+    planificador = PlanificadorRespaldos(db_name, compresion=None)
+    copia = os.path.join(planificador.directorio, "historicos", "archivo_2020.db")
+    assert planificador.ejecutar_ahora(datetime(2024, 1, 1, 8, 0, 0))
+    assert os.path.exists(copia)
+    # Sin cambios en el archivo histórico no se vuelve a copiar
+    assert planificador.respaldar_historicos() == []
+
+    os.utime(historico, (os.path.getmtime(copia) + 10,) * 2)
+    assert planificador.respaldar_historicos() == [copia]
+
+    conn = sqlite3.connect(copia)
+    ventas = conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+    conn.close()
+    assert ventas == 1
+
+def test_planificador_espera_antes_del_primer_respaldo(db_name):
+    """Al iniciar, el primer respaldo espera espera_inicial en el hilo del planificador"""
+    print("\n=== ESPERA INICIAL ===")
+    planificador = PlanificadorRespaldos(db_name, intervalo_minutos=0, espera_inicial=60)
+    planificador.iniciar()
+    try:
+        threading.Event().wait(0.3)
+        assert not os.path.exists(planificador.directorio)
+    finally:
+        planificador.detener()
+
+if __name__ == "__main__":
+    print("PRUEBA DE RESPALDO EN LINEA")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,114 @@
+"""
+Script de prueba para verificar el resumen diario de ventas mantenido por triggers
+"""
+import sys
+import os
+import random
+from datetime import datetime
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.archivo_historico import ArchivadorVentas
+
+CONSULTA_RECALCULADA = '''
+    SELECT DATE(v.fecha_venta), COUNT(*), SUM(v.total),
+           COALESCE(SUM((SELECT SUM(cantidad) FROM detalle_ventas WHERE venta_id = v.id)), 0),
+           COUNT(DISTINCT v.cliente_id)
+    FROM ventas v GROUP BY DATE(v.fecha_venta) ORDER BY 1
+'''
+
+CONSULTA_RESUMEN = '''
+    SELECT dia, ventas, total, articulos, clientes FROM ventas_resumen_diario ORDER BY dia
+'''
+
+def crear_db_temporal(db_name):
+    """Base temporal con algunos clientes y productos"""
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote("INSERT INTO clientes (nombre) VALUES (?)", ((f"Cliente {i}",) for i in range(5)))
+    db.ejecutar_consulta("INSERT INTO productos (nombre, precio_compra, precio_venta) VALUES ('Lapiz', 50, 100)")
+    return db
+
+def insertar_venta(db, cliente_id, total, fecha, cantidad):
+    """Insertar una venta con un detalle, como lo hace Venta.guardar"""
+    with db.transaccion():
+        db.ejecutar_consulta("INSERT INTO ventas (cliente_id, total, fecha_venta) VALUES (?, ?, ?)",
+                             (cliente_id, total, fecha))
+        venta_id = db.ejecutar_consulta("SELECT last_insert_rowid()")[0][0]
+        db.ejecutar_consulta(
+            "INSERT INTO detalle_ventas (venta_id, producto_id, cantidad, precio_unitario, subtotal) "
+            "VALUES (?, 1, ?, 100, ?)", (venta_id, cantidad, total))
+    return venta_id
+
+def test_resumen_coincide_con_ventas(db_name):
+    """Tras altas, cambios y bajas el resumen coincide con recalcular desde ventas"""
+    print("\n=== RESUMEN VS RECALCULO ===")
+    db = crear_db_temporal(db_name)
+    azar = random.Random(7)
+    ids = []
+
+    for _ in range(300):
+        fecha = f"2024-03-{azar.randint(1, 10):02d} {azar.randint(8, 20):02d}:00:00"
+        cliente = azar.choice([None, 1, 2, 3, 4, 5])
+        ids.append(insertar_venta(db, cliente, azar.randint(1, 50) * 100, fecha, azar.randint(1, 4)))
+
+    # Cambios como los de Cliente.eliminar y correcciones de fecha
+    db.ejecutar_consulta("UPDATE ventas SET cliente_id = NULL WHERE cliente_id = 3")
+    db.ejecutar_consulta("UPDATE ventas SET fecha_venta = '2024-03-11 09:00:00' WHERE id % 7 = 0")
+
+    # Bajas en ambos órdenes: primero detalles (Venta.eliminar) o primero la venta
+    for venta_id in azar.sample(ids, 60):
+        with db.transaccion():
+            if venta_id % 2:
+                db.ejecutar_consulta("DELETE FROM detalle_ventas WHERE venta_id = ?", (venta_id,))
+                db.ejecutar_consulta("DELETE FROM ventas WHERE id = ?", (venta_id,))
+            else:
+                db.ejecutar_consulta("DELETE FROM ventas WHERE id = ?", (venta_id,))
+                db.ejecutar_consulta("DELETE FROM detalle_ventas WHERE venta_id = ?", (venta_id,))
+
+    resumen = db.ejecutar_consulta(CONSULTA_RESUMEN)
+    recalculado = db.ejecutar_consulta(CONSULTA_RECALCULADA)
+    print(f"Días en resumen: {len(resumen)} | Primer día: {resumen[0]}")
+    assert resumen == recalculado
+
+def test_estadisticas_leen_el_resumen(db_name):
+    """Las estadísticas del controlador usan el resumen diario"""
+    print("\n=== ESTADISTICAS DESDE EL RESUMEN ===")
+    from controllers.reporte_controller import ReporteController
+
+    db = crear_db_temporal(db_name)
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    insertar_venta(db, 1, 1000, f"{hoy} 10:00:00", 2)
+    insertar_venta(db, 2, 3000, f"{hoy} 11:00:00", 1)
+
+    controlador = ReporteController()
+    controlador.db = DatabaseManager(db.db_name, solo_lectura=True)
+    por_periodo = controlador.obtener_ventas_por_periodo(7)
+    financiero = controlador.obtener_resumen_financiero()
+    print(f"Por período: {por_periodo} | Financiero: {financiero}")
+
+    assert por_periodo == [(hoy, 2, 4000.0)]
+    assert financiero['ingresos_mes'] == 4000
+    assert financiero['promedio_venta'] == 2000
+
+def test_archivado_conserva_resumen(db_name):
+    """Archivar un año no descuenta sus ventas del resumen"""
+    print("\n=== ARCHIVADO Y RESUMEN ===")
+    db = crear_db_temporal(db_name)
+    anio = datetime.now().year - 1
+    insertar_venta(db, 1, 500, f"{anio}-05-01 10:00:00", 3)
+    insertar_venta(db, 2, 700, f"{anio}-05-01 12:00:00", 1)
+    antes = db.ejecutar_consulta(CONSULTA_RESUMEN)
+
+    ArchivadorVentas(db.db_name).archivar_anio(anio)
+    despues = db.ejecutar_consulta(CONSULTA_RESUMEN)
+    print(f"Antes: {antes} | Después: {despues}")
+
+    assert db.ejecutar_consulta("SELECT COUNT(*) FROM ventas")[0][0] == 0
+    assert despues == antes == [(f"{anio}-05-01", 2, 1200.0, 4, 2)]
+
+if __name__ == "__main__":
+    print("PRUEBA DE RESUMEN DIARIO DE VENTAS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
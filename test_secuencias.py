@@ -0,0 +1,161 @@
+"""
+Script de prueba para verificar la numeración de recibos por secuencias
+"""
+import sys
+import os
+import sqlite3
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+from config.migraciones import aplicar_migraciones
+from config.secuencias import AsignadorNumeros
+
+def ultimo(db_name, prefijo="REC"):
+    resultado = DatabaseManager(db_name).ejecutar_consulta(
+        "SELECT ultimo FROM secuencias WHERE prefijo = ?", (prefijo,))
+    return resultado[0][0] if resultado else 0
+
+def test_bloque_sin_idas_a_la_base(db_name):
+    """Un bloque reservado entrega sus números desde memoria"""
+    print("\n=== BLOQUE PREASIGNADO ===")
+    asignador = AsignadorNumeros(db_name, tamano_bloque=10)
+
+    primero = asignador.siguiente("REC")
+    assert ultimo(db_name) == 10
+    numeros = [primero] + [asignador.siguiente("REC") for _ in range(9)]
+    print(f"Números: {numeros[0]} ... {numeros[-1]}")
+    assert ultimo(db_name) == 10
+    assert [n[-4:] for n in numeros] == [f"{i:04d}" for i in range(1, 11)]
+
+    # El número 11 necesita un bloque nuevo
+    assert asignador.siguiente("REC").endswith("-0011")
+    assert ultimo(db_name) == 20
+
+def test_terminales_sin_duplicados(db_name):
+    """Varias terminales concurrentes nunca repiten un número"""
+    print("\n=== TERMINALES CONCURRENTES ===")
+    terminales = [AsignadorNumeros(db_name, tamano_bloque=7) for _ in range(4)]
+    emitidos = []
+    lock = threading.Lock()
+
+    def vender(asignador):
+        db = DatabaseManager(db_name)
+        for _ in range(50):
+            with db.transaccion():
+                numero = asignador.siguiente("REC", db)
+                db.ejecutar_consulta("INSERT INTO ventas (total, numero_recibo) VALUES (100, ?)", (numero,))
+            with lock:
+                emitidos.append(numero)
+
+    hilos = [threading.Thread(target=vender, args=(t,)) for t in terminales]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    print(f"Emitidos: {len(emitidos)} | Distintos: {len(set(emitidos))} | Contador: {ultimo(db_name)}")
+    assert len(emitidos) == 200
+    assert len(set(emitidos)) == 200
+    distintos = DatabaseManager(db_name).ejecutar_consulta("SELECT COUNT(DISTINCT numero_recibo) FROM ventas")[0][0]
+    assert distintos == 200
+
+def test_transaccion_revertida(db_name):
+    """Si la venta se deshace, el bloque y el número también"""
+    print("\n=== TRANSACCION REVERTIDA ===")
+    db = DatabaseManager(db_name)
+    asignador = AsignadorNumeros(db_name, tamano_bloque=5)
+
+    try:
+        with db.transaccion():
+            asignador.siguiente("REC", db)
+            raise ValueError("venta cancelada")
+    except ValueError:
+        pass
+    assert ultimo(db_name) == 0
+    assert asignador.bloques == {}
+
+    # Dentro de un bloque ya reservado, el número vuelve a estar disponible
+    assert asignador.siguiente("REC").endswith("-0001")
+    try:
+        with db.transaccion():
+            asignador.siguiente("REC", db)
+            raise ValueError("venta cancelada")
+    except ValueError:
+        pass
+    siguiente = asignador.siguiente("REC")
+    print(f"Después de revertir: {siguiente}")
+    assert siguiente.endswith("-0002")
+
+def test_bloque_sin_confirmar_es_del_hilo(db_name):
+    """Otro hilo no toma números de un bloque cuya transacción puede deshacerse"""
+    print("\n=== BLOQUE SIN CONFIRMAR ===")
+    db = DatabaseManager(db_name)
+    asignador = AsignadorNumeros(db_name, tamano_bloque=5)
+    otros = []
+    otro_hilo = threading.Thread(target=lambda: otros.append(asignador.siguiente("REC")))
+
+    try:
+        with db.transaccion():
+            assert asignador.siguiente("REC", db).endswith("-0001")
+            assert asignador.bloques == {}
+            # El otro hilo espera el bloqueo de escritura en vez de usar este bloque
+            otro_hilo.start()
+            otro_hilo.join(0.3)
+            assert otros == []
+            raise ValueError("venta cancelada")
+    except ValueError:
+        pass
+    otro_hilo.join()
+
+    numeros = otros + [asignador.siguiente("REC") for _ in range(4)]
+    print(f"Números después de revertir: {numeros}")
+    assert [n[-4:] for n in numeros] == ["0001", "0002", "0003", "0004", "0005"]
+
+def test_venta_y_abono_reciben_numero(db_modelos):
+    """Venta.guardar y registrar_abono asignan el recibo al guardar"""
+    print("\n=== RECIBOS DE VENTA Y ABONO ===")
+    import models.venta as modelo_venta
+    import models.cuenta_corriente as modelo_cuenta
+    db = DatabaseManager(db_modelos)
+    db.ejecutar_consulta("INSERT INTO productos (nombre, precio_compra, precio_venta, stock) VALUES ('Lapiz', 50, 100, 10)")
+    db.ejecutar_consulta("INSERT INTO clientes (nombre) VALUES ('Ana')")
+
+    venta = modelo_venta.Venta(cliente_id=1)
+    venta.db = db
+    venta.agregar_detalle(1, 2, 100)
+    assert venta.guardar()
+    print(f"Recibo de venta: {venta.numero_recibo}")
+    assert venta.numero_recibo.startswith("REC-") and venta.numero_recibo.endswith("-0001")
+
+    cuenta = modelo_cuenta.CuentaCorriente(1)
+    with db.transaccion():
+        db.ejecutar_consulta("INSERT INTO cuentas_corrientes (cliente_id, saldo_total, saldo_pendiente) VALUES (1, 200, 200)")
+    exito, mensaje = cuenta.registrar_abono(50)
+    recibo = db.ejecutar_consulta("SELECT recibo_numero FROM abonos")[0][0]
+    print(f"Abono: {mensaje!r} | Recibo: {recibo}")
+    assert exito and recibo.startswith("ABO-") and recibo in mensaje
+
+def test_migracion_continua_numeracion(db_name):
+    """La migración arranca los contadores después de los recibos existentes"""
+    print("\n=== MIGRACION DESDE RECIBOS EXISTENTES ===")
+    db = DatabaseManager(db_name)
+    db.ejecutar_lote("INSERT INTO ventas (total, numero_recibo) VALUES (100, ?)",
+                     [("REC-20240105-0001",), ("REC-20240105-0012",), ("REC-20240106-0003",), ("manual",)])
+    db.ejecutar_consulta("DELETE FROM secuencias")
+    db.ejecutar_consulta("DELETE FROM schema_version WHERE version >= 11")
+    db.cerrar_conexion()
+
+    conn = sqlite3.connect(db_name)
+    aplicar_migraciones(conn)
+    contadores = conn.execute("SELECT prefijo, dia, ultimo FROM secuencias ORDER BY dia").fetchall()
+    conn.close()
+    print(f"Contadores: {contadores}")
+    assert contadores == [("REC", "2024-01-05", 12), ("REC", "2024-01-06", 3)]
+
+if __name__ == "__main__":
+    print("PRUEBA DE SECUENCIAS DE RECIBOS")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
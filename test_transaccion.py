@@ -0,0 +1,96 @@
+"""
+Script de prueba para verificar las transacciones (db.transaccion())
+"""
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import DatabaseManager
+
+def contar(db, tabla):
+    """Contar las filas de una tabla"""
+    return db.ejecutar_consulta(f"SELECT COUNT(*) FROM {tabla}")[0][0]
+
+def test_commit_unico(db_name):
+    """Las sentencias del bloque se confirman juntas al salir"""
+    print("\n=== COMMIT UNICO ===")
+    db = DatabaseManager(db_name)
+    otro = DatabaseManager(db_name)
+
+    with db.transaccion() as conn:
+        db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+        # Otro gestor del mismo archivo se une a la misma transacción
+        otro.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Luis", "Gil"))
+        assert conn.in_transaction
+
+    print(f"Clientes: {contar(db, 'clientes')}")
+    assert contar(db, 'clientes') == 2
+    assert not db.en_transaccion()
+
+def test_escritura_fallida_no_deja_transaccion(db_name):
+    """Una escritura fallida fuera de un bloque no deja abierta la transacción del hilo"""
+    print("\n=== ESCRITURA FALLIDA ===")
+    db = DatabaseManager(db_name)
+    assert db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", (None, "Gil")) is None
+
+    with db.transaccion():
+        db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+    assert contar(db, 'clientes') == 1
+
+def test_error_revierte_todo(db_name):
+    """Un error dentro del bloque revierte todas sus sentencias"""
+    print("\n=== REVERSION COMPLETA ===")
+    db = DatabaseManager(db_name)
+
+    try:
+        with db.transaccion():
+            db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+            # nombre NOT NULL: la consulta falla y propaga el error
+            db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", (None, "Gil"))
+    except Exception as e:
+        print(f"Error esperado: {e}")
+
+    assert contar(db, 'clientes') == 0
+
+def test_anidada_revierte_solo_su_parte(db_name):
+    """Un bloque anidado que falla solo deshace su propio SAVEPOINT"""
+    print("\n=== TRANSACCION ANIDADA ===")
+    db = DatabaseManager(db_name)
+
+    with db.transaccion():
+        db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+        try:
+            with db.transaccion():
+                db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Luis", "Gil"))
+                raise ValueError("falla interna")
+        except ValueError:
+            pass
+
+    print(f"Clientes: {contar(db, 'clientes')}")
+    assert contar(db, 'clientes') == 1
+
+def test_abono_atomico(db_name):
+    """registrar_abono confirma abono, saldo y movimiento en una sola transacción"""
+    print("\n=== ABONO ATOMICO ===")
+    from models.cuenta_corriente import CuentaCorriente
+
+    db = DatabaseManager(db_name)
+    db.ejecutar_consulta("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", ("Ana", "Paz"))
+    db.ejecutar_consulta("INSERT INTO cuentas_corrientes (cliente_id, saldo_total, saldo_pendiente) VALUES (1, 100, 100)")
+
+    cuenta = CuentaCorriente(1)
+    cuenta.db = db
+    exito, mensaje = cuenta.registrar_abono(40, "Efectivo")
+    print(f"{exito}: {mensaje}")
+
+    assert exito
+    assert contar(db, 'abonos') == 1
+    assert contar(db, 'movimientos_cuenta') == 1
+    assert db.ejecutar_consulta("SELECT saldo_pendiente FROM cuentas_corrientes")[0][0] == 60
+
+if __name__ == "__main__":
+    print("PRUEBA DE TRANSACCIONES")
+    print("="*50)
+
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -2,6 +2,7 @@
 Funciones auxiliares y utilidades
 """
 import re
+import unicodedata
 from datetime import datetime
 
 def validar_email(email):
@@ -40,6 +41,80 @@ def formatear_fecha(fecha):
     
     return fecha.strftime('%d/%m/%Y %H:%M')
 
+def rango_semiabierto(fecha_inicio, fecha_fin):
+    """
+    Convertir un rango de días inclusivo [inicio, fin] al rango semiabierto
+    [inicio, día siguiente a fin) para filtrar con columna >= ? AND columna < ?
+    Acepta textos 'AAAA-MM-DD' (o con hora) y objetos date/datetime
+    """
+    from datetime import date, timedelta
+
+    def como_fecha(valor):
+        if isinstance(valor, datetime):
+            return valor.date()
+        if isinstance(valor, date):
+            return valor
+        return datetime.strptime(str(valor)[:10], '%Y-%m-%d').date()
+
+    inicio = como_fecha(fecha_inicio)
+    fin = como_fecha(fecha_fin) + timedelta(days=1)
+    return inicio.isoformat(), fin.isoformat()
+
+def expresion_busqueda_fts(termino, columnas=None):
+    """
+    Convertir el texto ingresado en una consulta MATCH de FTS5:
+    cada palabra como prefijo entre comillas ("dio sau" -> "dio"* "sau"*),
+    así los signos de puntuación del usuario no rompen la sintaxis.
+    columnas: limita la búsqueda a esas columnas del índice
+    Retorna "" si el texto no tiene palabras
+    """
+    palabras = re.findall(r"\w+", termino or "")
+    expresion = " ".join(f'"{palabra}"*' for palabra in palabras)
+    if expresion and columnas:
+        expresion = f"{{{' '.join(columnas)}}} : ({expresion})"
+    return expresion
+
+def normalizar_texto(texto):
+    """Texto en minúsculas, sin acentos y con espacios simples ("Acqua di Gió" -> "acqua di gio")"""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.lower().split())
+
+def trigramas(palabra, relleno=True):
+    """
+    Conjunto de trigramas de una palabra ya normalizada.
+    Con relleno la palabra se rodea de espacios ("  dior ") como en pg_trgm,
+    así el comienzo y el final también cuentan
+    """
+    if relleno:
+        palabra = f"  {palabra} "
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+def palabras_normalizadas(texto):
+    """Palabras del texto en minúsculas y sin acentos"""
+    return re.findall(r"\w+", normalizar_texto(texto))
+
+def similitud_trigramas(consulta, texto):
+    """
+    Similitud entre 0 y 1 de la consulta con el texto, palabra por palabra:
+    cada palabra de la consulta se compara (Jaccard de trigramas) con la
+    palabra más parecida del texto y se promedia. Así "aqua di gio" se
+    parece a "Acqua di Giò Profondo" aunque el nombre tenga más palabras
+    """
+    buscadas = palabras_normalizadas(consulta)
+    if not buscadas:
+        return 0.0
+    trigramas_texto = [trigramas(palabra) for palabra in palabras_normalizadas(texto)]
+    total = 0.0
+    for palabra in buscadas:
+        propios = trigramas(palabra)
+        total += max((len(propios & otros) / len(propios | otros) for otros in trigramas_texto), default=0.0)
+    return total / len(buscadas)
+
+def digitos_invertidos(telefono):
+    """Dígitos del teléfono en orden inverso ("+56 9 1234-5678" -> "87654321965")"""
+    return re.sub(r"\D", "", telefono or "")[::-1]
+
 def calcular_porcentaje_ganancia(precio_compra, precio_venta):
     """Calcular porcentaje de ganancia"""
     try:
@@ -114,30 +189,59 @@ def exportar_a_csv(datos, nombre_archivo):
     
     return False
 
-def backup_base_datos():
-    """Crear backup de la base de datos"""
-    import shutil
+def backup_base_datos(archivo_backup=None, db_name="inventario.db", ventana=None, compresion=None):
+    """
+    Crear backup de la base de datos con la API de respaldo en línea de SQLite
+    Si no se indica archivo_backup se solicita la ubicación al usuario.
+    compresion: None, 'lzma' o 'zlib' (el archivo final lleva .xz o .gz)
+    Con ventana, la copia corre en el hilo de respaldo y el resultado se
+    informa al terminar (retorna el Future); sin ventana se espera a que termine.
+    """
     from tkinter import filedialog, messagebox
     from datetime import datetime
-    
+    from utils.respaldo import MotorRespaldo
+
+    interactivo = archivo_backup is None
     try:
-        # Generar nombre con timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        nombre_backup = f"inventario_backup_{timestamp}.db"
-        
-        # Solicitar ubicación
-        archivo_backup = filedialog.asksaveasfilename(
-            defaultextension=".db",
-            filetypes=[("Database files", "*.db"), ("All files", "*.*")],
-            initialvalue=nombre_backup
-        )
-        
-        if archivo_backup:
-            shutil.copy2("inventario.db", archivo_backup)
-            messagebox.showinfo("Éxito", f"Backup creado correctamente:\n{archivo_backup}")
-            return True
-    
+        if interactivo:
+            # Generar nombre con timestamp
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            nombre_backup = f"inventario_backup_{timestamp}.db"
+
+            # Solicitar ubicación
+            archivo_backup = filedialog.asksaveasfilename(
+                defaultextension=".db",
+                filetypes=[("Database files", "*.db"), ("All files", "*.*")],
+                initialfile=nombre_backup
+            )
+            if not archivo_backup:
+                return False
+
+        motor = MotorRespaldo(db_name)
+
+        if ventana is not None:
+            from config.ejecutor_db import EjecutorDB
+
+            def al_terminar(resultado):
+                messagebox.showinfo("Éxito", f"Backup creado correctamente:\n{resultado['destino']}")
+
+            def al_fallar(error):
+                messagebox.showerror("Error", f"Error al crear backup: {str(error)}")
+
+            futuro = motor.respaldar_en_segundo_plano(archivo_backup, compresion=compresion)
+            return EjecutorDB.obtener().entregar_en_tk(ventana, futuro, al_terminar, al_fallar)
+
+        resultado = motor.respaldar(archivo_backup, compresion=compresion)
+        print(f"Backup creado: {resultado['destino']} ({resultado['paginas']} páginas, "
+              f"{resultado['segundos']:.2f} s)")
+        if interactivo:
+            messagebox.showinfo("Éxito", f"Backup creado correctamente:\n{resultado['destino']}")
+        return True
+
     except Exception as e:
-        messagebox.showerror("Error", f"Error al crear backup: {str(e)}")
-    
-    return False
\ No newline at end of file
+        if interactivo:
+            messagebox.showerror("Error", f"Error al crear backup: {str(e)}")
+        else:
+            print(f"Error al crear backup: {str(e)}")
+
+    return False
@@ -0,0 +1,310 @@
+"""
+Respaldo en línea de la base de datos con la API de backup de SQLite
+"""
+import gzip
+import lzma
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Formatos de compresión: extensión y función que abre el archivo comprimido
+COMPRESORES = {
+    'lzma': ('.xz', lzma.open),
+    'zlib': ('.gz', gzip.open)
+}
+
+# Tamaño de los bloques al comprimir (la copia nunca se carga entera en memoria)
+BLOQUE_COMPRESION = 1024 * 1024
+
+
+class MotorRespaldo:
+    """
+    Copia la base de datos por bloques de páginas sin detener las ventas.
+    La copia se hace dentro de una transacción de lectura, por lo que el
+    resultado es una instantánea coherente aunque otras terminales sigan
+    escribiendo (en modo WAL los escritores no esperan al respaldo).
+    """
+    # Páginas copiadas por paso y pausa entre pasos para ceder el disco
+    PAGINAS_POR_PASO = 256
+    PAUSA_ENTRE_PASOS = 0.002
+
+    # Un único hilo de respaldo por proceso: dos copias simultáneas no aportan nada
+    _ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="respaldo")
+
+    def __init__(self, db_name="inventario.db", paginas_por_paso=None, pausa=None):
+        self.db_name = db_name
+        self.paginas_por_paso = paginas_por_paso or self.PAGINAS_POR_PASO
+        self.pausa = self.PAUSA_ENTRE_PASOS if pausa is None else pausa
+
+    def respaldar(self, destino, progreso=None, compresion=None):
+        """
+        Copiar la base de datos a destino
+        progreso: función opcional que recibe (páginas copiadas, páginas totales)
+        compresion: None, 'lzma' o 'zlib'; agrega la extensión .xz o .gz a destino
+        Retorna un diccionario con destino, paginas, segundos y verificacion.
+        La copia se escribe en un archivo temporal y solo reemplaza a destino
+        si pasa PRAGMA quick_check.
+        """
+        if compresion and compresion not in COMPRESORES:
+            raise ValueError(f"Compresión desconocida: {compresion}")
+
+        inicio = time.monotonic()
+        temporal = destino + ".parcial"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+        origen = sqlite3.connect(self.db_name, timeout=30)
+        copia = sqlite3.connect(temporal)
+        try:
+            # Fijar la instantánea: todos los pasos leen la misma versión de la base
+            origen.execute("BEGIN")
+            origen.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+
+            def avance(estado, restantes, total):
+                if progreso:
+                    progreso(total - restantes, total)
+                if restantes and self.pausa:
+                    time.sleep(self.pausa)
+
+            origen.backup(copia, pages=self.paginas_por_paso, progress=avance)
+            origen.rollback()
+
+            # El respaldo queda como un único archivo, sin -wal ni -shm
+            copia.execute("PRAGMA journal_mode=DELETE").fetchall()
+            verificacion = copia.execute("PRAGMA quick_check").fetchone()[0]
+            paginas = copia.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            origen.close()
+            copia.close()
+
+        if verificacion != "ok":
+            os.remove(temporal)
+            raise sqlite3.DatabaseError(f"El respaldo no pasó la verificación: {verificacion}")
+
+        if compresion:
+            destino = self.comprimir(temporal, destino, compresion)
+        else:
+            os.replace(temporal, destino)
+        return {
+            'destino': destino,
+            'paginas': paginas,
+            'segundos': time.monotonic() - inicio,
+            'verificacion': verificacion
+        }
+
+    @staticmethod
+    def comprimir(origen, destino, compresion):
+        """
+        Comprimir origen por bloques en destino + extensión y borrar origen
+        Retorna la ruta del archivo comprimido
+        """
+        extension, abrir = COMPRESORES[compresion]
+        if not destino.endswith(extension):
+            destino += extension
+        temporal = destino + ".parcial"
+        try:
+            with open(origen, 'rb') as entrada, abrir(temporal, 'wb') as salida:
+                shutil.copyfileobj(entrada, salida, BLOQUE_COMPRESION)
+            os.replace(temporal, destino)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            os.remove(origen)
+        return destino
+
+    def respaldar_en_segundo_plano(self, destino, progreso=None, compresion=None):
+        """
+        Ejecutar respaldar() en el hilo de respaldo
+        Retorna un Future; para mostrar el resultado en una ventana usar
+        EjecutorDB.entregar_en_tk (progreso se llama desde el hilo de respaldo)
+        """
+        return self._ejecutor.submit(self.respaldar, destino, progreso, compresion)
+
+
+# Cantidad de respaldos que conserva cada nivel de la política de retención
+RETENCION_POR_DEFECTO = {
+    'horarios': 24,
+    'diarios': 7,
+    'semanales': 4,
+    'mensuales': 12
+}
+
+# Clave de agrupación de cada nivel: se conserva el respaldo más reciente de cada grupo
+_NIVELES_RETENCION = (
+    ('horarios', lambda fecha: fecha.strftime('%Y%m%d%H')),
+    ('diarios', lambda fecha: fecha.strftime('%Y%m%d')),
+    ('semanales', lambda fecha: tuple(fecha.isocalendar())[:2]),
+    ('mensuales', lambda fecha: fecha.strftime('%Y%m'))
+)
+
+_PATRON_ARCHIVO = re.compile(r"^(?P<base>.+)_(?P<fecha>\d{8}_\d{6})\.db(?:\.xz|\.gz)?$")
+
+
+def seleccionar_conservados(fechas, conservar=None):
+    """
+    Política abuelo-padre-hijo: de las fechas dadas, retornar el conjunto que
+    se conserva (el último respaldo de cada una de las N horas, días, semanas
+    y meses más recientes). Las demás pueden eliminarse.
+    """
+    conservar = dict(RETENCION_POR_DEFECTO, **(conservar or {}))
+    conservados = set()
+    for nivel, clave in _NIVELES_RETENCION:
+        limite = conservar.get(nivel, 0)
+        grupos = set()
+        for fecha in sorted(fechas, reverse=True):
+            if len(grupos) >= limite:
+                break
+            grupo = clave(fecha)
+            if grupo not in grupos:
+                grupos.add(grupo)
+                conservados.add(fecha)
+    return conservados
+
+
+class PlanificadorRespaldos:
+    """
+    Respaldos automáticos cada cierto intervalo en un hilo de fondo.
+    Cada respaldo usa backup_base_datos (API de respaldo en línea, por lo
+    que las ventas no se detienen), se comprime y luego se aplica la política
+    de retención para acotar el espacio en disco.
+    Los archivos históricos (archivo_AAAA.db) se copian aparte, en
+    respaldos/historicos, solo cuando cambiaron desde su última copia.
+    """
+    # Segundos que espera el primer respaldo tras iniciar, para no competir
+    # por el disco mientras el sistema abre sus ventanas
+    ESPERA_INICIAL = 120
+
+    def __init__(self, db_name="inventario.db", directorio=None, intervalo_minutos=60,
+                 compresion="lzma", conservar=None, espera_inicial=None):
+        self.db_name = db_name
+        self.directorio = directorio or os.path.join(
+            os.path.dirname(os.path.abspath(db_name)), "respaldos")
+        self.intervalo = intervalo_minutos * 60
+        self.espera_inicial = self.ESPERA_INICIAL if espera_inicial is None else espera_inicial
+        self.compresion = compresion
+        self.conservar = dict(RETENCION_POR_DEFECTO, **(conservar or {}))
+        self.base = os.path.splitext(os.path.basename(db_name))[0]
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @classmethod
+    def desde_configuracion(cls, db_name="inventario.db"):
+        """
+        Crear el planificador según la sección "respaldos" de configuracion_db.json
+        Retorna None si los respaldos automáticos están desactivados
+        """
+        from config.perfil_sqlite import cargar_configuracion
+
+        opciones = cargar_configuracion(db_name).get('respaldos', {})
+        if not opciones.get('activo', True):
+            return None
+        return cls(
+            db_name,
+            directorio=opciones.get('directorio'),
+            intervalo_minutos=opciones.get('intervalo_minutos', 60),
+            compresion=opciones.get('compresion', 'lzma'),
+            conservar=opciones.get('conservar'),
+            espera_inicial=opciones.get('espera_inicial_segundos')
+        )
+
+    def respaldos_existentes(self):
+        """Retornar {fecha: ruta} de los respaldos automáticos del directorio"""
+        respaldos = {}
+        if not os.path.isdir(self.directorio):
+            return respaldos
+        for nombre in os.listdir(self.directorio):
+            coincidencia = _PATRON_ARCHIVO.match(nombre)
+            if not coincidencia or coincidencia.group('base') != self.base:
+                continue
+            fecha = datetime.strptime(coincidencia.group('fecha'), '%Y%m%d_%H%M%S')
+            respaldos[fecha] = os.path.join(self.directorio, nombre)
+        return respaldos
+
+    def ejecutar_ahora(self, fecha=None):
+        """Tomar un respaldo y aplicar la retención; retorna True si se creó"""
+        from utils.herlpers import backup_base_datos
+
+        fecha = fecha or datetime.now()
+        os.makedirs(self.directorio, exist_ok=True)
+        destino = os.path.join(self.directorio, f"{self.base}_{fecha.strftime('%Y%m%d_%H%M%S')}.db")
+        creado = backup_base_datos(destino, self.db_name, compresion=self.compresion)
+        if creado:
+            self.aplicar_retencion()
+            try:
+                self.respaldar_historicos()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error al respaldar los archivos históricos: {e}")
+        return creado
+
+    def respaldar_historicos(self):
+        """
+        Copiar a respaldos/historicos los archivo_AAAA.db modificados desde su
+        última copia. Solo cambian al archivar un año, por eso se guarda una
+        única copia vigente de cada uno, sin la retención por fechas.
+        Retorna las rutas de las copias creadas.
+        """
+        from config.archivo_historico import archivos_historicos
+
+        directorio = os.path.join(self.directorio, "historicos")
+        extension = COMPRESORES[self.compresion][0] if self.compresion else ""
+        creadas = []
+        for _, ruta in archivos_historicos(self.db_name):
+            destino = os.path.join(directorio, os.path.basename(ruta))
+            modificado = max(os.path.getmtime(r) for r in (ruta, ruta + "-wal") if os.path.exists(r))
+            if os.path.exists(destino + extension) and os.path.getmtime(destino + extension) >= modificado:
+                continue
+            os.makedirs(directorio, exist_ok=True)
+            resultado = MotorRespaldo(ruta).respaldar(destino, compresion=self.compresion)
+            creadas.append(resultado['destino'])
+        return creadas
+
+    def aplicar_retencion(self):
+        """Eliminar los respaldos que la política no conserva; retorna las rutas borradas"""
+        respaldos = self.respaldos_existentes()
+        conservados = seleccionar_conservados(respaldos.keys(), self.conservar)
+        eliminados = []
+        for fecha, ruta in respaldos.items():
+            if fecha in conservados:
+                continue
+            try:
+                os.remove(ruta)
+                eliminados.append(ruta)
+            except OSError as e:
+                print(f"No se pudo eliminar el respaldo {ruta}: {e}")
+        return eliminados
+
+    def segundos_hasta_proximo(self):
+        """Tiempo restante hasta el próximo respaldo según el último existente"""
+        respaldos = self.respaldos_existentes()
+        if not respaldos:
+            return 0
+        transcurrido = (datetime.now() - max(respaldos)).total_seconds()
+        return max(0, self.intervalo - transcurrido)
+
+    def iniciar(self):
+        """Arrancar el hilo de respaldos automáticos"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="respaldos-automaticos", daemon=True)
+        self._hilo.start()
+
+    def detener(self, esperar=True):
+        """Detener el hilo (el respaldo en curso, si lo hay, termina primero)"""
+        self._detener.set()
+        if esperar and self._hilo:
+            self._hilo.join()
+
+    def _ciclo(self):
+        espera = max(self.espera_inicial, self.segundos_hasta_proximo())
+        while not self._detener.wait(espera):
+            try:
+                self.ejecutar_ahora()
+            except Exception as e:
+                print(f"Error en respaldo automático: {e}")
+            espera = self.intervalo
@@ -6,6 +6,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
 from controllers.cuenta_controller import CuentaController
+from config.ejecutor_db import EjecutorDB, mostrar_cargando, limpiar_tabla
 from config.estilos import (Colores, Fuentes, Espaciado, Dimensiones,
                             Iconos, obtener_color_hover)
 
@@ -468,46 +469,51 @@ class VentanaCuentas:
             print(f"Error al crear cuentas: {str(e)}")
 
     def cargar_tabla_cuentas(self):
-        """Cargar datos en la tabla de cuentas"""
+        """Cargar datos en la tabla de cuentas (la consulta corre en el hilo de base de datos)"""
         try:
-            # Limpiar tabla
-            for item in self.tree_cuentas.get_children():
-                self.tree_cuentas.delete(item)
-
-            # Obtener cuentas con saldo
             from models.cuenta_corriente import CuentaCorriente
-            cuentas_con_saldo = CuentaCorriente.obtener_todas_las_cuentas()
 
-            for cuenta in cuentas_con_saldo:
-                try:
-                    cliente_id, nombre, apellido, saldo_total, saldo_pendiente, fecha_actualizacion = cuenta
+            mostrar_cargando(self.tree_cuentas)
+            EjecutorDB.obtener().ejecutar_en_tk(
+                self.tree_cuentas, CuentaCorriente.obtener_todas_las_cuentas,
+                self.mostrar_tabla_cuentas,
+                lambda e: print(f"ERROR al cargar tabla: {str(e)}")
+            )
 
-                    if saldo_pendiente > 0:
-                        estado = "Con deuda"
-                        tag = 'con_deuda'
-                    else:
-                        estado = "Al día"
-                        tag = 'al_dia'
+        except Exception as e:
+            print(f"ERROR al cargar tabla: {str(e)}")
 
-                    fecha_formateada = fecha_actualizacion[:16] if fecha_actualizacion else 'N/A'
+    def mostrar_tabla_cuentas(self, cuentas_con_saldo):
+        """Volcar en la tabla las cuentas leídas"""
+        limpiar_tabla(self.tree_cuentas)
 
-                    self.tree_cuentas.insert('', 'end', values=(
-                        f"{nombre} {apellido}",
-                        f"${saldo_total:,.0f}",
-                        f"${saldo_pendiente:,.0f}",
-                        estado,
-                        fecha_formateada
-                    ), tags=(tag,))
+        for cuenta in cuentas_con_saldo:
+            try:
+                cliente_id, nombre, apellido, saldo_total, saldo_pendiente, fecha_actualizacion = cuenta
 
-                except Exception as e:
-                    print(f"Error al procesar cuenta: {str(e)}")
+                if saldo_pendiente > 0:
+                    estado = "Con deuda"
+                    tag = 'con_deuda'
+                else:
+                    estado = "Al día"
+                    tag = 'al_dia'
 
-            # Configurar colores
-            self.tree_cuentas.tag_configure('al_dia', background='#d4edda', foreground='#155724')
-            self.tree_cuentas.tag_configure('con_deuda', background='#fff3cd', foreground='#856404')
+                fecha_formateada = fecha_actualizacion[:16] if fecha_actualizacion else 'N/A'
 
-        except Exception as e:
-            print(f"ERROR al cargar tabla: {str(e)}")
+                self.tree_cuentas.insert('', 'end', values=(
+                    f"{nombre} {apellido}",
+                    f"${saldo_total:,.0f}",
+                    f"${saldo_pendiente:,.0f}",
+                    estado,
+                    fecha_formateada
+                ), tags=(tag,))
+
+            except Exception as e:
+                print(f"Error al procesar cuenta: {str(e)}")
+
+        # Configurar colores
+        self.tree_cuentas.tag_configure('al_dia', background='#d4edda', foreground='#155724')
+        self.tree_cuentas.tag_configure('con_deuda', background='#fff3cd', foreground='#856404')
 
     def filtrar_cuentas(self):
         """Filtrar cuentas según selección"""
@@ -627,7 +633,7 @@ class VentanaCuentas:
             clientes_existentes = Cliente.obtener_todos()
 
             cuentas_con_saldo = self.controller.obtener_clientes_con_deuda()
-            ids_existentes = [c.id for c in clientes_existentes]
+            ids_existentes = {c.id for c in clientes_existentes}
 
             clientes_deuda = []
             for cuenta in cuentas_con_saldo:
@@ -686,10 +692,10 @@ class VentanaCuentas:
             monto = float(self.monto_abono_var.get())
             metodo_pago = self.metodo_pago_var.get()
             descripcion = self.descripcion_abono_var.get()
-            recibo = self.recibo_var.get()
 
+            # El número mostrado es una vista previa: el definitivo se asigna al registrar
             exito, mensaje = self.controller.registrar_abono(
-                cliente_id, monto, metodo_pago, descripcion, recibo
+                cliente_id, monto, metodo_pago, descripcion
             )
 
             if exito:
@@ -879,13 +885,8 @@ class VentanaCuentas:
         nombre_cliente = item['values'][0]
 
         from models.cliente import Cliente
-        clientes = Cliente.obtener_todos()
-        cliente_id = None
-
-        for cliente in clientes:
-            if f"{cliente.nombre} {cliente.apellido}" == nombre_cliente:
-                cliente_id = cliente.id
-                break
+        coincidencias = Cliente.buscar_en_directorio('nombre_completo', str(nombre_cliente))
+        cliente_id = coincidencias[0].id if coincidencias else None
 
         if cliente_id:
             self.notebook.select(2)
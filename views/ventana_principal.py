@@ -7,6 +7,12 @@ import customtkinter as ctk
 from controllers.producto_controller import ProductoController
 from datetime import datetime
 from config.estilos import Colores, Fuentes, Espaciado, Dimensiones, Iconos, ModuloConfig
+from config.perfilador import PERFILADOR
+from config.mantenimiento import MantenimientoDB
+from config.archivo_historico import ArchivadorVentas
+from config.ejecutor_db import EjecutorDB
+from utils.herlpers import backup_base_datos
+from utils.respaldo import PlanificadorRespaldos
 
 class VentanaPrincipal:
     def __init__(self):
@@ -23,9 +29,19 @@ class VentanaPrincipal:
         # Controladores
         self.producto_controller = ProductoController()
 
+        # Mantenimiento de la base (ANALYZE, incremental_vacuum) en segundo plano
+        self.mantenimiento = MantenimientoDB()
+        self.mantenimiento.iniciar()
+
         # Crear interfaz moderna
         self.crear_interfaz_moderna()
 
+        # Respaldos automáticos en segundo plano: el primero corre en el hilo
+        # de respaldos unos minutos después de abrir, nunca antes de la interfaz
+        self.planificador_respaldos = PlanificadorRespaldos.desde_configuracion()
+        if self.planificador_respaldos:
+            self.planificador_respaldos.iniciar()
+
     def crear_interfaz_moderna(self):
         """Crear interfaz principal moderna con CustomTkinter"""
         # Header elegante
@@ -449,12 +465,18 @@ class VentanaPrincipal:
             "[BAK] Respaldo y Restauración"
         ]
 
+        comandos = {
+            "[DB] Gestión de Base de Datos": lambda: self.mostrar_estadisticas_consultas(config_window),
+            "[BAK] Respaldo y Restauración": lambda: backup_base_datos(ventana=config_window)
+        }
+
         for option in options:
             btn = tk.Button(content, text=option,
                            font=("Segoe UI", 12),
                            bg='white', fg='#2c3e50',
                            relief='flat', bd=1,
                            pady=15, anchor='w',
+                           command=comandos.get(option),
                            cursor='hand2')
             btn.pack(fill='x', pady=5)
 
@@ -476,6 +498,109 @@ class VentanaPrincipal:
                              cursor='hand2')
         close_btn.pack(pady=(20, 0), ipadx=20)
 
+    def mostrar_estadisticas_consultas(self, parent):
+        """Mostrar el resumen del perfilador de consultas SQL"""
+        stats_window = tk.Toplevel(parent)
+        stats_window.title("Estadísticas de Consultas SQL")
+        stats_window.geometry("1000x500")
+        stats_window.configure(bg='#f8f9fa')
+        stats_window.transient(parent)
+        stats_window.grab_set()
+
+        # Header
+        header = tk.Frame(stats_window, bg='#3498db', height=60)
+        header.pack(fill='x')
+        header.pack_propagate(False)
+
+        title_label = tk.Label(header, text="[DB] CONSULTAS SQL MÁS COSTOSAS",
+                              font=("Segoe UI", 16, "bold"),
+                              fg='white', bg='#3498db')
+        title_label.pack(expand=True)
+
+        # Contenido con scroll
+        text_frame = tk.Frame(stats_window, bg='#f8f9fa')
+        text_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+        scrollbar = tk.Scrollbar(text_frame)
+        scrollbar.pack(side='right', fill='y')
+
+        text_widget = tk.Text(text_frame,
+                             font=("Consolas", 10),
+                             bg='white', fg='#2c3e50',
+                             relief='flat', bd=0,
+                             yscrollcommand=scrollbar.set,
+                             wrap='none',
+                             padx=10, pady=10)
+        text_widget.pack(fill='both', expand=True)
+        scrollbar.config(command=text_widget.yview)
+
+        def refrescar():
+            text_widget.configure(state='normal')
+            text_widget.delete('1.0', 'end')
+            text_widget.insert('1.0', PERFILADOR.texto_resumen(limite=50))
+            text_widget.configure(state='disabled')
+
+        def reiniciar():
+            PERFILADOR.reiniciar()
+            refrescar()
+
+        def archivar():
+            if not messagebox.askyesno("Archivar",
+                                       "¿Trasladar las ventas de los años cerrados a los archivos históricos?\n"
+                                       "Seguirán disponibles en los reportes con historial completo."):
+                return
+
+            def al_terminar(resultado):
+                if not resultado:
+                    messagebox.showinfo("Archivar", "No hay años cerrados pendientes de archivar")
+                    return
+                detalle = "\n".join(f"{anio}: {totales['ventas']} ventas, "
+                                    f"{totales['movimientos_cuenta']} movimientos"
+                                    for anio, totales in resultado.items())
+                messagebox.showinfo("Archivar", f"Años archivados:\n{detalle}")
+
+            def al_fallar(error):
+                messagebox.showerror("Error", f"Error al archivar: {str(error)}")
+
+            EjecutorDB.obtener().ejecutar_en_tk(stats_window, ArchivadorVentas().archivar_cerrados,
+                                                al_terminar, al_fallar)
+
+        def compactar():
+            if not messagebox.askyesno("Compactar",
+                                       "¿Reconstruir el archivo de la base de datos?\n"
+                                       "Puede tardar varios minutos y las demás terminales "
+                                       "deben estar cerradas mientras tanto."):
+                return
+
+            def al_terminar(registro):
+                messagebox.showinfo("Compactar",
+                                    f"Base compactada en {registro['segundos']:.1f} s\n"
+                                    f"{registro['bytes_antes'] // 1024} KB -> {registro['bytes_despues'] // 1024} KB")
+
+            def al_fallar(error):
+                messagebox.showerror("Error", f"Error al compactar: {str(error)}")
+
+            EjecutorDB.obtener().ejecutar_en_tk(stats_window, self.mantenimiento.compactar,
+                                                al_terminar, al_fallar)
+
+        refrescar()
+
+        # Botones
+        botones = tk.Frame(stats_window, bg='#f8f9fa')
+        botones.pack(pady=(0, 15))
+
+        for texto, comando, color in (("Actualizar", refrescar, '#3498db'),
+                                      ("Reiniciar", reiniciar, '#e67e22'),
+                                      ("Archivar años cerrados", archivar, '#8e44ad'),
+                                      ("Compactar base de datos", compactar, '#16a085'),
+                                      ("Cerrar", stats_window.destroy, '#95a5a6')):
+            tk.Button(botones, text=texto,
+                     font=("Segoe UI", 11, "bold"),
+                     bg=color, fg='white',
+                     relief='flat', pady=8,
+                     command=comando,
+                     cursor='hand2').pack(side='left', padx=5, ipadx=15)
+
     def abrir_ayuda(self):
         """Mostrar ayuda del sistema"""
         # Crear ventana de ayuda moderna
@@ -612,4 +737,7 @@ Para soporte técnico o consultas, contacte al administrador del sistema.
 
     def ejecutar(self):
         """Ejecutar la aplicación"""
-        self.root.mainloop()
\ No newline at end of file
+        self.root.mainloop()
+        if self.planificador_respaldos:
+            self.planificador_respaldos.detener()
+        self.mantenimiento.detener()
\ No newline at end of file
@@ -83,6 +83,18 @@ class VentanaProductos:
         )
         search_entry.grid(row=0, column=1, sticky='e', padx=Espaciado.LARGE, pady=Espaciado.NORMAL)
 
+        # "¿Quiso decir...?" cuando la búsqueda no encuentra nada
+        self.sugerencia = ""
+        self.sugerencia_label = ctk.CTkLabel(
+            header,
+            text="",
+            font=(Fuentes.FAMILIA_PRINCIPAL, Fuentes.PEQUENO, "underline"),
+            text_color=Colores.TEXT_WHITE,
+            cursor="hand2"
+        )
+        self.sugerencia_label.grid(row=0, column=2, sticky='e', padx=(0, Espaciado.LARGE), pady=Espaciado.NORMAL)
+        self.sugerencia_label.bind("<Button-1>", self.aplicar_sugerencia)
+
     def crear_contenido_web(self):
         """Contenido principal estilo web con CustomTkinter"""
         # Container principal
@@ -219,7 +231,7 @@ class VentanaProductos:
         crear_boton_ctk("Actualizar Producto", Colores.WARNING, self.actualizar_producto, Iconos.EDITAR)
         crear_boton_ctk("Eliminar Producto", Colores.DANGER, self.eliminar_producto, Iconos.ELIMINAR)
         crear_boton_ctk("Limpiar Formulario", Colores.GRIS_MEDIO, self.limpiar_formulario, Iconos.LIMPIAR)
-        crear_boton_ctk("Generar SKUs", Colores.SUCCESS, self.generar_skus, Iconos.ETIQUETA)
+        self.boton_skus = crear_boton_ctk("Generar SKUs", Colores.SUCCESS, self.generar_skus, Iconos.ETIQUETA)
 
     def crear_panel_lista(self, parent):
         """Panel de lista de productos con CustomTkinter"""
@@ -333,11 +345,13 @@ class VentanaProductos:
             self.tree.delete(item)
 
         if not termino:
+            self.mostrar_sugerencia("")
             self.cargar_productos()
             return
 
         try:
             productos = self.controller.buscar_productos(termino)
+            self.mostrar_sugerencia(termino if not productos else "")
             for producto in productos:
                 sku_display = getattr(producto, 'sku', 'SIN-SKU')
 
@@ -362,6 +376,17 @@ class VentanaProductos:
         except Exception as e:
             messagebox.showerror("Error", f"Error al buscar: {str(e)}")
 
+    def mostrar_sugerencia(self, termino):
+        """Mostrar el producto más parecido al término, o limpiar la sugerencia"""
+        sugeridos = self.controller.sugerir_productos(termino, 1) if termino else []
+        self.sugerencia = sugeridos[0].nombre if sugeridos else ""
+        self.sugerencia_label.configure(text=f"¿Quiso decir: {self.sugerencia}?" if self.sugerencia else "")
+
+    def aplicar_sugerencia(self, event=None):
+        """Buscar el producto sugerido"""
+        if self.sugerencia:
+            self.buscar_var.set(self.sugerencia)
+
     def cargar_productos(self):
         """Cargar productos en el treeview"""
         # Verificar que el treeview esté inicializado
@@ -535,13 +560,20 @@ class VentanaProductos:
                 messagebox.showerror("Error", f"Error al eliminar: {str(e)}")
 
     def generar_skus(self):
-        """Generar SKUs para productos sin SKU"""
+        """Generar SKUs para productos sin SKU, mostrando el avance en el botón"""
+        texto_boton = self.boton_skus.cget("text")
+
+        def mostrar_progreso(procesados, total):
+            self.boton_skus.configure(text=f"{Iconos.ETIQUETA} Generando SKUs {procesados}/{total}")
+            self.ventana.update_idletasks()
+
         try:
-            productos_actualizados = self.controller.generar_skus_faltantes()
+            self.boton_skus.configure(state='disabled')
+            # El controlador informa el resultado
+            productos_actualizados = self.controller.generar_skus_faltantes(progreso=mostrar_progreso)
             if productos_actualizados > 0:
-                messagebox.showinfo("Éxito", f"Se generaron SKUs para {productos_actualizados} productos")
                 self.cargar_productos()
-            else:
-                messagebox.showinfo("Información", "Todos los productos ya tienen SKU asignado")
         except Exception as e:
             messagebox.showerror("Error", f"Error al generar SKUs: {str(e)}")
+        finally:
+            self.boton_skus.configure(text=texto_boton, state='normal')
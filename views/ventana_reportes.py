@@ -6,6 +6,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
 from controllers.reporte_controller import ReporteController
+from config.ejecutor_db import EjecutorDB, TEXTO_CARGANDO
 from datetime import datetime, timedelta
 from config.estilos import (Colores, Fuentes, Espaciado, Dimensiones,
                             Iconos, obtener_color_hover)
@@ -228,9 +229,29 @@ class VentanaReportes:
         cards_grid = ctk.CTkFrame(metrics_container, fg_color='white')
         cards_grid.pack(fill='x')
 
-        try:
-            resumen = self.controller.obtener_resumen_general()
+        cargando = ctk.CTkLabel(cards_grid, text=f"⏳ {TEXTO_CARGANDO}",
+                                text_color='#7f8c8d', font=("Segoe UI", 12))
+        cargando.pack(pady=20)
+
+        def mostrar_error(e):
+            cargando.destroy()
+            ctk.CTkLabel(cards_grid,
+                        text=f"Error al cargar métricas: {str(e)}",
+                        text_color='#e74c3c',
+                        font=("Segoe UI", 12)).pack(pady=20)
+
+        def mostrar_metricas(resumen):
+            cargando.destroy()
+            self.mostrar_metricas_dashboard(cards_grid, resumen)
 
+        # El resumen recorre ventas y productos: se calcula en el hilo de base de datos
+        EjecutorDB.obtener().ejecutar_en_tk(
+            cards_grid, self.controller.obtener_resumen_general, mostrar_metricas, mostrar_error
+        )
+
+    def mostrar_metricas_dashboard(self, cards_grid, resumen):
+        """Crear las tarjetas de métricas con el resumen ya calculado"""
+        try:
             metricas = [
                 {
                     'titulo': 'Ventas del Mes',
@@ -1079,9 +1100,9 @@ class VentanaReportes:
                 self.tree_ventas.delete(item)
 
             if inicio and fin:
-                ventas = self.controller.obtener_ventas_por_rango_fecha(inicio, fin)
+                ventas = self.controller.iterar_ventas_por_rango_fecha(inicio, fin)
             else:
-                ventas = self.controller.obtener_ventas_recientes(50)
+                ventas = self.controller.iterar_ventas_recientes(50)
 
             for venta in ventas:
                 self.tree_ventas.insert('', 'end', values=(
@@ -6,10 +6,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
 from controllers.venta_controller import VentaController
+from config.ejecutor_db import EjecutorDB, mostrar_cargando, limpiar_tabla
 from config.estilos import (Colores, Fuentes, Espaciado, Dimensiones,
                             Iconos, obtener_color_hover)
 
 class VentanaVentas:
+    # Milisegundos sin teclear antes de buscar en el combo de productos
+    ESPERA_FILTRO_MS = 250
+
     def __init__(self, parent):
         self.parent = parent
         self.controller = VentaController()
@@ -17,6 +21,8 @@ class VentanaVentas:
         self.tree = None
         self.tree_carrito = None
         self.productos_disponibles = []
+        self.productos_combo_todos = []
+        self._filtro_pendiente = None
         self.clientes_disponibles = []
         self.carrito = []
         self.crear_ventana()
@@ -240,10 +246,12 @@ class VentanaVentas:
                     font=("Segoe UI", 10, "bold"),
                     text_color='#667eea').pack(anchor='w', pady=(0, 5))
 
+        # Editable: al escribir se filtra la lista (con tolerancia a errores de tipeo)
         self.producto_combo = ttk.Combobox(form_content, textvariable=self.producto_var,
-                                          state="readonly", font=("Segoe UI", 10))
+                                          font=("Segoe UI", 10))
         self.producto_combo.pack(fill='x', pady=(0, 15), ipady=4)
         self.producto_combo.bind('<<ComboboxSelected>>', self.producto_seleccionado)
+        self.producto_combo.bind('<KeyRelease>', self.filtrar_productos_combo)
 
         # Grid para cantidad y precio
         grid_frame = ctk.CTkFrame(form_content, fg_color='transparent')
@@ -502,10 +510,9 @@ class VentanaVentas:
             productos_formateados = []
 
             for producto in productos_todos:
-                sku_display = producto.sku if producto.sku else "SIN-SKU"
-                formato = f"{producto.id} - {sku_display} - {producto.nombre} (Stock: {producto.stock}) - ${producto.precio_venta:.0f}"
-                productos_formateados.append(formato)
+                productos_formateados.append(self.formatear_producto_combo(producto))
 
+            self.productos_combo_todos = productos_formateados
             self.producto_combo['values'] = productos_formateados
 
         except Exception as e:
@@ -513,6 +520,50 @@ class VentanaVentas:
             self.cliente_combo['values'] = []
             self.producto_combo['values'] = []
 
+    def formatear_producto_combo(self, producto):
+        """Texto de un producto en el combo: ID - SKU - Nombre (Stock: X) - $precio"""
+        sku_display = producto.sku if producto.sku else "SIN-SKU"
+        return f"{producto.id} - {sku_display} - {producto.nombre} (Stock: {producto.stock}) - ${producto.precio_venta:.0f}"
+
+    def filtrar_productos_combo(self, event=None):
+        """
+        Filtrar el combo de productos con lo escrito; si no hay coincidencias,
+        mostrar los parecidos. La búsqueda espera a que se deje de escribir
+        y se hace en el hilo de base de datos
+        """
+        if event is not None and event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        if self._filtro_pendiente is not None:
+            self.producto_combo.after_cancel(self._filtro_pendiente)
+        self._filtro_pendiente = self.producto_combo.after(self.ESPERA_FILTRO_MS, self.buscar_productos_combo)
+
+    def buscar_productos_combo(self):
+        """Lanzar la búsqueda del término escrito en el combo de productos"""
+        self._filtro_pendiente = None
+        termino = self.producto_var.get().strip()
+        if not termino:
+            self.producto_combo['values'] = self.productos_combo_todos
+            return
+
+        def mostrar(productos):
+            # Si se siguió escribiendo, el resultado ya no corresponde
+            if self.producto_var.get().strip() == termino:
+                self.producto_combo['values'] = [self.formatear_producto_combo(p) for p in productos]
+
+        EjecutorDB.obtener().ejecutar_en_tk(
+            self.producto_combo, lambda: self.productos_para_termino(termino), mostrar,
+            lambda e: messagebox.showerror("Error", f"Error al filtrar productos: {str(e)}")
+        )
+
+    @staticmethod
+    def productos_para_termino(termino):
+        """Productos que coinciden con el término, o los parecidos (se ejecuta fuera del hilo de Tk)"""
+        from models.producto import Producto
+        productos = Producto.buscar_exactos(termino) or Producto.buscar_texto(termino, limite=50)
+        if not productos:
+            productos = [producto for producto, _ in Producto.sugerir_similares(termino, limite=10)]
+        return productos
+
     def producto_seleccionado(self, event):
         """Llenar precio cuando se selecciona producto"""
         seleccion = self.producto_var.get()
@@ -631,7 +682,8 @@ class VentanaVentas:
                     'precio_unitario': item['precio']
                 })
 
-            if self.controller.crear_venta(cliente_id, detalles_venta, self.observaciones_var.get(), self.numero_recibo_var.get()):
+            # El número mostrado es una vista previa: el definitivo se asigna al guardar
+            if self.controller.crear_venta(cliente_id, detalles_venta, self.observaciones_var.get()):
                 self.limpiar_formulario_venta()
                 self.cargar_ventas()
                 self.cargar_datos_iniciales()
@@ -669,56 +721,63 @@ class VentanaVentas:
         self.actualizar_total()
 
     def cargar_ventas(self):
-        """Cargar ventas en la lista"""
-        try:
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            from config.database import DatabaseManager
-            db = DatabaseManager()
-
-            query = '''
-                SELECT v.id, v.cliente_id, v.total, v.fecha_venta, v.observaciones,
-                       c.nombre, c.apellido
-                FROM ventas v
-                LEFT JOIN clientes c ON v.cliente_id = c.id
-                ORDER BY v.fecha_venta DESC
-            '''
-
-            resultados = db.ejecutar_consulta(query)
-
-            if resultados:
-                for fila in resultados:
-                    venta_id = fila[0]
-                    total = fila[2]
-                    fecha_venta = fila[3]
-                    observaciones = fila[4] or ""
-
-                    if fila[5] and fila[6]:
-                        cliente_nombre = f"{fila[5]} {fila[6]}"
-                    else:
-                        cliente_nombre = "Cliente no encontrado"
-
-                    try:
-                        if isinstance(fecha_venta, str):
-                            from datetime import datetime
-                            fecha_obj = datetime.strptime(fecha_venta, '%Y-%m-%d %H:%M:%S')
-                            fecha_formateada = fecha_obj.strftime('%Y-%m-%d %H:%M')
-                        else:
-                            fecha_formateada = str(fecha_venta)
-                    except:
-                        fecha_formateada = str(fecha_venta)
-
-                    self.tree.insert('', 'end', values=(
-                        venta_id,
-                        cliente_nombre,
-                        f"${total:.2f}",
-                        fecha_formateada,
-                        observaciones
-                    ))
+        """
+        Cargar ventas en la lista: se leen en el hilo de base de datos y
+        llegan a la tabla por bloques, sin reunir todas en memoria
+        """
+        mostrar_cargando(self.tree)
+        carga = object()
+        self._carga_ventas = carga
+        tabla_limpia = []
+
+        def agregar(filas):
+            # Una recarga posterior reemplaza a esta
+            if self._carga_ventas is not carga:
+                return False
+            if not tabla_limpia:
+                limpiar_tabla(self.tree)
+                tabla_limpia.append(True)
+            self.mostrar_filas_ventas(filas)
+
+        def terminar():
+            if self._carga_ventas is carga and not tabla_limpia:
+                limpiar_tabla(self.tree)
+
+        EjecutorDB.obtener().entregar_por_bloques_en_tk(
+            self.tree, self.iterar_filas_ventas, agregar, terminar,
+            lambda e: messagebox.showerror("Error", f"Error al cargar ventas: {str(e)}")
+        )
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar ventas: {str(e)}")
+    @staticmethod
+    def iterar_filas_ventas():
+        """Leer y formatear las ventas de a una (se ejecuta fuera del hilo de Tk)"""
+        from models.venta import Venta
+        from datetime import datetime
+
+        # Las ventas se leen por bloques sin materializar los objetos completos
+        for venta in Venta.iterar_todas():
+            fecha_venta = venta.fecha_venta
+            try:
+                if isinstance(fecha_venta, str):
+                    fecha_obj = datetime.strptime(fecha_venta, '%Y-%m-%d %H:%M:%S')
+                    fecha_formateada = fecha_obj.strftime('%Y-%m-%d %H:%M')
+                else:
+                    fecha_formateada = str(fecha_venta)
+            except:
+                fecha_formateada = str(fecha_venta)
+
+            yield (
+                venta.id,
+                venta.cliente_nombre or "Cliente no encontrado",
+                f"${venta.total:.2f}",
+                fecha_formateada,
+                venta.observaciones or ""
+            )
+
+    def mostrar_filas_ventas(self, filas):
+        """Agregar a la tabla un bloque de ventas leídas"""
+        for valores in filas:
+            self.tree.insert('', 'end', values=valores)
 
     def ver_detalle_venta(self, event=None):
         """Ver detalle de venta seleccionada"""